@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Offline fixture web server with stand-in Google and YouTube pages.
+
+Every page accepts ?variant=slow|late|consent:
+  slow    - the server holds the response for `delay` ms (default 1500)
+  late    - the main content is rendered by script after `delay` ms
+  consent - a full-page consent dialog covers the page until dismissed
+
+Run standalone with:  python benchmarks/fixture_server.py --port 8765
+"""
+import argparse
+import html
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, urlencode
+
+CONSENT_OVERLAY = """
+<div id="consent-overlay" role="dialog" aria-modal="true"
+     style="position:fixed;inset:0;background:rgba(0,0,0,.6);z-index:9999;display:flex;align-items:center;justify-content:center">
+  <div style="background:#fff;padding:24px;max-width:480px">
+    <h2>Before you continue</h2>
+    <p>We use cookies and data to deliver and maintain our services.</p>
+    <button id="W0wltc" type="button">Reject all</button>
+    <button id="L2AGLb" type="button" aria-label="Accept all">Accept all</button>
+  </div>
+</div>
+<script>
+  for (const id of ['W0wltc', 'L2AGLb']) {
+    document.getElementById(id).addEventListener('click', () => {
+      document.cookie = 'CONSENT=YES+; path=/';
+      document.getElementById('consent-overlay').remove();
+    });
+  }
+</script>
+"""
+
+
+def _page(title: str, body: str, variant: str, delay_ms: int, consent_given: bool) -> str:
+    if variant == 'late':
+        # Ship an empty shell and render the real content later, like a client-rendered app
+        body = f"""
+<div id="app"></div>
+<template id="late-content">{body}</template>
+<script>
+  setTimeout(() => {{
+    const content = document.getElementById('late-content').content.cloneNode(true);
+    document.getElementById('app').appendChild(content);
+    for (const s of document.querySelectorAll('#app script')) {{
+      const fresh = document.createElement('script');
+      fresh.textContent = s.textContent;
+      s.replaceWith(fresh);
+    }}
+  }}, {delay_ms});
+</script>"""
+    overlay = CONSENT_OVERLAY if variant == 'consent' and not consent_given else ''
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{html.escape(title)}</title></head>
+<body>{body}{overlay}</body></html>"""
+
+
+def _variant_suffix(variant: str, delay_ms: int) -> str:
+    if not variant:
+        return ''
+    return '&' + urlencode({'variant': variant, 'delay': delay_ms})
+
+
+def google_home(variant: str, delay_ms: int) -> str:
+    return f"""
+<form id="search-form" action="/google/search" method="get">
+  <textarea name="q" title="Search" rows="1"></textarea>
+  <input type="hidden" name="variant" value="{html.escape(variant)}">
+  <input type="hidden" name="delay" value="{delay_ms}">
+  <input type="submit" name="btnK" value="Google Search" class="gNO89b">
+</form>"""
+
+
+def google_results(query: str, variant: str, delay_ms: int) -> str:
+    results = ''.join(f"""
+  <div class="g">
+    <div class="yuRUbf">
+      <h3 class="LC20lb"><a href="/result/{i}?q={html.escape(query)}{_variant_suffix(variant, delay_ms)}">Result {i} for {html.escape(query)}</a></h3>
+    </div>
+  </div>""" for i in range(1, 11))
+    return f"""
+<form action="/google/search" method="get"><textarea name="q">{html.escape(query)}</textarea></form>
+<div id="search">{results}
+</div>"""
+
+
+def youtube_home(variant: str, delay_ms: int) -> str:
+    return f"""
+<form id="search-form" onsubmit="event.preventDefault(); go();">
+  <input id="search" name="search_query" type="text" placeholder="Search">
+  <button id="search-icon-legacy" type="submit">Search</button>
+</form>
+<script>
+  function go() {{
+    const q = document.querySelector("input[name='search_query']").value;
+    location.href = '/youtube/results?' + new URLSearchParams({{search_query: q}}) + '{_variant_suffix(variant, delay_ms)}';
+  }}
+</script>"""
+
+
+def youtube_results(query: str, variant: str, delay_ms: int) -> str:
+    # Results arrive through a search XHR, like the real youtubei endpoint
+    query_literal = json.dumps(query).replace('<', '\\u003c')
+    return f"""
+<input name="search_query" type="text" value="{html.escape(query)}">
+<div id="contents"></div>
+<script>
+  fetch('/youtubei/v1/search?' + new URLSearchParams({{query: {query_literal}}}))
+    .then(r => r.json())
+    .then(data => {{
+      const list = document.getElementById('contents');
+      for (const item of data.items) {{
+        const a = document.createElement('a');
+        a.id = 'video-title';
+        a.href = '/watch?v=' + item.id + '{_variant_suffix(variant, delay_ms)}';
+        a.textContent = item.title;
+        const row = document.createElement('ytd-video-renderer');
+        row.appendChild(a);
+        list.appendChild(row);
+      }}
+    }});
+</script>"""
+
+
+def watch_page(video_id: str) -> str:
+    return f"""
+<div id="player"><video id="movie_player" width="640" height="360"></video></div>
+<h1 class="title">Video {html.escape(video_id)}</h1>"""
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves the stand-in pages; see module docstring for variants"""
+
+    search_latency_ms = 300
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, content: str, content_type: str = 'text/html; charset=utf-8'):
+        data = content.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        variant = query.get('variant', [''])[0]
+        delay_ms = int(query.get('delay', ['1500'])[0] or 1500)
+        consent_given = 'CONSENT=YES' in (self.headers.get('Cookie') or '')
+
+        if variant == 'slow':
+            time.sleep(delay_ms / 1000)
+
+        path = url.path.rstrip('/') or '/'
+        if path == '/youtubei/v1/search':
+            time.sleep(self.search_latency_ms / 1000)
+            term = query.get('query', [''])[0]
+            items = [{'id': f"vid{i:03d}", 'title': f"{term} video {i}"} for i in range(1, 11)]
+            return self._send(200, json.dumps({'items': items}), 'application/json')
+
+        pages = {
+            '/': ('Fixtures', '<a href="/google">Google</a> <a href="/youtube">YouTube</a>'),
+            '/google': ('Google', google_home(variant, delay_ms)),
+            '/google/search': ('Google Search', google_results(query.get('q', [''])[0], variant, delay_ms)),
+            '/youtube': ('YouTube', youtube_home(variant, delay_ms)),
+            '/youtube/results': ('YouTube', youtube_results(query.get('search_query', [''])[0], variant, delay_ms)),
+            '/watch': ('Watch', watch_page(query.get('v', [''])[0]))
+        }
+        if path.startswith('/result/'):
+            title, body = 'Result', f"<h1 id='result-title'>Result page {html.escape(path.rsplit('/', 1)[-1])}</h1>"
+        elif path in pages:
+            title, body = pages[path]
+        else:
+            return self._send(404, _page('Not found', '<h1>404</h1>', '', 0, True))
+
+        self._send(200, _page(title, body, variant, delay_ms, consent_given))
+
+
+class FixtureServer:
+    """Runs the fixture site on a background thread; usable as a context manager"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self.httpd = ThreadingHTTPServer((host, port), FixtureHandler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'FixtureServer':
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='fixture-server', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Offline Google/YouTube fixture server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    server = FixtureServer(args.host, args.port)
+    print(f"🧪 Fixture server running at {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("👋 Fixture server stopped")
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Browser-engine benchmark suite.
+
+Runs BrowserAutomator step lists against the offline fixture server and reports
+per-action latency and per-scenario success rate, then checks the numbers
+against benchmarks/thresholds.json. Exits non-zero when a threshold regresses.
+
+    python benchmarks/run_benchmarks.py --iterations 5
+    python benchmarks/run_benchmarks.py --scenario google_search --json results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import List, Dict, Any
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(HERE))
+sys.path.append(HERE)
+
+from fixture_server import FixtureServer
+
+THRESHOLDS_PATH = os.path.join(HERE, 'thresholds.json')
+
+
+def build_scenarios(base: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Step lists mirroring the workflows Gemini extracts from tutorial videos"""
+
+    def google(variant: str = '') -> List[Dict[str, Any]]:
+        suffix = f"?variant={variant}" if variant else ''
+        return [
+            {"action": "goto", "url": f"{base}/google{suffix}", "description": "Navigate to Google"},
+            {"action": "type", "selector": "textarea[name='q']", "text": "playwright benchmark", "description": "Type search query"},
+            {"action": "click", "selector": "input[name='btnK']", "description": "Click search button"},
+            {"action": "wait", "selector": "#search", "timeout": 10000, "description": "Wait for search results"},
+            {"action": "click", "selector": "h3 a", "description": "Click first search result"},
+            {"action": "wait", "selector": "#result-title", "timeout": 10000, "description": "Wait for result page"}
+        ]
+
+    def youtube(variant: str = '') -> List[Dict[str, Any]]:
+        suffix = f"?variant={variant}" if variant else ''
+        return [
+            {"action": "goto", "url": f"{base}/youtube{suffix}", "description": "Navigate to YouTube"},
+            {"action": "type", "selector": "input[name='search_query']", "text": "lofi beats", "description": "Type in YouTube search"},
+            {"action": "click", "selector": "button[id='search-icon-legacy']", "description": "Click search button"},
+            {"action": "wait", "selector": "a#video-title", "timeout": 10000, "description": "Wait for search results"},
+            {"action": "click", "selector": "a[href*='/watch?v=']", "description": "Click on video"},
+            {"action": "wait", "selector": "#movie_player", "timeout": 10000, "description": "Wait for video page"}
+        ]
+
+    return {
+        'google_search': google(),
+        'youtube_search': youtube(),
+        'google_slow': google('slow'),
+        'youtube_late_render': youtube('late'),
+        'google_consent': google('consent'),
+        'youtube_consent': youtube('consent')
+    }
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+async def run_suite(base: str, names: List[str], iterations: int, headless: bool) -> Dict[str, Any]:
+    from services.browser import BrowserAutomator
+
+    automator = BrowserAutomator(
+        headless=headless,
+        demo_mode=False,
+        capture_on_failure=False,
+        checkpoint_on_failure=False
+    )
+    scenarios = build_scenarios(base)
+    report = {'scenarios': {}, 'actions': {}}
+    action_samples: Dict[str, List[float]] = {}
+    action_outcomes: Dict[str, List[bool]] = {}
+
+    for name in names:
+        durations = []
+        successes = 0
+        errors = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            result = await automator.execute_steps_async(scenarios[name])
+            durations.append((time.perf_counter() - started) * 1000)
+            if result['success']:
+                successes += 1
+            else:
+                errors.append(result.get('error'))
+            for timing in result.get('step_timings', []):
+                action_samples.setdefault(timing['action'], []).append(timing['duration_ms'])
+                action_outcomes.setdefault(timing['action'], []).append(timing['success'])
+
+        report['scenarios'][name] = {
+            'iterations': iterations,
+            'success_rate': successes / iterations,
+            'p50_ms': round(percentile(durations, 50), 1),
+            'p95_ms': round(percentile(durations, 95), 1),
+            'errors': errors[:3]
+        }
+        print(f"  {name:<22} success {successes}/{iterations}  p50 {percentile(durations, 50):8.1f} ms")
+
+    from services.interstitials import interstitial_registry
+    report['interstitials'] = {name: counts for name, counts in interstitial_registry.stats().items() if counts['fired']}
+
+    for action, samples in action_samples.items():
+        outcomes = action_outcomes[action]
+        report['actions'][action] = {
+            'count': len(samples),
+            'success_rate': sum(outcomes) / len(outcomes),
+            'p50_ms': round(percentile(samples, 50), 1),
+            'p95_ms': round(percentile(samples, 95), 1)
+        }
+    return report
+
+
+def check_thresholds(report: Dict[str, Any], thresholds: Dict[str, Any]) -> List[str]:
+    """Return a list of threshold violations"""
+    violations = []
+    for kind in ('scenarios', 'actions'):
+        for name, limits in thresholds.get(kind, {}).items():
+            measured = report[kind].get(name)
+            if measured is None:
+                continue
+            if 'min_success_rate' in limits and measured['success_rate'] < limits['min_success_rate']:
+                violations.append(f"{kind[:-1]} {name}: success rate {measured['success_rate']:.0%} < {limits['min_success_rate']:.0%}")
+            for stat in ('p50_ms', 'p95_ms'):
+                limit = limits.get(f"max_{stat}")
+                if limit is not None and measured[stat] > limit:
+                    violations.append(f"{kind[:-1]} {name}: {stat} {measured[stat]:.1f} > {limit}")
+    return violations
+
+
+def print_report(report: Dict[str, Any]):
+    print("\n📊 Per-action latency")
+    print(f"  {'action':<12}{'count':>7}{'success':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for action, stats in sorted(report['actions'].items()):
+        print(f"  {action:<12}{stats['count']:>7}{stats['success_rate']:>10.0%}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}")
+    if report.get('interstitials'):
+        print("\n🧹 Interstitials dismissed")
+        for name, counts in sorted(report['interstitials'].items()):
+            print(f"  {name:<28} fired {counts['fired']:>4}  dismissed {counts['dismissed']:>4}  failed {counts['failed']:>4}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run BrowserAutomator benchmarks against offline fixtures')
+    parser.add_argument('--iterations', type=int, default=3)
+    parser.add_argument('--scenario', action='append', help='Scenario name (repeatable); default: all')
+    parser.add_argument('--headed', action='store_true', help='Show the browser window')
+    parser.add_argument('--json', dest='json_path', help='Write the full report to this file')
+    parser.add_argument('--thresholds', default=THRESHOLDS_PATH)
+    parser.add_argument('--no-check', action='store_true', help='Report only, never fail on thresholds')
+    args = parser.parse_args()
+
+    with FixtureServer() as server:
+        available = build_scenarios(server.base_url)
+        names = args.scenario or list(available)
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            parser.error(f"unknown scenario(s): {', '.join(unknown)}; choose from {', '.join(available)}")
+
+        print(f"🧪 Benchmarking {len(names)} scenarios x {args.iterations} against {server.base_url}")
+        report = asyncio.run(run_suite(server.base_url, names, args.iterations, headless=not args.headed))
+
+    print_report(report)
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {args.json_path}")
+
+    if args.no_check:
+        return 0
+
+    with open(args.thresholds) as f:
+        thresholds = json.load(f)
+    violations = check_thresholds(report, thresholds)
+    if violations:
+        print("\n❌ Benchmark regressions:")
+        for violation in violations:
+            print(f"  - {violation}")
+        return 1
+    print("\n✅ All benchmark thresholds met")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
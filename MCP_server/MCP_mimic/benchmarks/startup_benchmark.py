@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+MCP server cold-start benchmark.
+
+Measures, over fresh interpreters:
+  import      - time to `import mcp_server`, and which heavy SDKs that import loaded
+  ready       - spawn of `python mcp_server.py` until the initialize response
+  tools_list  - spawn until the tools/list response (what MCP hosts wait for)
+
+then checks the numbers against the "startup" section of benchmarks/thresholds.json.
+No browser, database or Gemini key is needed: none of them may be touched before
+the first tool call.
+
+    python benchmarks/startup_benchmark.py --iterations 10
+    python benchmarks/startup_benchmark.py --json startup.json --no-check
+"""
+import argparse
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from typing import List, Dict, Any, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SERVER_DIR = os.path.dirname(HERE)
+sys.path.append(HERE)
+
+from run_benchmarks import THRESHOLDS_PATH, percentile
+
+# Modules that only tools should load
+HEAVY_MODULES = ['playwright', 'google.generativeai', 'motor', 'pymongo']
+
+IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import mcp_server
+elapsed = (time.perf_counter() - started) * 1000
+print('STARTUP_PROBE ' + json.dumps({'import_ms': elapsed, 'heavy': [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+INITIALIZE = {
+    'jsonrpc': '2.0', 'id': 1, 'method': 'initialize',
+    'params': {
+        'protocolVersion': '2025-06-18',
+        'capabilities': {},
+        'clientInfo': {'name': 'startup-benchmark', 'version': '1.0'}
+    }
+}
+INITIALIZED = {'jsonrpc': '2.0', 'method': 'notifications/initialized'}
+TOOLS_LIST = {'jsonrpc': '2.0', 'id': 2, 'method': 'tools/list'}
+
+
+def server_env() -> Dict[str, str]:
+    return {**os.environ, 'PYTHONUNBUFFERED': '1', 'PYTHONIOENCODING': 'utf-8'}
+
+
+def measure_import(timeout: float) -> Dict[str, Any]:
+    output = subprocess.run([sys.executable, '-c', IMPORT_PROBE], cwd=SERVER_DIR, env=server_env(),
+                            capture_output=True, text=True, timeout=timeout)
+    for line in output.stdout.splitlines():
+        if line.startswith('STARTUP_PROBE '):
+            return json.loads(line[len('STARTUP_PROBE '):])
+    raise RuntimeError(f"import probe failed: {output.stderr.strip()[-500:]}")
+
+
+def _read_lines(stream, lines: queue.Queue) -> None:
+    for line in stream:
+        lines.put(line)
+    lines.put(None)
+
+
+def _wait_for_response(lines: queue.Queue, request_id: int, deadline: float) -> Optional[Dict[str, Any]]:
+    """Next JSON-RPC response with request_id; the server's own log lines are skipped"""
+    while True:
+        try:
+            line = lines.get(timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            return None
+        if line is None:
+            return None
+        try:
+            message = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(message, dict) and message.get('id') == request_id:
+            return message
+
+
+def measure_handshake(timeout: float) -> Dict[str, Any]:
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, 'mcp_server.py'], cwd=SERVER_DIR, env=server_env(),
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                               text=True, encoding='utf-8')
+    lines: queue.Queue = queue.Queue()
+    threading.Thread(target=_read_lines, args=(process.stdout, lines), daemon=True).start()
+    deadline = time.monotonic() + timeout
+    try:
+        process.stdin.write(json.dumps(INITIALIZE) + '\n')
+        process.stdin.flush()
+        if _wait_for_response(lines, 1, deadline) is None:
+            raise RuntimeError("no initialize response")
+        ready_ms = (time.perf_counter() - started) * 1000
+
+        process.stdin.write(json.dumps(INITIALIZED) + '\n')
+        process.stdin.write(json.dumps(TOOLS_LIST) + '\n')
+        process.stdin.flush()
+        response = _wait_for_response(lines, 2, deadline)
+        if response is None:
+            raise RuntimeError("no tools/list response")
+        return {
+            'ready_ms': ready_ms,
+            'tools_list_ms': (time.perf_counter() - started) * 1000,
+            'tools': len(response.get('result', {}).get('tools', []))
+        }
+    finally:
+        process.kill()
+        process.wait()
+
+
+def run_suite(iterations: int, timeout: float) -> Dict[str, Any]:
+    samples: Dict[str, List[float]] = {'import_ms': [], 'ready_ms': [], 'tools_list_ms': []}
+    heavy = set()
+    tools = 0
+    for iteration in range(iterations):
+        probe = measure_import(timeout)
+        handshake = measure_handshake(timeout)
+        samples['import_ms'].append(probe['import_ms'])
+        samples['ready_ms'].append(handshake['ready_ms'])
+        samples['tools_list_ms'].append(handshake['tools_list_ms'])
+        heavy.update(probe['heavy'])
+        tools = handshake['tools']
+        print(f"  run {iteration + 1:>3}  import {probe['import_ms']:8.1f} ms  ready {handshake['ready_ms']:8.1f} ms"
+              f"  tools/list {handshake['tools_list_ms']:8.1f} ms")
+    return {
+        'iterations': iterations,
+        'tools': tools,
+        'heavy_modules_at_import': sorted(heavy),
+        **{name: {
+            'p50_ms': round(percentile(values, 50), 1),
+            'p95_ms': round(percentile(values, 95), 1)
+        } for name, values in samples.items()}
+    }
+
+
+def check_thresholds(report: Dict[str, Any], thresholds: Dict[str, Any]) -> List[str]:
+    """Return a list of threshold violations"""
+    limits = thresholds.get('startup', {})
+    violations = []
+    for name in ('import_ms', 'ready_ms', 'tools_list_ms'):
+        for stat in ('p50_ms', 'p95_ms'):
+            limit = limits.get(f"max_{name[:-3]}_{stat}")
+            if limit is not None and report[name][stat] > limit:
+                violations.append(f"{name[:-3]}: {stat} {report[name][stat]:.1f} > {limit}")
+    if not limits.get('allow_heavy_imports') and report['heavy_modules_at_import']:
+        violations.append(f"importing mcp_server loaded {', '.join(report['heavy_modules_at_import'])}")
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure MCP server cold start (import, initialize, tools/list)')
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--timeout', type=float, default=60, help='Seconds to wait for each spawned server')
+    parser.add_argument('--json', dest='json_path', help='Write the full report to this file')
+    parser.add_argument('--thresholds', default=THRESHOLDS_PATH)
+    parser.add_argument('--no-check', action='store_true', help='Report only, never fail on thresholds')
+    args = parser.parse_args()
+
+    print(f"🧪 Measuring MCP server cold start x {args.iterations}")
+    report = run_suite(args.iterations, args.timeout)
+
+    print("\n📊 Cold start")
+    for name in ('import_ms', 'ready_ms', 'tools_list_ms'):
+        print(f"  {name[:-3]:<12} p50 {report[name]['p50_ms']:8.1f} ms  p95 {report[name]['p95_ms']:8.1f} ms")
+    print(f"  heavy modules loaded at import: {', '.join(report['heavy_modules_at_import']) or 'none'}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {args.json_path}")
+
+    if args.no_check:
+        return 0
+
+    with open(args.thresholds) as f:
+        thresholds = json.load(f)
+    violations = check_thresholds(report, thresholds)
+    if violations:
+        print("\n❌ Startup regressions:")
+        for violation in violations:
+            print(f"  - {violation}")
+        return 1
+    print("\n✅ All startup thresholds met")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,24 @@
 # app.py - Main Flask Application
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response
 from flask_cors import CORS
 import os
 from dotenv import load_dotenv
 from services.vision import VideoAnalyzer
 from services.browser import BrowserAutomator
 from services.db import Database
+from services.validation import validate_steps, format_validation_errors
+from services.pagination import CursorError
+from services.worker_pool import BrowserWorkerPool
+from services.runs import run_registry
+from services.interstitials import interstitial_registry
+from services.screenshots import screenshot_writer
+from services.watchdog import browser_watchdog
+from services.metrics import metrics, PROMETHEUS_CONTENT_TYPE
 from datetime import datetime
 import traceback
+import asyncio
+import threading
+import time
 
 load_dotenv()
 
@@ -17,10 +28,73 @@ CORS(app)
 # Initialize services
 db = Database()
 video_analyzer = VideoAnalyzer()
-# FORCE VISIBLE BROWSER FOR DEMO - NO HEADLESS MODE!
-print("🎬 FORCING VISIBLE BROWSER MODE FOR DEMO!")
-browser_automator = BrowserAutomator(headless=False)  # ALWAYS VISIBLE!
-print("🎬 Browser automation mode: VISIBLE (FORCED FOR DEMO)")
+# Visible browser window; demo pacing (human typing, long pauses) only when BROWSER_DEMO_MODE is set
+browser_automator = BrowserAutomator(headless=False)
+print(f"🎬 Browser automation mode: VISIBLE, "
+      f"{'DEMO' if browser_automator.demo_mode else 'FAST'} (typing: {browser_automator.typing_strategy})")
+
+# Checkpointed runs keep their browser alive between requests, so they run on one
+# long-lived event loop instead of a per-request sync Playwright session
+automation_loop = asyncio.new_event_loop()
+threading.Thread(target=automation_loop.run_forever, name="automation-loop", daemon=True).start()
+
+# Worker mode: BROWSER_WORKERS=N hands plain runs to N browser processes instead of
+# driving Playwright inside the Flask process. Started on first use so Flask's
+# reloader parent never spawns workers.
+BROWSER_WORKERS = int(os.getenv('BROWSER_WORKERS', '0'))
+BROWSER_WORKER_TIMEOUT = float(os.getenv('BROWSER_WORKER_TIMEOUT', '600'))
+worker_pool = BrowserWorkerPool(
+    num_workers=BROWSER_WORKERS,
+    automator_options={'headless': browser_automator.headless}
+) if BROWSER_WORKERS > 0 else None
+if worker_pool:
+    print(f"🏭 Browser worker mode: {BROWSER_WORKERS} worker processes")
+
+# Per-endpoint latency, error and in-flight metrics, labelled by route template
+def _endpoint_name():
+    return f"{request.method} {request.url_rule.rule if request.url_rule else 'unmatched'}"
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_started = time.perf_counter()
+    metrics.begin('endpoint', _endpoint_name())
+
+@app.after_request
+def record_response_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return
+    error = exc is not None or g.pop('metrics_status', 500) >= 500
+    metrics.end('endpoint', _endpoint_name(), time.perf_counter() - started, error)
+
+def run_steps(steps, session_user=None, run_id=None, deadline_seconds=None):
+    """Run a step list in a worker process when worker mode is on, otherwise in-process"""
+    if worker_pool:
+        return worker_pool.execute(steps, session_user=session_user, timeout=BROWSER_WORKER_TIMEOUT,
+                                   run_id=run_id, deadline_seconds=deadline_seconds)
+    return browser_automator.execute_steps(steps, session_user=session_user, run_id=run_id,
+                                           deadline_seconds=deadline_seconds)
+
+def run_on_automation_loop(coro, timeout=None):
+    """Run a coroutine on the shared automation loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, automation_loop).result(timeout)
+
+def store_failure_evidence(execution_id, result):
+    """Persist failure screenshots captured during a run and return references for the response"""
+    evidence = {}
+    if result.get('failure_screenshots'):
+        evidence['failure_screenshots'] = result['failure_screenshots']
+    frames = result.pop('failure_frames', None)
+    if frames:
+        screenshot_ids = db.insert_failure_screenshots(str(execution_id), frames)
+        db.update_execution(str(execution_id), {'failure_screenshot_ids': screenshot_ids})
+        evidence['failure_screenshot_ids'] = screenshot_ids
+    return evidence
 
 @app.route('/analyze_video', methods=['POST'])
 def analyze_video():
@@ -66,8 +140,24 @@ def execute_browser_action():
         if not steps:
             return jsonify({'error': 'steps are required'}), 400
         
+        validation_errors = validate_steps(steps)
+        if validation_errors:
+            return jsonify({
+                'error': format_validation_errors(validation_errors),
+                'validation_errors': validation_errors
+            }), 400
+        
         # Execute automation
-        result = browser_automator.execute_steps(steps)
+        session_user = data.get('session_user')
+        run_id = data.get('run_id')
+        deadline_seconds = data.get('deadline_seconds')
+        if data.get('checkpoint'):
+            result = run_on_automation_loop(
+                browser_automator.execute_steps_async(steps, checkpoint=True, session_user=session_user,
+                                                      run_id=run_id, deadline_seconds=deadline_seconds)
+            )
+        else:
+            result = run_steps(steps, session_user=session_user, run_id=run_id, deadline_seconds=deadline_seconds)
         
         # Log execution
         execution_doc = {
@@ -75,15 +165,103 @@ def execute_browser_action():
             'status': 'completed' if result['success'] else 'failed',
             'log': result.get('log', []),
             'error': result.get('error'),
+            'failed_step': result.get('failed_step'),
+            'step_results': result.get('step_results'),
+            'screenshots': result.get('screenshots'),
+            'failure_screenshots': result.get('failure_screenshots'),
+            'checkpoint_id': result.get('checkpoint_id'),
             'created_at': datetime.utcnow()
         }
         execution_id = db.insert_execution(execution_doc)
+        evidence = store_failure_evidence(execution_id, result)
         
         return jsonify({
             'execution_id': str(execution_id),
             'success': result['success'],
             'log': result.get('log', []),
-            'error': result.get('error')
+            'error': result.get('error'),
+            'failed_step': result.get('failed_step'),
+            'step_results': result.get('step_results'),
+            'screenshots': result.get('screenshots'),
+            'run_id': result.get('run_id'),
+            'cancelled': result.get('cancelled', False),
+            'deadline_exceeded': result.get('deadline_exceeded', False),
+            'checkpoint_id': result.get('checkpoint_id'),
+            'checkpoint_expires_at': result.get('checkpoint_expires_at'),
+            **evidence
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/cancel_run', methods=['POST'])
+def cancel_run():
+    """
+    Cancel an active run by run_id and free its browser
+    """
+    try:
+        data = request.get_json()
+        run_id = data.get('run_id')
+        reason = data.get('reason') or 'cancelled by request'
+        
+        if not run_id:
+            return jsonify({'error': 'run_id is required'}), 400
+        
+        cancelled = run_registry.cancel(run_id, reason)
+        if not cancelled and worker_pool:
+            cancelled = worker_pool.cancel(run_id, reason)
+        if not cancelled:
+            return jsonify({'error': f'Run {run_id} not found or already finished'}), 404
+        
+        return jsonify({'run_id': run_id, 'cancelled': True})
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/resume_execution', methods=['POST'])
+def resume_execution():
+    """
+    Resume a checkpointed execution from its failed step with corrected steps
+    """
+    try:
+        data = request.get_json()
+        checkpoint_id = data.get('checkpoint_id')
+        steps = data.get('steps')
+        execution_id = data.get('execution_id')
+        
+        if not checkpoint_id or not steps:
+            return jsonify({'error': 'checkpoint_id and steps are required'}), 400
+        
+        result = run_on_automation_loop(browser_automator.resume_steps_async(
+            checkpoint_id, steps, run_id=data.get('run_id'), deadline_seconds=data.get('deadline_seconds')
+        ))
+        
+        evidence = {}
+        if execution_id:
+            db.update_execution(execution_id, {
+                'status': 'completed' if result['success'] else 'failed',
+                'log': result.get('log', []),
+                'error': result.get('error'),
+                'failed_step': result.get('failed_step'),
+                'step_results': result.get('step_results'),
+                'screenshots': result.get('screenshots'),
+                'checkpoint_id': result.get('checkpoint_id'),
+                'resumed_at': datetime.utcnow()
+            })
+            evidence = store_failure_evidence(execution_id, result)
+        
+        return jsonify({
+            'execution_id': execution_id,
+            'success': result['success'],
+            'log': result.get('log', []),
+            'error': result.get('error'),
+            'resumed_from_step': result.get('resumed_from_step'),
+            'failed_step': result.get('failed_step'),
+            'step_results': result.get('step_results'),
+            'screenshots': result.get('screenshots'),
+            'checkpoint_id': result.get('checkpoint_id'),
+            'checkpoint_expires_at': result.get('checkpoint_expires_at'),
+            **evidence
         })
         
     except Exception as e:
@@ -143,7 +321,7 @@ def run_task_from_video():
         video_id = db.insert_video(video_doc)
         
         # Step 2: Execute automation
-        result = browser_automator.execute_steps(steps)
+        result = run_steps(steps)
         
         # Step 3: Handle failures with LLM fallback
         if not result['success'] and result.get('error'):
@@ -159,9 +337,14 @@ def run_task_from_video():
             'status': 'completed' if result['success'] else 'failed',
             'log': result.get('log', []),
             'error': result.get('error'),
+            'failed_step': result.get('failed_step'),
+            'step_results': result.get('step_results'),
+            'screenshots': result.get('screenshots'),
+            'failure_screenshots': result.get('failure_screenshots'),
             'created_at': datetime.utcnow()
         }
         execution_id = db.insert_execution(execution_doc)
+        evidence = store_failure_evidence(execution_id, result)
         
         return jsonify({
             'video_id': str(video_id),
@@ -169,7 +352,11 @@ def run_task_from_video():
             'status': 'completed' if result['success'] else 'failed',
             'log': result.get('log', []),
             'error': result.get('error'),
-            'suggestion': result.get('suggestion')
+            'suggestion': result.get('suggestion'),
+            'failed_step': result.get('failed_step'),
+            'step_results': result.get('step_results'),
+            'screenshots': result.get('screenshots'),
+            **evidence
         })
         
     except Exception as e:
@@ -178,10 +365,18 @@ def run_task_from_video():
 # CRUD endpoints for tasks
 @app.route('/tasks', methods=['GET'])
 def get_tasks():
-    """Get all tasks/videos"""
+    """Get one page of tasks/videos (?limit=&cursor=&summary=1&fields=a,b)"""
     try:
-        tasks = db.get_all_videos()
-        return jsonify({'tasks': tasks})
+        fields = request.args.get('fields')
+        page = db.get_videos_page(
+            limit=request.args.get('limit', type=int),
+            cursor=request.args.get('cursor'),
+            fields=fields.split(',') if fields else None,
+            summary=request.args.get('summary') in ('1', 'true')
+        )
+        return jsonify({'tasks': page['items'], 'next_cursor': page['next_cursor'], 'has_more': page['has_more']})
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -221,7 +416,24 @@ def get_execution(execution_id):
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'timestamp': datetime.utcnow().isoformat()})
+    health = {
+        'status': 'healthy',
+        'timestamp': datetime.utcnow().isoformat(),
+        'active_runs': run_registry.list_runs(),
+        'interstitials': interstitial_registry.stats(),
+        'screenshots': screenshot_writer.stats(),
+        'browser_memory': browser_watchdog.snapshot()
+    }
+    if worker_pool:
+        health['worker_pool'] = worker_pool.stats()
+    if browser_automator.browser_server:
+        health['browser_server'] = browser_automator.browser_server.stats()
+    return jsonify(health)
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Per-endpoint and per-dependency metrics in Prometheus text format"""
+    return Response(metrics.render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=8080)
\ No newline at end of file
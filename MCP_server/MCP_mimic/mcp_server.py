@@ -1,7 +1,6 @@
 # mcp_server.py - Updated MCP Server for v1.13.1+
 import asyncio
-import json
-from typing import Any, Sequence, Dict, List
+from typing import Any, Sequence, Dict, List, Optional
 from mcp.server.models import InitializationOptions
 from mcp.server import NotificationOptions, Server
 from mcp.server.stdio import stdio_server
@@ -14,29 +13,178 @@ from mcp.types import (
     LoggingLevel
 )
 import mcp.types as types
-from services.vision import VideoAnalyzer
-from services.browser import BrowserAutomator
-from services.db import Database
+from services.validation import STEP_SCHEMA, STEPS_SCHEMA, validate_steps, format_validation_errors
+from services.runs import run_registry
+from services.interstitials import interstitial_registry
+from services.screenshots import screenshot_writer
+from services.watchdog import browser_watchdog
+from services.offload import ToolExecutor, ClientLimiter, ClientBusy
+from services.metrics import metrics, start_metrics_server
+from services.progress import ProgressReporter
+from services.lazy import LazyService
+from services.pagination import CursorError
+from services.jobs import JobQueue, JobQueueFull, JOB_STATUSES
+from services.serialization import encode_response, budget_for, dumps
+from services.artifacts import artifact_store, artifacts_enabled, ARTIFACT_URI_PREFIX
+from services.resources import ResourceSubscriptions, RESOURCE_COLLECTIONS, resource_uri, parse_resource_uri
+from mcp.server.lowlevel.helper_types import ReadResourceContents
 from datetime import datetime
 import traceback
 import os
+import uuid
+import weakref
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Initialize services
-try:
-    db = Database()
-    video_analyzer = VideoAnalyzer()
-    browser_automator = BrowserAutomator(headless=False)  # Show browser window
-    print("✅ All services initialized successfully")
-except Exception as e:
-    print(f"❌ Error initializing services: {e}")
-    # Continue anyway for demo purposes
+# Services are built on first use so importing this module (list_tools,
+# mcp_client.py) never pays for Mongo, Gemini or Playwright setup
+def _create_db():
+    from services.async_db import AsyncDatabase
+    database = AsyncDatabase()
+    database.changes.add_listener(resource_subscriptions.on_change)
+    # First use is always inside a tool call, so the event loop is running
+    asyncio.get_running_loop().create_task(database.create_indexes())
+    return database
+
+def _create_video_analyzer():
+    from services.vision import VideoAnalyzer
+    return VideoAnalyzer()
+
+def _create_browser_automator():
+    from services.browser import BrowserAutomator
+    return BrowserAutomator(headless=False)  # Show browser window
+
+# Subscribed clients are notified of writes to videos, executions and corrections
+resource_subscriptions = ResourceSubscriptions()
+RESOURCE_LIST_LIMIT = int(os.getenv('RESOURCE_LIST_LIMIT', '20'))
+
+db = LazyService('database', _create_db)
+video_analyzer = LazyService('video_analyzer', _create_video_analyzer)
+browser_automator = LazyService('browser_automator', _create_browser_automator)
+
+class BrowserAutomationServer(Server):
+    """
+    Low-level MCP server whose initialization options also advertise resource
+    subscriptions and list_changed notifications (used by both transports)
+    """
+
+    def create_initialization_options(self, notification_options: NotificationOptions | None = None,
+                                      experimental_capabilities: Dict[str, Dict[str, Any]] | None = None) -> InitializationOptions:
+        options = super().create_initialization_options(
+            notification_options or NotificationOptions(resources_changed=True),
+            experimental_capabilities or {}
+        )
+        # The low-level server never advertises subscribe; this server supports it
+        if options.capabilities.resources is not None:
+            options.capabilities.resources.subscribe = True
+        return options
 
 # Create MCP server
-server = Server("browser-automation-mcp")
+server = BrowserAutomationServer("browser-automation-mcp", version="1.0.0")
+
+# Bounded thread pool for blocking Gemini calls and per-tool concurrency limits
+tool_executor = ToolExecutor()
+
+# Per-client call limits, so one client of a shared HTTP server cannot take every slot
+client_limiter = ClientLimiter()
+
+def progress_reporter() -> ProgressReporter:
+    """
+    Progress reporter for the tool call being handled.
+    Without a progress token from the client it is a no-op.
+    """
+    try:
+        ctx = server.request_context
+    except LookupError:
+        return ProgressReporter()
+    token = ctx.meta.progressToken if ctx.meta else None
+    if token is None:
+        return ProgressReporter()
+    
+    async def send(progress: float, total, message):
+        await ctx.session.send_progress_notification(
+            token, progress, total=total, message=message, related_request_id=ctx.request_id
+        )
+    return ProgressReporter(send)
+
+async def store_failure_evidence(execution_id, result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Persist failure screenshots captured by the browser automator.
+    Frames buffered for the database sink are stored and replaced by their IDs.
+    """
+    evidence = {}
+    if result.get('failure_screenshots'):
+        evidence['failure_screenshots'] = result['failure_screenshots']
+    frames = result.pop('failure_frames', None)
+    if frames:
+        screenshot_ids = await db.insert_failure_screenshots(str(execution_id), frames)
+        await db.update_execution(str(execution_id), {'failure_screenshot_ids': screenshot_ids})
+        evidence['failure_screenshot_ids'] = screenshot_ids
+    return evidence
+
+class ExecutionRecorder:
+    """
+    Keeps an execution document current while its run is in progress: inserted as
+    'running' before the first step, updated after every step and once at the end,
+    so clients subscribed to mimic://executions/<id> can watch the run.
+    """
+
+    def __init__(self, progress: ProgressReporter):
+        self.progress = progress
+        self.execution_id = None
+        self.step_results: List[Dict[str, Any]] = []
+        self._loop = asyncio.get_running_loop()
+        self._write_lock = asyncio.Lock()
+        self._pending = set()
+
+    async def start(self, execution_doc: Dict[str, Any]):
+        self.execution_id = await db.insert_execution({
+            **execution_doc,
+            'status': 'running',
+            'step_results': [],
+            'completed_steps': 0,
+            'created_at': datetime.utcnow()
+        })
+        return self.execution_id
+
+    def on_step(self, outcome: Dict[str, Any]) -> None:
+        """BrowserAutomator on_step listener: report progress and record the step"""
+        self.progress.on_step(outcome)
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._record(outcome)
+        else:
+            self._loop.call_soon_threadsafe(self._record, outcome)
+
+    def _record(self, outcome: Dict[str, Any]) -> None:
+        self.step_results.append(outcome)
+        task = self._loop.create_task(self._write_steps())
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _write_steps(self) -> None:
+        # Writes are serialised and always send the latest list, so a slow write never overwrites a newer one
+        async with self._write_lock:
+            try:
+                await db.update_execution(str(self.execution_id), {
+                    'step_results': list(self.step_results),
+                    'completed_steps': len(self.step_results)
+                })
+            except Exception as e:
+                print(f"⚠️ Could not record step for execution {self.execution_id}: {e}")
+
+    async def finish(self, update: Dict[str, Any]) -> None:
+        """Write the run's final state once the pending step writes are done"""
+        # Let steps reported from other threads reach _record first
+        await asyncio.sleep(0)
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        await db.update_execution(str(self.execution_id), {**update, 'finished_at': datetime.utcnow()})
 
 @server.list_tools()
 async def handle_list_tools() -> List[Tool]:
@@ -65,39 +213,76 @@ async def handle_list_tools() -> List[Tool]:
             inputSchema={
                 "type": "object",
                 "properties": {
-                    "steps": {
-                        "type": "array",
-                        "description": "Array of browser automation steps to execute",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "action": {
-                                    "type": "string",
-                                    "enum": ["goto", "click", "type", "wait", "scroll", "screenshot", "select", "hover", "press"]
-                                },
-                                "selector": {"type": "string"},
-                                "url": {"type": "string"},
-                                "text": {"type": "string"},
-                                "value": {"type": "string"},
-                                "key": {"type": "string"},
-                                "timeout": {"type": "integer"},
-                                "direction": {"type": "string"},
-                                "amount": {"type": "integer"},
-                                "path": {"type": "string"},
-                                "description": {"type": "string"}
-                            },
-                            "required": ["action"]
-                        }
-                    },
+                    "steps": STEPS_SCHEMA,
                     "video_id": {
                         "type": "string",
                         "description": "Optional video ID for execution logging and tracking"
+                    },
+                    "checkpoint": {
+                        "type": "boolean",
+                        "description": "Keep the browser open after a failed step so the run can be continued with resume_execution"
+                    },
+                    "session_user": {
+                        "type": "string",
+                        "description": "User whose saved session (cookies/localStorage) is used to skip steps before a session_checkpoint"
+                    },
+                    "run_id": {
+                        "type": "string",
+                        "description": "Caller-chosen run ID that cancel_run can target; generated when omitted"
+                    },
+                    "deadline_seconds": {
+                        "type": "number",
+                        "minimum": 1,
+                        "description": "Overall run deadline; every wait is capped to the time left"
                     }
                 },
                 "required": ["steps"],
                 "additionalProperties": False
             }
         ),
+        Tool(
+            name="resume_execution",
+            description="Resume a checkpointed execution from its failed step with corrected steps, reusing the still-open browser",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "checkpoint_id": {
+                        "type": "string",
+                        "description": "Checkpoint ID returned by a failed execute_browser_action call"
+                    },
+                    "steps": {
+                        "type": "array",
+                        "description": "Corrected steps, starting at the failed step of the original run",
+                        "items": STEP_SCHEMA
+                    },
+                    "execution_id": {
+                        "type": "string",
+                        "description": "Optional execution ID whose record should be updated with the resumed outcome"
+                    }
+                },
+                "required": ["checkpoint_id", "steps"],
+                "additionalProperties": False
+            }
+        ),
+        Tool(
+            name="cancel_run",
+            description="Cancel an active browser automation run and close its browser immediately",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "run_id": {
+                        "type": "string",
+                        "description": "Run ID passed to (or returned by) execute_browser_action"
+                    },
+                    "reason": {
+                        "type": "string",
+                        "description": "Optional reason recorded in the run's error"
+                    }
+                },
+                "required": ["run_id"],
+                "additionalProperties": False
+            }
+        ),
         Tool(
             name="fallback_llm",
             description="Get AI-powered suggestions for failed automation steps using contextual error analysis",
@@ -135,10 +320,32 @@ async def handle_list_tools() -> List[Tool]:
         ),
         Tool(
             name="get_tasks",
-            description="Retrieve all stored video analysis tasks with their extracted steps and metadata",
+            description="List stored video analysis tasks newest first, one page at a time; pass next_cursor back to get the next page",
             inputSchema={
                 "type": "object",
-                "properties": {},
+                "properties": {
+                    "limit": {
+                        "type": "integer",
+                        "description": "Maximum number of tasks per page (default: 50)",
+                        "default": 50,
+                        "minimum": 1,
+                        "maximum": 200
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "next_cursor from the previous page"
+                    },
+                    "summary": {
+                        "type": "boolean",
+                        "description": "Return URL, upload time and step count instead of full steps (default: true)",
+                        "default": True
+                    },
+                    "fields": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Return only these task fields (overrides summary)"
+                    }
+                },
                 "additionalProperties": False
             }
         ),
@@ -205,6 +412,21 @@ async def handle_list_tools() -> List[Tool]:
                 "additionalProperties": False
             }
         ),
+        Tool(
+            name="get_server_metrics",
+            description="Per-tool and per-dependency (Mongo, Gemini, Playwright) call counts, error rates, in-flight calls and latency percentiles since server start",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "kind": {
+                        "type": "string",
+                        "enum": ["tool", "dependency"],
+                        "description": "Only return this kind of series"
+                    }
+                },
+                "additionalProperties": False
+            }
+        ),
         Tool(
             name="get_recent_activity",
             description="Get recent system activity including video analysis, executions, and corrections",
@@ -217,17 +439,269 @@ async def handle_list_tools() -> List[Tool]:
                         "default": 10,
                         "minimum": 1,
                         "maximum": 100
+                    },
+                    "summary": {
+                        "type": "boolean",
+                        "description": "Leave out steps, logs and step results (default: true)",
+                        "default": True
+                    },
+                    "cursors": {
+                        "type": "object",
+                        "description": "next_cursors from the previous call, to page further back",
+                        "properties": {
+                            "videos": {"type": "string"},
+                            "executions": {"type": "string"},
+                            "corrections": {"type": "string"}
+                        },
+                        "additionalProperties": False
+                    }
+                },
+                "additionalProperties": False
+            }
+        ),
+        Tool(
+            name="submit_job",
+            description="Queue a long-running tool call in the background and return its job ID immediately; poll get_job for progress and the result",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "tool": {
+                        "type": "string",
+                        "enum": list(JOB_TOOLS),
+                        "description": "Tool to run as a job"
+                    },
+                    "arguments": {
+                        "type": "object",
+                        "description": "Arguments for the tool, exactly as the tool itself takes them",
+                        "additionalProperties": True
+                    }
+                },
+                "required": ["tool"],
+                "additionalProperties": False
+            }
+        ),
+        Tool(
+            name="get_job",
+            description="Get a job's status, latest progress and, once finished, its result",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": {
+                        "type": "string",
+                        "description": "Job ID returned by submit_job"
+                    },
+                    "include_result": {
+                        "type": "boolean",
+                        "description": "Include the tool result of a finished job (default: true)",
+                        "default": True
+                    }
+                },
+                "required": ["job_id"],
+                "additionalProperties": False
+            }
+        ),
+        Tool(
+            name="list_jobs",
+            description="List jobs newest first, one page at a time, optionally filtered by status",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "status": {
+                        "type": "string",
+                        "enum": JOB_STATUSES
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": "Maximum number of jobs per page (default: 50)",
+                        "default": 50,
+                        "minimum": 1,
+                        "maximum": 200
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "next_cursor from the previous page"
+                    }
+                },
+                "additionalProperties": False
+            }
+        ),
+        Tool(
+            name="cancel_job",
+            description="Cancel a queued or running job; a running browser job has its browser closed",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": {
+                        "type": "string",
+                        "description": "Job ID returned by submit_job"
+                    },
+                    "reason": {
+                        "type": "string",
+                        "description": "Optional reason recorded in the job's error"
                     }
                 },
+                "required": ["job_id"],
                 "additionalProperties": False
             }
         )
     ]
 
 @server.call_tool()
-async def handle_call_tool(name: str, arguments: Dict[str, Any] | None) -> List[types.TextContent]:
+async def handle_call_tool(name: str, arguments: Dict[str, Any] | None) -> List[types.TextContent | types.ResourceLink]:
+    """
+    Run each tool call under the calling client's limit and the per-tool concurrency limit
+    """
+    with metrics.track('tool', name) as call:
+        try:
+            async with client_limiter.client_slot(_current_session()), tool_executor.tool_slot(name):
+                progress = progress_reporter()
+                try:
+                    payload = await _call_tool(name, arguments, progress)
+                finally:
+                    await progress.close()
+        except ClientBusy as e:
+            payload = {"error": str(e), "tool": name, "retryable": True}
+        if isinstance(payload, dict) and payload.get("error"):
+            call.failed()
+    return tool_response(name, payload)
+
+def tool_response(name: str, payload: Dict[str, Any]) -> List[types.TextContent | types.ResourceLink]:
     """
-    Handle tool calls with comprehensive error handling and logging
+    Encode a tool result within the tool's size budget.
+    Fields moved to the artifact store are linked as resources after the JSON text.
+    """
+    store = artifact_store.for_owner(_session_key()) if artifacts_enabled() else None
+    text, refs = encode_response(payload, budget_for(name), store)
+    contents = [types.TextContent(type="text", text=text)]
+    for ref in refs:
+        contents.append(types.ResourceLink(
+            type="resource_link", uri=ref['uri'], name=ref['name'], mimeType=ref['mime_type'], size=ref['bytes']
+        ))
+    return contents
+
+def _current_session():
+    try:
+        return server.request_context.session
+    except LookupError:
+        return None
+
+# Opaque per-session keys for scoping artifacts; entries vanish with their session
+_session_keys: 'weakref.WeakKeyDictionary[Any, str]' = weakref.WeakKeyDictionary()
+
+def _session_key() -> Optional[str]:
+    """Artifact owner for the calling client (None outside a client session)"""
+    session = _current_session()
+    if session is None:
+        return None
+    key = _session_keys.get(session)
+    if key is None:
+        key = _session_keys[session] = uuid.uuid4().hex
+    return key
+
+def _resource_name(collection: str, doc: Dict[str, Any]) -> str:
+    if collection == 'videos':
+        return doc.get('video_url') or f"video {doc['_id']}"
+    if collection == 'executions':
+        return f"execution {doc['_id']} ({doc.get('status', 'unknown')})"
+    return f"correction {doc['_id']} for execution {doc.get('execution_id')}"
+
+@server.list_resources()
+async def handle_list_resources() -> List[Resource]:
+    """
+    List the most recent videos, executions and corrections plus large tool
+    result fields currently held as artifacts
+    """
+    session = _current_session()
+    if session is not None:
+        resource_subscriptions.watch_list(session)
+    resources = []
+    try:
+        activity = await db.get_recent_activity(RESOURCE_LIST_LIMIT, summary=True)
+        for collection in RESOURCE_COLLECTIONS:
+            for doc in activity[f"recent_{collection}"]:
+                resources.append(Resource(
+                    uri=resource_uri(collection, doc['_id']),
+                    name=_resource_name(collection, doc),
+                    mimeType="application/json"
+                ))
+    except Exception as e:
+        print(f"⚠️ Could not list database resources: {e}")
+    resources.extend(
+        Resource(uri=ref['uri'], name=ref['name'], mimeType=ref['mime_type'], size=ref['bytes'])
+        for ref in artifact_store.list(owner=_session_key())
+    )
+    return resources
+
+@server.list_resource_templates()
+async def handle_list_resource_templates() -> List[types.ResourceTemplate]:
+    """
+    URI templates for reading any video, execution or correction by ID
+    """
+    return [
+        types.ResourceTemplate(
+            uriTemplate=resource_uri(collection, '{id}'),
+            name=collection,
+            description=f"One document from the {collection} collection; subscribe to be notified of changes",
+            mimeType="application/json"
+        )
+        for collection in RESOURCE_COLLECTIONS
+    ]
+
+@server.read_resource()
+async def handle_read_resource(uri) -> List[ReadResourceContents]:
+    """
+    Return a stored document or the body of an artifact referenced from a tool result
+    """
+    uri = str(uri)
+    if uri.startswith(ARTIFACT_URI_PREFIX):
+        entry = artifact_store.get(uri, owner=_session_key())
+        if entry is None:
+            raise ValueError(f"Unknown or expired resource: {uri}")
+        return [ReadResourceContents(content=entry['data'].decode(), mime_type=entry['mime_type'])]
+    collection, doc_id = parse_resource_uri(uri)
+    readers = {
+        'videos': db.get_video_by_id,
+        'executions': db.get_execution_by_id,
+        'corrections': db.get_correction_by_id
+    }
+    doc = await readers[collection](doc_id)
+    if doc is None:
+        raise ValueError(f"Resource not found: {uri}")
+    return [ReadResourceContents(content=dumps(doc).decode(), mime_type="application/json")]
+
+@server.subscribe_resource()
+async def handle_subscribe_resource(uri) -> None:
+    """
+    Send notifications/resources/updated to this client when the document changes
+    """
+    parse_resource_uri(str(uri))
+    session = _current_session()
+    if session is not None:
+        resource_subscriptions.subscribe(str(uri), session)
+
+@server.unsubscribe_resource()
+async def handle_unsubscribe_resource(uri) -> None:
+    session = _current_session()
+    if session is not None:
+        resource_subscriptions.unsubscribe(str(uri), session)
+
+# Tools that can run in the background through submit_job
+JOB_TOOLS = ("analyze_video", "execute_browser_action", "resume_execution", "run_task_from_video", "fallback_llm")
+
+async def _run_job(tool: str, arguments: Dict[str, Any], progress: ProgressReporter) -> Dict[str, Any]:
+    """Run a queued job through the same handler and per-tool limits as a direct call"""
+    async with tool_executor.tool_slot(tool):
+        return await _call_tool(tool, dict(arguments), progress)
+
+job_queue = JobQueue(_run_job, db)
+
+async def _call_tool(name: str, arguments: Dict[str, Any] | None,
+                     progress: ProgressReporter) -> Dict[str, Any]:
+    """
+    Handle tool calls with comprehensive error handling and logging.
+    Database calls are awaited on the async driver; blocking Gemini calls go through tool_executor.
+    Long-running tools report each stage and executed step through progress.
+    Returns the result dict; handle_call_tool encodes it for the client.
     """
     if arguments is None:
         arguments = {}
@@ -238,13 +712,12 @@ async def handle_call_tool(name: str, arguments: Dict[str, Any] | None) -> List[
         if name == "analyze_video":
             video_url = arguments.get("video_url")
             if not video_url:
-                return [types.TextContent(
-                    type="text",
-                    text=json.dumps({"error": "video_url is required"})
-                )]
+                return {"error": "video_url is required"}
             
             # Analyze video with Gemini
-            steps = video_analyzer.analyze_video(video_url)
+            analyzer = await tool_executor.call(video_analyzer.get)
+            steps = await tool_executor.call(analyzer.analyze_video, video_url, progress.advance)
+            progress.finish(f"Extracted {len(steps)} steps")
             
             # Store in database
             video_doc = {
@@ -252,7 +725,7 @@ async def handle_call_tool(name: str, arguments: Dict[str, Any] | None) -> List[
                 'uploaded_at': datetime.utcnow(),
                 'steps': steps
             }
-            video_id = db.insert_video(video_doc)
+            video_id = await db.insert_video(video_doc)
             
             result = {
                 'video_id': str(video_id),
@@ -261,35 +734,50 @@ async def handle_call_tool(name: str, arguments: Dict[str, Any] | None) -> List[
                 'analyzed_at': datetime.utcnow().isoformat()
             }
             
-            return [types.TextContent(
-                type="text",
-                text=json.dumps(result, default=str)
-            )]
+            return result
         
         elif name == "execute_browser_action":
             steps = arguments.get("steps")
             video_id = arguments.get("video_id")
             
             if not steps:
-                return [types.TextContent(
-                    type="text",
-                    text=json.dumps({"error": "steps are required"})
-                )]
+                return {"error": "steps are required"}
             
-            # Execute automation
-            result = await browser_automator.execute_steps_async(steps)
+            # Reject malformed steps before a browser is launched or an execution is logged
+            validation_errors = validate_steps(steps)
+            if validation_errors:
+                return {
+                    "error": format_validation_errors(validation_errors),
+                    "validation_errors": validation_errors
+                }
+            
+            # Execute automation, recording each step on the execution as it finishes
+            progress.set_total(len(steps) + 1)
+            automator = await tool_executor.call(browser_automator.get)
+            recorder = ExecutionRecorder(progress)
+            execution_id = await recorder.start({'video_id': video_id, 'total_steps': len(steps)})
+            result = await automator.execute_steps_async(
+                steps,
+                checkpoint=arguments.get("checkpoint"),
+                session_user=arguments.get("session_user"),
+                run_id=arguments.get("run_id"),
+                deadline_seconds=arguments.get("deadline_seconds"),
+                on_step=recorder.on_step
+            )
             
             # Log execution
-            execution_doc = {
-                'video_id': video_id,
+            await recorder.finish({
                 'status': 'completed' if result['success'] else 'failed',
                 'log': result.get('log', []),
                 'error': result.get('error'),
-                'total_steps': len(steps),
                 'failed_step': result.get('failed_step'),
-                'created_at': datetime.utcnow()
-            }
-            execution_id = db.insert_execution(execution_doc)
+                'step_results': result.get('step_results'),
+                'screenshots': result.get('screenshots'),
+                'failure_screenshots': result.get('failure_screenshots'),
+                'checkpoint_id': result.get('checkpoint_id')
+            })
+            evidence = await store_failure_evidence(execution_id, result)
+            progress.finish("Execution logged")
             
             response = {
                 'execution_id': str(execution_id),
@@ -297,26 +785,85 @@ async def handle_call_tool(name: str, arguments: Dict[str, Any] | None) -> List[
                 'log': result.get('log', []),
                 'error': result.get('error'),
                 'failed_step': result.get('failed_step'),
+                'step_results': result.get('step_results'),
+                'screenshots': result.get('screenshots'),
+                'run_id': result.get('run_id'),
+                'cancelled': result.get('cancelled', False),
+                'deadline_exceeded': result.get('deadline_exceeded', False),
+                'checkpoint_id': result.get('checkpoint_id'),
+                'checkpoint_expires_at': result.get('checkpoint_expires_at'),
+                **evidence,
                 'executed_at': datetime.utcnow().isoformat()
             }
             
-            return [types.TextContent(
-                type="text",
-                text=json.dumps(response, default=str)
-            )]
+            return response
+        
+        elif name == "resume_execution":
+            checkpoint_id = arguments.get("checkpoint_id")
+            steps = arguments.get("steps")
+            execution_id = arguments.get("execution_id")
+            
+            if not checkpoint_id or not steps:
+                return {"error": "checkpoint_id and steps are required"}
+            
+            progress.set_total(len(steps) + 1)
+            automator = await tool_executor.call(browser_automator.get)
+            result = await automator.resume_steps_async(checkpoint_id, steps, on_step=progress.on_step)
+            
+            evidence = {}
+            if execution_id:
+                await db.update_execution(execution_id, {
+                    'status': 'completed' if result['success'] else 'failed',
+                    'log': result.get('log', []),
+                    'error': result.get('error'),
+                    'failed_step': result.get('failed_step'),
+                    'step_results': result.get('step_results'),
+                    'screenshots': result.get('screenshots'),
+                    'checkpoint_id': result.get('checkpoint_id'),
+                    'resumed_at': datetime.utcnow()
+                })
+                evidence = await store_failure_evidence(execution_id, result)
+            progress.finish("Resumed run finished")
+            
+            response = {
+                'execution_id': execution_id,
+                'success': result['success'],
+                'log': result.get('log', []),
+                'error': result.get('error'),
+                'resumed_from_step': result.get('resumed_from_step'),
+                'failed_step': result.get('failed_step'),
+                'step_results': result.get('step_results'),
+                'screenshots': result.get('screenshots'),
+                'checkpoint_id': result.get('checkpoint_id'),
+                'checkpoint_expires_at': result.get('checkpoint_expires_at'),
+                **evidence,
+                'resumed_at': datetime.utcnow().isoformat()
+            }
+            
+            return response
+        
+        elif name == "cancel_run":
+            run_id = arguments.get("run_id")
+            if not run_id:
+                return {"error": "run_id is required"}
+            
+            cancelled = run_registry.cancel(run_id, arguments.get("reason") or "cancelled by request")
+            response = {'run_id': run_id, 'cancelled': cancelled}
+            if not cancelled:
+                response['error'] = f"Run {run_id} not found or already finished"
+            
+            return response
         
         elif name == "fallback_llm":
             error = arguments.get("error")
             context = arguments.get("context", {})
             
             if not error:
-                return [types.TextContent(
-                    type="text",
-                    text=json.dumps({"error": "error message is required"})
-                )]
+                return {"error": "error message is required"}
             
             # Get suggestion from Gemini
-            suggestion = video_analyzer.suggest_correction(error, context)
+            analyzer = await tool_executor.call(video_analyzer.get)
+            suggestion = await tool_executor.call(analyzer.suggest_correction, error, context)
             
             # Store correction
             correction_doc = {
@@ -326,7 +873,7 @@ async def handle_call_tool(name: str, arguments: Dict[str, Any] | None) -> List[
                 'context': context,
                 'created_at': datetime.utcnow()
             }
-            correction_id = db.insert_correction(correction_doc)
+            correction_id = await db.insert_correction(correction_doc)
             
             response = {
                 'suggestion': suggestion,
@@ -334,23 +881,22 @@ async def handle_call_tool(name: str, arguments: Dict[str, Any] | None) -> List[
                 'generated_at': datetime.utcnow().isoformat()
             }
             
-            return [types.TextContent(
-                type="text",
-                text=json.dumps(response, default=str)
-            )]
+            return response
         
         elif name == "run_task_from_video":
             video_url = arguments.get("video_url")
             
             if not video_url:
-                return [types.TextContent(
-                    type="text",
-                    text=json.dumps({"error": "video_url is required"})
-                )]
+                return {"error": "video_url is required"}
             
             # Step 1: Analyze video
             print(f"📹 Analyzing video: {video_url}")
-            steps = video_analyzer.analyze_video(video_url)
+            progress.advance("Analyzing video", force=True)
+            analyzer = await tool_executor.call(video_analyzer.get)
+            steps = await tool_executor.call(analyzer.analyze_video, video_url, progress.advance)
+            # Extraction, one unit per step, correction and logging
+            progress.set_total(progress.progress + len(steps) + 3)
+            progress.advance(f"Extracted {len(steps)} steps", force=True)
             
             # Store video
             video_doc = {
@@ -358,18 +904,22 @@ async def handle_call_tool(name: str, arguments: Dict[str, Any] | None) -> List[
                 'uploaded_at': datetime.utcnow(),
                 'steps': steps
             }
-            video_id = db.insert_video(video_doc)
+            video_id = await db.insert_video(video_doc)
             print(f"💾 Video stored with ID: {video_id}")
             
             # Step 2: Execute automation
             print(f"🤖 Executing {len(steps)} automation steps...")
-            result = await browser_automator.execute_steps_async(steps)
+            automator = await tool_executor.call(browser_automator.get)
+            recorder = ExecutionRecorder(progress)
+            execution_id = await recorder.start({'video_id': video_id, 'total_steps': len(steps)})
+            result = await automator.execute_steps_async(steps, on_step=recorder.on_step)
             
             # Step 3: Handle failures with LLM fallback
             suggestion = None
             if not result['success'] and result.get('error'):
                 print("🔧 Getting AI fallback suggestion...")
-                suggestion = video_analyzer.suggest_correction(
+                progress.advance("Getting AI correction suggestion", force=True)
+                suggestion = await tool_executor.call(analyzer.suggest_correction,
                     result['error'], 
                     {
                         'steps': steps, 
@@ -379,16 +929,17 @@ async def handle_call_tool(name: str, arguments: Dict[str, Any] | None) -> List[
                 )
             
             # Log execution
-            execution_doc = {
-                'video_id': video_id,
+            await recorder.finish({
                 'status': 'completed' if result['success'] else 'failed',
                 'log': result.get('log', []),
                 'error': result.get('error'),
-                'total_steps': len(steps),
                 'failed_step': result.get('failed_step'),
-                'created_at': datetime.utcnow()
-            }
-            execution_id = db.insert_execution(execution_doc)
+                'step_results': result.get('step_results'),
+                'screenshots': result.get('screenshots'),
+                'failure_screenshots': result.get('failure_screenshots')
+            })
+            evidence = await store_failure_evidence(execution_id, result)
+            progress.finish("Execution logged")
             
             response = {
                 'video_id': str(video_id),
@@ -399,130 +950,109 @@ async def handle_call_tool(name: str, arguments: Dict[str, Any] | None) -> List[
                 'suggestion': suggestion,
                 'total_steps': len(steps),
                 'failed_step': result.get('failed_step'),
+                'step_results': result.get('step_results'),
+                'screenshots': result.get('screenshots'),
+                **evidence,
                 'completed_at': datetime.utcnow().isoformat()
             }
             
-            return [types.TextContent(
-                type="text",
-                text=json.dumps(response, default=str)
-            )]
+            return response
         
         elif name == "get_tasks":
-            tasks = db.get_all_videos()
-            return [types.TextContent(
-                type="text",
-                text=json.dumps({
-                    'tasks': tasks,
-                    'total_count': len(tasks),
-                    'retrieved_at': datetime.utcnow().isoformat()
-                }, default=str)
-            )]
+            page, total_count = await asyncio.gather(
+                db.get_videos_page(
+                    limit=arguments.get("limit"),
+                    cursor=arguments.get("cursor"),
+                    fields=arguments.get("fields"),
+                    summary=arguments.get("summary", True)
+                ),
+                db.count_videos()
+            )
+            return {
+                'tasks': page['items'],
+                'count': len(page['items']),
+                'total_count': total_count,
+                'next_cursor': page['next_cursor'],
+                'has_more': page['has_more'],
+                'retrieved_at': datetime.utcnow().isoformat()
+            }
         
         elif name == "get_task":
             task_id = arguments.get("task_id")
             if not task_id:
-                return [types.TextContent(
-                    type="text",
-                    text=json.dumps({"error": "task_id is required"})
-                )]
+                return {"error": "task_id is required"}
             
-            task = db.get_video_by_id(task_id)
+            task = await db.get_video_by_id(task_id)
             if not task:
-                return [types.TextContent(
-                    type="text",
-                    text=json.dumps({"error": "Task not found"})
-                )]
+                return {"error": "Task not found"}
             
             # Get associated executions
-            executions = db.get_executions_by_video_id(task_id)
-            
-            return [types.TextContent(
-                type="text",
-                text=json.dumps({
-                    'task': task,
-                    'executions': executions,
-                    'execution_count': len(executions),
-                    'retrieved_at': datetime.utcnow().isoformat()
-                }, default=str)
-            )]
+            executions = await db.get_executions_by_video_id(task_id)
+            
+            return {
+                'task': task,
+                'executions': executions,
+                'execution_count': len(executions),
+                'retrieved_at': datetime.utcnow().isoformat()
+            }
         
         elif name == "delete_task":
             task_id = arguments.get("task_id")
             if not task_id:
-                return [types.TextContent(
-                    type="text",
-                    text=json.dumps({"error": "task_id is required"})
-                )]
+                return {"error": "task_id is required"}
             
-            result = db.delete_video(task_id)
+            result = await db.delete_video(task_id)
             if not result:
-                return [types.TextContent(
-                    type="text",
-                    text=json.dumps({"error": "Task not found"})
-                )]
-            
-            return [types.TextContent(
-                type="text",
-                text=json.dumps({
-                    "message": "Task deleted successfully",
-                    "task_id": task_id,
-                    "deleted_at": datetime.utcnow().isoformat()
-                })
-            )]
+                return {"error": "Task not found"}
+            
+            return {
+                "message": "Task deleted successfully",
+                "task_id": task_id,
+                "deleted_at": datetime.utcnow().isoformat()
+            }
         
         elif name == "get_execution":
             execution_id = arguments.get("execution_id")
             if not execution_id:
-                return [types.TextContent(
-                    type="text",
-                    text=json.dumps({"error": "execution_id is required"})
-                )]
+                return {"error": "execution_id is required"}
             
-            execution = db.get_execution_by_id(execution_id)
+            execution = await db.get_execution_by_id(execution_id)
             if not execution:
-                return [types.TextContent(
-                    type="text",
-                    text=json.dumps({"error": "Execution not found"})
-                )]
+                return {"error": "Execution not found"}
             
             # Get associated corrections
-            corrections = db.get_corrections_by_execution_id(execution_id)
-            
-            return [types.TextContent(
-                type="text",
-                text=json.dumps({
-                    'execution': execution,
-                    'corrections': corrections,
-                    'correction_count': len(corrections),
-                    'retrieved_at': datetime.utcnow().isoformat()
-                }, default=str)
-            )]
+            corrections = await db.get_corrections_by_execution_id(execution_id)
+            
+            return {
+                'execution': execution,
+                'corrections': corrections,
+                'correction_count': len(corrections),
+                'retrieved_at': datetime.utcnow().isoformat()
+            }
         
         elif name == "get_execution_stats":
-            stats = db.get_execution_stats()
-            return [types.TextContent(
-                type="text",
-                text=json.dumps({
-                    **stats,
-                    'generated_at': datetime.utcnow().isoformat()
-                }, default=str)
-            )]
+            stats = await db.get_execution_stats()
+            return {
+                **stats,
+                'generated_at': datetime.utcnow().isoformat()
+            }
         
         elif name == "get_recent_activity":
             limit = arguments.get("limit", 10)
-            activity = db.get_recent_activity(limit)
-            return [types.TextContent(
-                type="text",
-                text=json.dumps({
-                    **activity,
-                    'limit': limit,
-                    'retrieved_at': datetime.utcnow().isoformat()
-                }, default=str)
-            )]
+            activity = await db.get_recent_activity(
+                limit,
+                summary=arguments.get("summary", True),
+                cursors=arguments.get("cursors")
+            )
+            return {
+                **activity,
+                'limit': limit,
+                'retrieved_at': datetime.utcnow().isoformat()
+            }
         
         elif name == "health_check":
             try:
-                db_health = db.health_check()
+                db_health = await db.health_check()
                 
                 # Test AI service
                 ai_status = "available"
@@ -544,57 +1074,171 @@ async def handle_call_tool(name: str, arguments: Dict[str, Any] | None) -> List[
                         'browser_automator': 'available',
                         'mcp_server': 'running'
                     },
+                    'service_init': {service.name: service.status() for service in (db, video_analyzer, browser_automator)},
+                    'active_runs': run_registry.list_runs(),
+                    'interstitials': interstitial_registry.stats(),
+                    'screenshots': screenshot_writer.stats(),
+                    'browser_memory': await tool_executor.call(browser_watchdog.snapshot),
+                    'tool_executor': tool_executor.stats(),
+                    'clients': client_limiter.stats(),
+                    'jobs': job_queue.stats(),
+                    'resource_subscriptions': resource_subscriptions.stats(),
+                    'artifacts': {'mode': 'reference' if artifacts_enabled() else 'inline', **artifact_store.stats()},
+                    'browser_server': (browser_automator.browser_server.stats()
+                                       if browser_automator.loaded and browser_automator.browser_server else None),
                     'environment': {
                         'python_version': f"{os.sys.version_info.major}.{os.sys.version_info.minor}.{os.sys.version_info.micro}",
                         'mcp_version': "1.13.1"
                     }
                 }
                 
-                return [types.TextContent(
-                    type="text",
-                    text=json.dumps(system_health, default=str)
-                )]
+                return system_health
             except Exception as e:
-                return [types.TextContent(
-                    type="text",
-                    text=json.dumps({
-                        'status': 'unhealthy',
-                        'error': str(e),
-                        'timestamp': datetime.utcnow().isoformat()
-                    })
-                )]
+                return {
+                    'status': 'unhealthy',
+                    'error': str(e),
+                    'timestamp': datetime.utcnow().isoformat()
+                }
+        
+        elif name == "get_server_metrics":
+            return {
+                **metrics.snapshot(arguments.get("kind")),
+                'tool_executor': tool_executor.stats(),
+                'clients': client_limiter.stats(),
+                'jobs': job_queue.stats(),
+                'timestamp': datetime.utcnow().isoformat()
+            }
+        
+        elif name == "submit_job":
+            tool = arguments.get("tool")
+            if tool not in JOB_TOOLS:
+                return {"error": f"tool must be one of: {', '.join(JOB_TOOLS)}"}
+            
+            try:
+                job = await job_queue.submit(tool, arguments.get("arguments") or {})
+            except JobQueueFull as e:
+                return {"error": str(e), "retryable": True}
+            
+            return {
+                'job_id': job['job_id'],
+                'tool': tool,
+                'status': job['status'],
+                'queue_position': job['queue_position'],
+                'submitted_at': job['created_at'].isoformat()
+            }
+        
+        elif name == "get_job":
+            job_id = arguments.get("job_id")
+            if not job_id:
+                return {"error": "job_id is required"}
+            
+            job = await job_queue.get(job_id)
+            if not job:
+                return {"error": "Job not found"}
+            if not arguments.get("include_result", True):
+                job.pop('result', None)
+            
+            return {'job': job, 'retrieved_at': datetime.utcnow().isoformat()}
+        
+        elif name == "list_jobs":
+            await job_queue.start()
+            page = await db.get_jobs_page(
+                limit=arguments.get("limit"),
+                cursor=arguments.get("cursor"),
+                status=arguments.get("status")
+            )
+            return {
+                'jobs': page['items'],
+                'count': len(page['items']),
+                'next_cursor': page['next_cursor'],
+                'has_more': page['has_more'],
+                'queue': job_queue.stats(),
+                'retrieved_at': datetime.utcnow().isoformat()
+            }
+        
+        elif name == "cancel_job":
+            job_id = arguments.get("job_id")
+            if not job_id:
+                return {"error": "job_id is required"}
+            
+            response = await job_queue.cancel(job_id, arguments.get("reason") or "cancelled by request")
+            return response
         
         else:
-            return [types.TextContent(
-                type="text",
-                text=json.dumps({
-                    "error": f"Unknown tool: {name}",
-                    "available_tools": [
-                        "analyze_video", "execute_browser_action", "fallback_llm", 
-                        "run_task_from_video", "get_tasks", "get_task", "delete_task",
-                        "get_execution", "get_execution_stats", "get_recent_activity", 
-                        "health_check"
-                    ]
-                })
-            )]
+            return {
+                "error": f"Unknown tool: {name}",
+                "available_tools": [
+                    "analyze_video", "execute_browser_action", "resume_execution", "cancel_run", "fallback_llm", 
+                    "run_task_from_video", "get_tasks", "get_task", "delete_task",
+                    "get_execution", "get_execution_stats", "get_recent_activity", 
+                    "health_check", "get_server_metrics", "submit_job", "get_job", "list_jobs", "cancel_job"
+                ]
+            }
     
+    except CursorError as e:
+        # A bad next_cursor is the caller's mistake, not a server failure
+        return {"error": str(e), "tool": name, "invalid_argument": "cursor"}
     except Exception as e:
         error_details = {
             "error": str(e),
             "tool": name,
             "arguments": arguments,
-            "traceback": traceback.format_exc(),
             "timestamp": datetime.utcnow().isoformat()
         }
         print(f"❌ Tool execution error: {error_details}")
-        return [types.TextContent(
-            type="text",
-            text=json.dumps(error_details, default=str)
-        )]
+        print(traceback.format_exc())
+        # Tracebacks stay in the server log unless MCP_DEBUG is set
+        if os.getenv('MCP_DEBUG') == '1':
+            error_details["traceback"] = traceback.format_exc()
+        return error_details
+
+async def warm_services() -> None:
+    """
+    Build the services named in MCP_WARM_SERVICES up front, so the first client
+    of a long-lived HTTP server does not pay for them
+    """
+    names = [name.strip() for name in os.getenv('MCP_WARM_SERVICES', 'database,video_analyzer').split(',') if name.strip()]
+    for service in (db, video_analyzer, browser_automator):
+        if service.name not in names:
+            continue
+        try:
+            if service is db:
+                # Motor binds to the running loop; constructing it is cheap
+                service.get()
+            else:
+                await tool_executor.call(service.get)
+        except Exception:
+            # LazyService logged the failure; the first tool call retries
+            pass
+
+async def run_stdio():
+    """
+    Serve one client over stdin/stdout
+    """
+    # stdio has no HTTP server of its own; METRICS_PORT adds one for Prometheus
+    if os.getenv('METRICS_PORT'):
+        start_metrics_server(int(os.getenv('METRICS_PORT')))
+    async with stdio_server() as (read_stream, write_stream):
+        print("✅ MCP Server initialized and ready for connections")
+        await server.run(
+            read_stream,
+            write_stream,
+            server.create_initialization_options()
+        )
+
+async def run_http():
+    """
+    Serve many clients from this process over Streamable HTTP
+    """
+    from services.http_transport import create_app, serve, metrics_route
+    app = create_app(server, routes=[metrics_route()], on_startup=warm_services,
+                     status=lambda: {'clients': client_limiter.stats()})
+    await serve(app)
 
 async def main():
     """
-    Start the MCP server with proper initialization
+    Start the MCP server with proper initialization.
+    MCP_TRANSPORT selects stdio (default, one client per process) or http (shared server).
     """
     print("🚀 Starting MCP Browser Automation Server v1.13.1")
     
@@ -602,22 +1246,14 @@ async def main():
     if not os.getenv('GEMINI_API_KEY'):
         print("⚠️  Warning: GEMINI_API_KEY not set in environment")
     
+    transport = os.getenv('MCP_TRANSPORT', 'stdio').lower()
     try:
-        # Run the server using stdin/stdout streams
-        async with stdio_server() as (read_stream, write_stream):
-            print("✅ MCP Server initialized and ready for connections")
-            await server.run(
-                read_stream,
-                write_stream,
-                InitializationOptions(
-                    server_name="browser-automation-mcp",
-                    server_version="1.0.0",
-                    capabilities=server.get_capabilities(
-                        notification_options=NotificationOptions(),
-                        experimental_capabilities={}
-                    )
-                )
-            )
+        if transport == 'http':
+            await run_http()
+        elif transport == 'stdio':
+            await run_stdio()
+        else:
+            raise ValueError(f"Unknown MCP_TRANSPORT: {transport} (expected stdio or http)")
     except Exception as e:
         print(f"❌ Server startup failed: {e}")
         raise
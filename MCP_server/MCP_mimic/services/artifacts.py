@@ -0,0 +1,126 @@
+# services/artifacts.py - In-Memory Store for Large Tool Result Fields
+"""
+With RESPONSE_ARTIFACTS=reference, large fields of a tool result (step logs,
+extracted steps, job results) are kept here instead of being sent inline. The
+tool response carries a reference and an MCP resource link; the client
+fetches the body with resources/read when it actually needs it:
+
+    {"step_results": {"$artifact": "artifact://sha256/9f2c...", "bytes": 183422}}
+
+Artifacts are content addressed, so repeated results share one entry. The
+store is bounded by ARTIFACT_CACHE_MB and entries expire after
+ARTIFACT_TTL_SECONDS; a reference read after that returns None.
+
+Every entry records the owners (client sessions) that produced it, and only
+those owners can list or read it, so on a shared HTTP server one client's
+tool results are never visible to another. Use for_owner() to get a view
+bound to one session.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Hashable
+
+ARTIFACT_URI_PREFIX = 'artifact://sha256/'
+
+
+def artifacts_enabled() -> bool:
+    return os.getenv('RESPONSE_ARTIFACTS', 'inline').lower() == 'reference'
+
+
+class ArtifactStore:
+    """LRU store of artifact bodies keyed by their sha256 URI"""
+
+    def __init__(self, max_bytes: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self.max_bytes = max_bytes or int(float(os.getenv('ARTIFACT_CACHE_MB', '64')) * 1024 * 1024)
+        self.ttl_seconds = ttl_seconds or float(os.getenv('ARTIFACT_TTL_SECONDS', '3600'))
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def put(self, data: bytes, mime_type: str = 'application/json', name: Optional[str] = None,
+            owner: Hashable = None) -> Dict[str, Any]:
+        """Store data for owner and return its reference: uri, name, mime_type, bytes"""
+        uri = ARTIFACT_URI_PREFIX + hashlib.sha256(data).hexdigest()
+        ref = {'uri': uri, 'name': name or uri.rsplit('/', 1)[-1][:12], 'mime_type': mime_type, 'bytes': len(data)}
+        with self._lock:
+            entry = self._entries.pop(uri, None)
+            if entry is None:
+                self._bytes += len(data)
+                entry = {'data': data, 'owners': set(), **ref}
+            entry['owners'].add(owner)
+            entry['expires_at'] = time.monotonic() + self.ttl_seconds
+            self._entries[uri] = entry
+            self._evict()
+        return ref
+
+    def get(self, uri: str, owner: Hashable = None) -> Optional[Dict[str, Any]]:
+        """Entry (data, mime_type, name, bytes) for uri, or None if unknown, expired or not owner's"""
+        with self._lock:
+            entry = self._entries.get(uri)
+            if entry is None or owner not in entry['owners']:
+                return None
+            if entry['expires_at'] < time.monotonic():
+                self._remove(uri)
+                return None
+            self._entries.move_to_end(uri)
+            return entry
+
+    def list(self, owner: Hashable = None) -> List[Dict[str, Any]]:
+        """References to owner's live artifacts, newest first"""
+        now = time.monotonic()
+        with self._lock:
+            return [{key: entry[key] for key in ('uri', 'name', 'mime_type', 'bytes')}
+                    for entry in reversed(self._entries.values())
+                    if entry['expires_at'] >= now and owner in entry['owners']]
+
+    def for_owner(self, owner: Hashable) -> '_OwnerArtifacts':
+        """View of the store that stores, lists and reads only owner's artifacts"""
+        return _OwnerArtifacts(self, owner)
+
+    def _remove(self, uri: str) -> None:
+        entry = self._entries.pop(uri)
+        self._bytes -= entry['bytes']
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        for uri in [uri for uri, entry in self._entries.items() if entry['expires_at'] < now]:
+            self._remove(uri)
+            self.evicted += 1
+        # Keep at least the newest entry even if it alone exceeds the budget
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            self._remove(next(iter(self._entries)))
+            self.evicted += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'artifacts': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'evicted': self.evicted
+            }
+
+
+class _OwnerArtifacts:
+    """ArtifactStore bound to one owner (what encode_response is given for a tool call)"""
+
+    def __init__(self, store: ArtifactStore, owner: Hashable):
+        self.store = store
+        self.owner = owner
+
+    def put(self, data: bytes, mime_type: str = 'application/json', name: Optional[str] = None) -> Dict[str, Any]:
+        return self.store.put(data, mime_type, name, owner=self.owner)
+
+    def get(self, uri: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(uri, owner=self.owner)
+
+    def list(self) -> List[Dict[str, Any]]:
+        return self.store.list(owner=self.owner)
+
+
+# Shared store for the MCP server process
+artifact_store = ArtifactStore()
@@ -0,0 +1,352 @@
+# services/async_db.py - Async MongoDB Database Service
+"""
+Motor-based counterpart of services.db.Database for the asyncio MCP server.
+Method names, return values and error messages match Database, so tool
+handlers only add `await`. Pool settings, index definitions and the document
+serializer are shared with the sync class.
+"""
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+from bson import ObjectId
+from datetime import datetime, timedelta
+import os
+from typing import List, Dict, Any, Optional
+from services.db import INDEXES, client_options, page_query, failure_screenshot_docs, execution_stats
+from services.serialization import serialize_document, serialize_documents
+from services.resources import ChangeNotifier
+from services.pagination import CursorError, page_size, build_page
+
+
+class AsyncDatabase:
+    def __init__(self):
+        # MongoDB connection; Motor binds to the running event loop on first use
+        self.mongo_uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
+        self.db_name = os.getenv('DB_NAME', 'browser_automation')
+
+        self.client = AsyncIOMotorClient(self.mongo_uri, **client_options())
+        self.db = self.client[self.db_name]
+
+        # Collections
+        self.videos = self.db.videos
+        self.executions = self.db.executions
+        self.corrections = self.db.corrections
+        self.screenshots = self.db.screenshots
+        self.jobs = self.db.jobs
+
+        # Write hook for resource update notifications
+        self.changes = ChangeNotifier()
+
+    async def create_indexes(self):
+        """Create database indexes (call once the event loop is running)"""
+        try:
+            await asyncio.gather(*(self.db[collection].create_index(keys) for collection, keys in INDEXES))
+        except Exception as e:
+            print(f"Index creation warning: {e}")
+
+    # Video CRUD operations
+    async def insert_video(self, video_doc: Dict[str, Any]) -> ObjectId:
+        """Insert a new video document"""
+        try:
+            result = await self.videos.insert_one(video_doc)
+            self.changes.notify('videos', result.inserted_id, 'insert')
+            return result.inserted_id
+        except Exception as e:
+            raise Exception(f"Failed to insert video: {str(e)}")
+
+    async def get_video_by_id(self, video_id: str) -> Optional[Dict[str, Any]]:
+        """Get video document by ID"""
+        try:
+            return serialize_document(await self.videos.find_one({"_id": ObjectId(video_id)}))
+        except Exception as e:
+            raise Exception(f"Failed to get video: {str(e)}")
+
+    async def get_all_videos(self) -> List[Dict[str, Any]]:
+        """Get all video documents"""
+        try:
+            return serialize_documents(await self.videos.find().sort("uploaded_at", -1).to_list(None))
+        except Exception as e:
+            raise Exception(f"Failed to get videos: {str(e)}")
+
+    async def get_videos_page(self, limit: Optional[int] = None, cursor: Optional[str] = None,
+                              fields: Optional[List[str]] = None, summary: bool = False) -> Dict[str, Any]:
+        """Get one newest-first page of videos; pass next_cursor back to continue"""
+        try:
+            return await self._page('videos', limit, cursor, fields, summary)
+        except CursorError:
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to get videos: {str(e)}")
+
+    async def count_videos(self) -> int:
+        """Approximate video count from collection metadata (no collection scan)"""
+        try:
+            return await self.videos.estimated_document_count()
+        except Exception as e:
+            raise Exception(f"Failed to count videos: {str(e)}")
+
+    async def update_video(self, video_id: str, update_doc: Dict[str, Any]) -> bool:
+        """Update video document"""
+        try:
+            result = await self.videos.update_one(
+                {"_id": ObjectId(video_id)},
+                {"$set": update_doc}
+            )
+            if result.modified_count > 0:
+                self.changes.notify('videos', video_id, 'update')
+            return result.modified_count > 0
+        except Exception as e:
+            raise Exception(f"Failed to update video: {str(e)}")
+
+    async def delete_video(self, video_id: str) -> bool:
+        """Delete video document"""
+        try:
+            result = await self.videos.delete_one({"_id": ObjectId(video_id)})
+            if result.deleted_count > 0:
+                self.changes.notify('videos', video_id, 'delete')
+            return result.deleted_count > 0
+        except Exception as e:
+            raise Exception(f"Failed to delete video: {str(e)}")
+
+    async def find_videos_by_url(self, video_url: str) -> List[Dict[str, Any]]:
+        """Find videos by URL"""
+        try:
+            return serialize_documents(await self.videos.find({"video_url": video_url}).to_list(None))
+        except Exception as e:
+            raise Exception(f"Failed to find videos: {str(e)}")
+
+    # Execution CRUD operations
+    async def insert_execution(self, execution_doc: Dict[str, Any]) -> ObjectId:
+        """Insert a new execution document"""
+        try:
+            result = await self.executions.insert_one(execution_doc)
+            self.changes.notify('executions', result.inserted_id, 'insert')
+            return result.inserted_id
+        except Exception as e:
+            raise Exception(f"Failed to insert execution: {str(e)}")
+
+    async def get_execution_by_id(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        """Get execution document by ID"""
+        try:
+            return serialize_document(await self.executions.find_one({"_id": ObjectId(execution_id)}))
+        except Exception as e:
+            raise Exception(f"Failed to get execution: {str(e)}")
+
+    async def get_executions_by_video_id(self, video_id: str) -> List[Dict[str, Any]]:
+        """Get all executions for a video"""
+        try:
+            cursor = self.executions.find({"video_id": ObjectId(video_id)}).sort("created_at", -1)
+            return serialize_documents(await cursor.to_list(None))
+        except Exception as e:
+            raise Exception(f"Failed to get executions: {str(e)}")
+
+    async def get_all_executions(self) -> List[Dict[str, Any]]:
+        """Get all execution documents"""
+        try:
+            return serialize_documents(await self.executions.find().sort("created_at", -1).to_list(None))
+        except Exception as e:
+            raise Exception(f"Failed to get executions: {str(e)}")
+
+    async def update_execution(self, execution_id: str, update_doc: Dict[str, Any]) -> bool:
+        """Update execution document"""
+        try:
+            result = await self.executions.update_one(
+                {"_id": ObjectId(execution_id)},
+                {"$set": update_doc}
+            )
+            if result.modified_count > 0:
+                self.changes.notify('executions', execution_id, 'update')
+            return result.modified_count > 0
+        except Exception as e:
+            raise Exception(f"Failed to update execution: {str(e)}")
+
+    # Correction CRUD operations
+    async def insert_correction(self, correction_doc: Dict[str, Any]) -> ObjectId:
+        """Insert a new correction document"""
+        try:
+            result = await self.corrections.insert_one(correction_doc)
+            self.changes.notify('corrections', result.inserted_id, 'insert')
+            return result.inserted_id
+        except Exception as e:
+            raise Exception(f"Failed to insert correction: {str(e)}")
+
+    async def get_correction_by_id(self, correction_id: str) -> Optional[Dict[str, Any]]:
+        """Get correction document by ID"""
+        try:
+            return serialize_document(await self.corrections.find_one({"_id": ObjectId(correction_id)}))
+        except Exception as e:
+            raise Exception(f"Failed to get correction: {str(e)}")
+
+    async def get_corrections_by_execution_id(self, execution_id: str) -> List[Dict[str, Any]]:
+        """Get all corrections for an execution"""
+        try:
+            cursor = self.corrections.find({"execution_id": ObjectId(execution_id)}).sort("created_at", -1)
+            return serialize_documents(await cursor.to_list(None))
+        except Exception as e:
+            raise Exception(f"Failed to get corrections: {str(e)}")
+
+    async def get_all_corrections(self) -> List[Dict[str, Any]]:
+        """Get all correction documents"""
+        try:
+            return serialize_documents(await self.corrections.find().sort("created_at", -1).to_list(None))
+        except Exception as e:
+            raise Exception(f"Failed to get corrections: {str(e)}")
+
+    # Failure screenshot operations
+    async def insert_failure_screenshots(self, execution_id: str, frames: List[Dict[str, Any]]) -> List[str]:
+        """Store buffered failure screenshots for an execution"""
+        try:
+            if not frames:
+                return []
+            result = await self.screenshots.insert_many(failure_screenshot_docs(execution_id, frames))
+            return [str(inserted_id) for inserted_id in result.inserted_ids]
+        except Exception as e:
+            raise Exception(f"Failed to insert failure screenshots: {str(e)}")
+
+    async def get_failure_screenshots(self, execution_id: str, include_data: bool = False) -> List[Dict[str, Any]]:
+        """Get failure screenshots for an execution (image bytes omitted unless requested)"""
+        try:
+            projection = None if include_data else {'data': 0}
+            cursor = self.screenshots.find({"execution_id": ObjectId(execution_id)}, projection).sort("step", 1)
+            return serialize_documents(await cursor.to_list(None))
+        except Exception as e:
+            raise Exception(f"Failed to get failure screenshots: {str(e)}")
+
+    # Job state operations
+    async def insert_job(self, job_doc: Dict[str, Any]) -> ObjectId:
+        """Insert a new job document"""
+        try:
+            result = await self.jobs.insert_one(job_doc)
+            return result.inserted_id
+        except Exception as e:
+            raise Exception(f"Failed to insert job: {str(e)}")
+
+    async def update_job(self, job_id: str, update_doc: Dict[str, Any]) -> bool:
+        """Update job document by job_id"""
+        try:
+            result = await self.jobs.update_one({"job_id": job_id}, {"$set": update_doc})
+            return result.modified_count > 0
+        except Exception as e:
+            raise Exception(f"Failed to update job: {str(e)}")
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get job document by job_id"""
+        try:
+            return serialize_document(await self.jobs.find_one({"job_id": job_id}))
+        except Exception as e:
+            raise Exception(f"Failed to get job: {str(e)}")
+
+    async def get_jobs_page(self, limit: Optional[int] = None, cursor: Optional[str] = None,
+                            status: Optional[str] = None, summary: bool = True) -> Dict[str, Any]:
+        """Get one newest-first page of jobs, optionally only those in one status"""
+        try:
+            return await self._page('jobs', limit, cursor, None, summary, {"status": status} if status else None)
+        except CursorError:
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to get jobs: {str(e)}")
+
+    async def get_jobs_by_status(self, statuses: List[str]) -> List[Dict[str, Any]]:
+        """Get jobs in any of the given statuses, oldest first"""
+        try:
+            cursor = self.jobs.find({"status": {"$in": statuses}}).sort("created_at", 1)
+            return serialize_documents(await cursor.to_list(None))
+        except Exception as e:
+            raise Exception(f"Failed to get jobs: {str(e)}")
+
+    # Analytics and reporting methods
+    async def get_execution_stats(self) -> Dict[str, Any]:
+        """Get execution statistics"""
+        try:
+            counts = await asyncio.gather(
+                self.executions.count_documents({}),
+                self.executions.count_documents({"status": "completed"}),
+                self.executions.count_documents({"status": "failed"})
+            )
+            return execution_stats(*counts)
+        except Exception as e:
+            raise Exception(f"Failed to get execution stats: {str(e)}")
+
+    async def get_recent_activity(self, limit: int = 10, summary: bool = False,
+                                  cursors: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Get recent activity across all collections, optionally continuing from next_cursors"""
+        try:
+            cursors = cursors or {}
+            names = ('videos', 'executions', 'corrections')
+            videos, executions, corrections = await asyncio.gather(
+                *(self._page(name, limit, cursors.get(name), None, summary) for name in names)
+            )
+            return {
+                "recent_videos": videos['items'],
+                "recent_executions": executions['items'],
+                "recent_corrections": corrections['items'],
+                "next_cursors": {name: page['next_cursor'] for name, page in zip(names, (videos, executions, corrections))}
+            }
+        except CursorError:
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to get recent activity: {str(e)}")
+
+    async def _page(self, collection: str, limit: Optional[int], cursor: Optional[str],
+                    fields: Optional[List[str]], summary: bool,
+                    match: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        size = page_size(limit)
+        cursor = self.db[collection].find(**page_query(collection, cursor, fields, summary, match)).limit(size + 1)
+        docs = await cursor.to_list(None)
+        page = build_page(docs, size, collection)
+        page['items'] = serialize_documents(page['items'])
+        return page
+
+    async def cleanup_old_data(self, days: int = 30) -> Dict[str, int]:
+        """Clean up data older than specified days"""
+        try:
+            cutoff_date = datetime.utcnow() - timedelta(days=days)
+            executions, corrections = await asyncio.gather(
+                self.executions.delete_many({"created_at": {"$lt": cutoff_date}}),
+                self.corrections.delete_many({"created_at": {"$lt": cutoff_date}})
+            )
+            for collection, result in (('executions', executions), ('corrections', corrections)):
+                if result.deleted_count:
+                    self.changes.notify(collection, None, 'delete')
+            return {
+                "executions_deleted": executions.deleted_count,
+                "corrections_deleted": corrections.deleted_count
+            }
+        except Exception as e:
+            raise Exception(f"Failed to cleanup old data: {str(e)}")
+
+    def close_connection(self):
+        """Close database connection"""
+        try:
+            self.client.close()
+        except Exception as e:
+            print(f"Error closing database connection: {e}")
+
+    async def health_check(self) -> Dict[str, Any]:
+        """Check database health and connectivity"""
+        try:
+            # Ping the database
+            await self.client.admin.command('ping')
+
+            # Get collection stats
+            videos_count, executions_count, corrections_count = await asyncio.gather(
+                self.videos.count_documents({}),
+                self.executions.count_documents({}),
+                self.corrections.count_documents({})
+            )
+
+            return {
+                "status": "healthy",
+                "connected": True,
+                "database": self.db_name,
+                "collections": {
+                    "videos": videos_count,
+                    "executions": executions_count,
+                    "corrections": corrections_count
+                }
+            }
+        except Exception as e:
+            return {
+                "status": "unhealthy",
+                "connected": False,
+                "error": str(e)
+            }
@@ -0,0 +1,192 @@
+# services/batching.py - In-page Batch Execution of Navigation-free Steps
+"""
+Runs of steps that only touch the current document (typing, selecting,
+scrolling, waiting for elements that are already there) are compiled into one
+injected script instead of two Playwright round-trips per step.
+
+Clicks are batched only when the step sets "batch": true. An in-page click
+dispatches synthetic events (isTrusted is false) and skips Playwright's
+actionability checks and the interstitial locator handlers, so pages that
+ignore untrusted events would do nothing while the step reports success.
+
+The script is fully synchronous, so a navigation started by one of its steps
+can only take effect after it returns. It stops early and hands control back
+to the normal Playwright path when:
+  - an element is missing, hidden, covered or not editable (Playwright's
+    auto-waiting path then handles the step),
+  - a step started a navigation (detected with the Navigation API; browsers
+    without it never click links or submit buttons in-page).
+Steps with a response wait (see services/waits.py) always take the normal path.
+"""
+import re
+from typing import List, Dict, Any, Callable
+from services.waits import is_search_trigger
+
+MIN_BATCH_SIZE = 2
+
+# Selectors that only Playwright's selector engines understand
+PLAYWRIGHT_ONLY_SELECTOR = re.compile(
+    r'>>'
+    r'|^\s*[\w-]+='
+    r'|^\s*(//|\.\.|["\'(])'
+    r'|:(has-text|text|text-is|text-matches|visible|nth-match|left-of|right-of|above|below|near)\b'
+)
+
+
+def is_css_selector(selector: Any) -> bool:
+    return isinstance(selector, str) and bool(selector.strip()) and not PLAYWRIGHT_ONLY_SELECTOR.search(selector)
+
+
+def is_batchable(step: Dict[str, Any], typing_strategy: str) -> bool:
+    """Whether a step can run inside the page without changing its outcome"""
+    if step.get('batch') is False:
+        return False
+    # Response waits must be armed before the action runs
+    if step.get('wait_for') or is_search_trigger(step):
+        return False
+    action = step.get('action')
+    if action == 'scroll':
+        return True
+    if not is_css_selector(step.get('selector')):
+        return False
+    if action == 'type':
+        # Human typing is deliberately slow and submit presses a trusted Enter
+        return typing_strategy in ('fill', 'paste') and not step.get('submit') and isinstance(step.get('text'), str)
+    if action == 'select':
+        return isinstance(step.get('value'), str)
+    if action == 'click':
+        # Synthetic in-page clicks are opt-in (see module docstring)
+        return step.get('batch') is True
+    return action == 'wait'
+
+
+def batch_end(steps: List[Dict[str, Any]], offset: int, strategy_for: Callable[[Dict[str, Any]], str]) -> int:
+    """
+    End (exclusive) of the batchable run starting at offset, or offset when the
+    run is shorter than MIN_BATCH_SIZE. A run ends after a session checkpoint so
+    the session is saved at the right step.
+    """
+    end = offset
+    while end < len(steps) and is_batchable(steps[end], strategy_for(steps[end])):
+        end += 1
+        if steps[end - 1].get('session_checkpoint'):
+            break
+    return end if end - offset >= MIN_BATCH_SIZE else offset
+
+
+def batch_payload(steps: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The subset of each step the injected script needs"""
+    keys = ('action', 'selector', 'text', 'value', 'direction', 'amount')
+    return [{key: step[key] for key in keys if key in step} for step in steps]
+
+
+def batch_log_entry(step: Dict[str, Any], strategy: str) -> str:
+    """Log line for a step completed in-page, matching the normal path's wording"""
+    action = step.get('action')
+    selector = step.get('selector')
+    description = step.get('description', f"Execute {action}")
+    if action == 'type':
+        return f"✓ Typed '{step.get('text')}' into: {selector} - {description} ({strategy}, batched)"
+    if action == 'select':
+        return f"✓ Selected '{step.get('value')}' in: {selector} - {description} (batched)"
+    if action == 'click':
+        return f"✓ Clicked: {selector} - {description} (batched)"
+    if action == 'wait':
+        return f"✓ Waited for element: {selector} (batched)"
+    return f"✓ Scrolled {step.get('direction', 'down')} (batched)"
+
+
+# Returns {done: [ms per completed step], stop: reason | null, navigated: bool}
+BATCH_SCRIPT = """
+(steps) => {
+  const nav = window.navigation;
+  let navigated = false;
+  const onNavigate = () => { navigated = true; };
+  if (nav) nav.addEventListener('navigate', onNavigate);
+
+  const visible = (el) => {
+    const rect = el.getBoundingClientRect();
+    return rect.width > 0 && rect.height > 0 && getComputedStyle(el).visibility !== 'hidden';
+  };
+  const hitTarget = (el) => {
+    el.scrollIntoView({block: 'center', inline: 'center'});
+    const rect = el.getBoundingClientRect();
+    const x = rect.left + rect.width / 2, y = rect.top + rect.height / 2;
+    const hit = document.elementFromPoint(x, y);
+    return hit && (hit === el || el.contains(hit)) ? {hit, x, y} : null;
+  };
+  const mayNavigate = (el) => !!el.closest('a[href]') ||
+    (!!el.closest('form') && el.matches('button:not([type=button]):not([type=reset]), input[type=submit], input[type=image]'));
+  const setValue = (el, value) => {
+    const proto = el instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype
+      : el instanceof HTMLSelectElement ? HTMLSelectElement.prototype : HTMLInputElement.prototype;
+    Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, value);
+  };
+  const textInput = /^(text|search|email|url|tel|password|number)$/;
+
+  const run = (step) => {
+    if (step.action === 'scroll') {
+      const amount = step.amount ?? 500;
+      const direction = step.direction || 'down';
+      if (direction === 'down') window.scrollBy(0, amount);
+      else if (direction === 'up') window.scrollBy(0, -amount);
+      else if (direction === 'top') window.scrollTo(0, 0);
+      else if (direction === 'bottom') window.scrollTo(0, document.body.scrollHeight);
+      return null;
+    }
+    let el;
+    try { el = document.querySelector(step.selector); } catch (e) { return 'invalid_selector'; }
+    if (!el) return 'not_found';
+    if (!visible(el)) return 'not_visible';
+    if (step.action === 'wait') return null;
+    if (el.disabled) return 'disabled';
+
+    if (step.action === 'type') {
+      const editable = el instanceof HTMLTextAreaElement ||
+        (el instanceof HTMLInputElement && textInput.test(el.type || 'text'));
+      if (!editable || el.readOnly) return 'not_editable';
+      el.focus();
+      setValue(el, step.text);
+      el.dispatchEvent(new InputEvent('input', {bubbles: true, inputType: 'insertText', data: step.text}));
+      el.dispatchEvent(new Event('change', {bubbles: true}));
+      return null;
+    }
+    if (step.action === 'select') {
+      if (!(el instanceof HTMLSelectElement)) return 'not_select';
+      const option = [...el.options].find(o => o.value === step.value || o.label === step.value);
+      if (!option) return 'no_option';
+      setValue(el, option.value);
+      el.dispatchEvent(new Event('input', {bubbles: true}));
+      el.dispatchEvent(new Event('change', {bubbles: true}));
+      return null;
+    }
+    // click
+    if (!nav && mayNavigate(el)) return 'may_navigate';
+    const target = hitTarget(el);
+    if (!target) return 'obscured';
+    const opts = {bubbles: true, cancelable: true, composed: true, clientX: target.x, clientY: target.y, button: 0, view: window};
+    target.hit.dispatchEvent(new PointerEvent('pointerdown', opts));
+    target.hit.dispatchEvent(new MouseEvent('mousedown', opts));
+    if (el.focus) el.focus();
+    target.hit.dispatchEvent(new PointerEvent('pointerup', opts));
+    target.hit.dispatchEvent(new MouseEvent('mouseup', opts));
+    target.hit.click();
+    return null;
+  };
+
+  const done = [];
+  let stop = null;
+  try {
+    for (const step of steps) {
+      const started = performance.now();
+      try { stop = run(step); } catch (e) { stop = 'error: ' + e.message; }
+      if (stop) break;
+      done.push(performance.now() - started);
+      if (navigated) break;
+    }
+  } finally {
+    if (nav) nav.removeEventListener('navigate', onNavigate);
+  }
+  return {done, stop, navigated};
+}
+"""
@@ -1,30 +1,340 @@
 # services/browser.py - Playwright Browser Automation Service
-from playwright.async_api import async_playwright
-from playwright.sync_api import sync_playwright
+# Playwright itself is imported by the methods that launch browsers, so importing
+# this module (Flask app, worker pool, browser server) does not load the driver
 import asyncio
-from typing import List, Dict, Any
+import random
+from typing import List, Dict, Any, Optional, Callable
+from services.capture import ScreenshotRingBuffer
+from services.validation import validate_steps, format_validation_errors
+from services.session_store import SessionStore
+from services.batching import BATCH_SCRIPT, batch_end, batch_payload, batch_log_entry
+from services.retry import RetryPolicy, RunBudget, classify_error, replay_safe, ERROR_NAVIGATION, ERROR_SETTLE, ERROR_UNKNOWN
+from services.interstitials import interstitial_registry
+from services.waits import ResponseWaiter, resolve_wait, describe_wait, url_matcher
+from services.browser_server import client_for
+from services.watchdog import browser_watchdog
+from services.screenshots import screenshot_writer as shared_screenshot_writer, screenshot_options
+from services.runs import RunControl, RunStopped, run_registry, current_run, DEFAULT_RUN_DEADLINE_SECONDS
+from services.metrics import metrics
+import os
+from datetime import datetime
 import time
+import uuid
+
+TYPING_STRATEGIES = ('fill', 'paste', 'human')
+RUN_STOP_KINDS = ('cancelled', 'deadline')
+DEFAULT_ACTION_TIMEOUT_MS = 30000
 
 class BrowserAutomator:
-    def __init__(self, headless=True):
+    def __init__(self, headless=True, capture_on_failure=None, capture_buffer_size=None,
+                 capture_quality=None, capture_sink=None, capture_dir=None,
+                 checkpoint_on_failure=None, checkpoint_grace=None, max_checkpoints=None,
+                 demo_mode=None, typing_strategy=None, session_store=None, batch_steps=None,
+                 retry_policy=None, dismiss_interstitials=None, screenshot_writer=None, browser_server=None):
         self.browser = None
         self.page = None
         self.headless = headless  # Set to False for debugging
+        
+        # Demo mode keeps the slow, human-looking behaviour used for live demos
+        if demo_mode is None:
+            demo_mode = os.getenv('BROWSER_DEMO_MODE', 'false').lower() in ('1', 'true', 'yes')
+        self.demo_mode = demo_mode
+        
+        # Default text entry: instant fill, paste (single input event) or human-like typing
+        typing_strategy = typing_strategy or os.getenv('TYPING_STRATEGY') or ('human' if demo_mode else 'fill')
+        if typing_strategy not in TYPING_STRATEGIES:
+            raise ValueError(f"Unknown typing strategy: {typing_strategy}")
+        self.typing_strategy = typing_strategy
+        
+        # Run navigation-free step sequences in one injected script (never in demo mode);
+        # clicks join a batch only when the step sets "batch": true
+        if batch_steps is None:
+            batch_steps = os.getenv('BATCH_STEPS', 'true').lower() in ('1', 'true', 'yes')
+        self.batch_steps = batch_steps and not demo_mode
+        
+        # Transient step errors (timeouts, detached elements, navigation races) are retried with backoff
+        self.retry_policy = retry_policy or RetryPolicy()
+        
+        # Consent dialogs, cookie banners and sign-in nags are dismissed by locator handlers
+        if dismiss_interstitials is None:
+            dismiss_interstitials = os.getenv('DISMISS_INTERSTITIALS', 'true').lower() in ('1', 'true', 'yes')
+        self.interstitials = interstitial_registry if dismiss_interstitials else None
+        
+        # Attach to a shared browser server instead of launching Chromium per run (demo mode keeps its own window)
+        browser_server = browser_server or os.getenv('BROWSER_SERVER_ENDPOINT')
+        if isinstance(browser_server, str):
+            browser_server = client_for(browser_server)
+        self.browser_server = browser_server if not demo_mode else None
+        
+        # Screenshot steps hand their bytes to a background, content-addressed writer
+        self.screenshot_writer = screenshot_writer or shared_screenshot_writer
+        
+        # Storage-state snapshots keyed by (user, domain) for skipping recorded login prefixes
+        self.session_store = session_store or SessionStore()
+        
+        # Failure capture: keep the last N JPEG frames in memory, write them only when a step fails
+        if capture_on_failure is None:
+            capture_on_failure = os.getenv('CAPTURE_ON_FAILURE', 'false').lower() in ('1', 'true', 'yes')
+        self.capture_on_failure = capture_on_failure
+        self.capture_buffer_size = capture_buffer_size or int(os.getenv('CAPTURE_BUFFER_SIZE', '5'))
+        self.capture_quality = capture_quality or int(os.getenv('CAPTURE_QUALITY', '40'))
+        self.capture_sink = capture_sink or os.getenv('CAPTURE_SINK', 'disk')  # 'disk' or 'db'
+        self.capture_dir = capture_dir or os.getenv('CAPTURE_DIR', 'failure_screenshots')
+        
+        # Checkpointed execution: failed async runs stay open for a grace period so they can be resumed
+        if checkpoint_on_failure is None:
+            checkpoint_on_failure = os.getenv('CHECKPOINT_ON_FAILURE', 'false').lower() in ('1', 'true', 'yes')
+        self.checkpoint_on_failure = checkpoint_on_failure
+        self.checkpoint_grace = checkpoint_grace or int(os.getenv('CHECKPOINT_GRACE_SECONDS', '120'))
+        self.max_checkpoints = max_checkpoints or int(os.getenv('CHECKPOINT_MAX', '3'))
+        self._checkpoints = {}
+    
+    def _new_capture_buffer(self) -> Optional[ScreenshotRingBuffer]:
+        """Create a per-run screenshot ring buffer when failure capture is enabled"""
+        if not self.capture_on_failure:
+            return None
+        return ScreenshotRingBuffer(size=self.capture_buffer_size, quality=self.capture_quality)
     
-    def execute_steps(self, steps: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _flush_capture(self, capture: Optional[ScreenshotRingBuffer], run_label: str,
+                       failure_evidence: Dict[str, List]) -> None:
         """
-        Execute browser automation steps synchronously
+        Flush buffered frames after a failed step. Disk sink writes JPEGs to capture_dir;
+        db sink hands the raw frames back to the caller for storage alongside the execution.
         """
+        if capture is None or len(capture) == 0:
+            return
+        if self.capture_sink == 'db':
+            failure_evidence.setdefault('failure_frames', []).extend(capture.drain())
+        else:
+            paths = capture.flush_to_disk(self.capture_dir, run_label)
+            failure_evidence.setdefault('failure_screenshots', []).extend(paths)
+    
+    def _typing_strategy(self, step: Dict[str, Any]) -> str:
+        """Per-step typing strategy, falling back to the automator's profile default"""
+        strategy = step.get('typing') or self.typing_strategy
+        return strategy if strategy in TYPING_STRATEGIES else self.typing_strategy
+    
+    def _enter_text(self, page, selector: str, text: str, strategy: str) -> None:
+        """Enter text into a field; fill and paste take the same time regardless of text length"""
+        if strategy == 'fill':
+            page.fill(selector, text)
+        elif strategy == 'paste':
+            page.fill(selector, "")
+            page.focus(selector)
+            page.keyboard.insert_text(text)
+        else:
+            # Clear and type
+            page.fill(selector, "")  # Clear first
+            self._sleep(0.5)
+            
+            # Clear field first
+            page.fill(selector, "")
+            self._sleep(random.uniform(0.2, 0.4))  # Brief pause before typing
+            
+            # Type with natural speed - not too fast, not too slow
+            page.type(selector, text, delay=random.randint(80, 150))  # 80-150ms per character
+    
+    async def _enter_text_async(self, page, selector: str, text: str, strategy: str) -> None:
+        """Async counterpart of _enter_text"""
+        if strategy == 'fill':
+            await page.fill(selector, text)
+        elif strategy == 'paste':
+            await page.fill(selector, "")
+            await page.focus(selector)
+            await page.keyboard.insert_text(text)
+        else:
+            await page.fill(selector, "")
+            await self._sleep_async(random.uniform(0.2, 0.4))
+            await page.type(selector, text, delay=random.randint(80, 150))
+    
+    def _step_timing(self, index: int, step: Dict[str, Any], started: float, success: bool) -> Dict[str, Any]:
+        seconds = time.perf_counter() - started
+        metrics.observe('dependency', f"playwright:{step.get('action')}", seconds, error=not success)
+        return {
+            'step': index,
+            'action': step.get('action'),
+            'duration_ms': round(seconds * 1000, 1),
+            'success': success
+        }
+    
+    # Run deadline and cancellation helpers; outside a run they behave like the plain calls
+    def _timeout(self, requested_ms: float) -> float:
+        control = current_run.get()
+        return control.timeout_ms(requested_ms) if control else requested_ms
+    
+    def _sleep(self, seconds: float) -> None:
+        control = current_run.get()
+        if control:
+            control.sleep(seconds)
+        else:
+            time.sleep(seconds)
+    
+    async def _sleep_async(self, seconds: float) -> None:
+        control = current_run.get()
+        if control:
+            await control.sleep_async(seconds)
+        else:
+            await asyncio.sleep(seconds)
+    
+    def _run_stopped(self) -> Optional[RunStopped]:
+        control = current_run.get()
+        return control.stop_reason() if control else None
+    
+    def _wait_for_selector(self, page, selector: str, timeout: float):
+        """
+        Sync wait_for_selector polled in one-second slices, so a run cancelled from
+        another thread stops waiting promptly (the sync API cannot be interrupted).
+        """
+        from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+        control = current_run.get()
+        if control is None:
+            return page.wait_for_selector(selector, state='visible', timeout=timeout)
+        end = time.monotonic() + control.timeout_ms(timeout) / 1000
+        while True:
+            slice_ms = max(1, min(1000, (end - time.monotonic()) * 1000))
+            try:
+                return page.wait_for_selector(selector, state='visible', timeout=slice_ms)
+            except PlaywrightTimeoutError:
+                control.check()
+                if time.monotonic() >= end:
+                    raise
+    
+    def _begin_run(self, run_id: Optional[str], deadline_seconds: Optional[float],
+                   on_step: Optional[Callable[[Dict[str, Any]], None]] = None):
+        control = RunControl(run_id, deadline_seconds or DEFAULT_RUN_DEADLINE_SECONDS, on_step)
+        run_registry.register(control)
+        return control, current_run.set(control)
+    
+    def _release_run(self, control: RunControl, token) -> None:
+        current_run.reset(token)
+        run_registry.unregister(control)
+    
+    def _flush_screenshots(self, result: Dict[str, Any]) -> None:
+        """Make sure a run's screenshots are on disk before its references are returned"""
+        if result.get('screenshots') and not self.screenshot_writer.flush():
+            print("⚠️ Screenshot writer is behind; some files may appear after the run returns")
+    
+    async def _flush_screenshots_async(self, result: Dict[str, Any]) -> None:
+        if result.get('screenshots'):
+            await asyncio.get_running_loop().run_in_executor(None, self._flush_screenshots, result)
+    
+    def _run_outcome(self, control: RunControl, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Tag a run result with its run_id and whether it was cancelled or timed out"""
+        result['run_id'] = control.run_id
+        stopped = control.stop_reason()
+        if stopped and not result.get('success'):
+            result['error'] = str(stopped)
+            result['cancelled'] = stopped.kind == 'cancelled'
+            result['deadline_exceeded'] = stopped.kind == 'deadline'
+        return result
+    
+    def _batch_end(self, steps: List[Dict[str, Any]], offset: int) -> int:
+        if not self.batch_steps or self._run_stopped():
+            return offset
+        return batch_end(steps, offset, self._typing_strategy)
+    
+    def _record_batch(self, steps: List[Dict[str, Any]], first_index: int, outcome: Dict[str, Any],
+                      log: List[str], step_timings: List[Dict[str, Any]]) -> int:
+        """Log and time the steps an in-page batch completed; returns how many it completed"""
+        done = outcome.get('done') or []
+        for offset, duration_ms in enumerate(done):
+            step = steps[offset]
+            log.append(batch_log_entry(step, self._typing_strategy(step)))
+            step_timings.append({
+                'step': first_index + offset,
+                'action': step.get('action'),
+                'duration_ms': round(duration_ms, 1),
+                'success': True,
+                'batched': True
+            })
+        if outcome.get('stop'):
+            print(f"↪️ Batch stopped at step {first_index + len(done) + 1} ({outcome['stop']}), using Playwright path")
+        return len(done)
+    
+    def _run_batch(self, page, steps: List[Dict[str, Any]], first_index: int, log: List[str],
+                   step_timings: List[Dict[str, Any]]) -> int:
+        """Run a batchable step run in-page; 0 means fall back to the normal path for all of it"""
+        try:
+            outcome = page.evaluate(BATCH_SCRIPT, batch_payload(steps))
+        except Exception as e:
+            print(f"↪️ Batch of {len(steps)} steps not run in-page: {str(e)}")
+            return 0
+        completed = self._record_batch(steps, first_index, outcome, log, step_timings)
+        if outcome.get('navigated'):
+            try:
+                page.wait_for_load_state('domcontentloaded')
+            except Exception:
+                pass
+        return completed
+    
+    async def _run_batch_async(self, page, steps: List[Dict[str, Any]], first_index: int, log: List[str],
+                               step_timings: List[Dict[str, Any]]) -> int:
+        """Async counterpart of _run_batch"""
+        try:
+            outcome = await page.evaluate(BATCH_SCRIPT, batch_payload(steps))
+        except Exception as e:
+            print(f"↪️ Batch of {len(steps)} steps not run in-page: {str(e)}")
+            return 0
+        completed = self._record_batch(steps, first_index, outcome, log, step_timings)
+        if outcome.get('navigated'):
+            try:
+                await page.wait_for_load_state('domcontentloaded')
+            except Exception:
+                pass
+        return completed
+    
+    def _validation_failure(self, steps: Any) -> Optional[Dict[str, Any]]:
+        """Reject malformed step lists before any browser is launched"""
+        errors = validate_steps(steps)
+        if not errors:
+            return None
+        first_step = next((error['step'] for error in errors if error['step'] is not None), None)
+        return {
+            'success': False,
+            'error': format_validation_errors(errors),
+            'validation_errors': errors,
+            'failed_step': first_step,
+            'log': []
+        }
+    
+    def execute_steps(self, steps: List[Dict[str, Any]], session_user: Optional[str] = None,
+                      run_id: Optional[str] = None, deadline_seconds: Optional[float] = None,
+                      on_step: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Execute browser automation steps synchronously.
+        When a step is marked session_checkpoint, the storage state reached there is saved
+        for (session_user, domain) and later runs start from it instead of replaying the prefix.
+        The run stops once deadline_seconds have passed or run_registry.cancel(run_id) is called.
+        on_step is called with each step's outcome (see step_results) as soon as it finishes.
+        """
+        invalid = self._validation_failure(steps)
+        if invalid:
+            return invalid
+        
+        control, token = self._begin_run(run_id, deadline_seconds, on_step)
+        try:
+            with metrics.track('dependency', 'playwright:run') as call:
+                result = self._execute_steps(steps, session_user)
+                if not result.get('success'):
+                    call.failed()
+        finally:
+            self._release_run(control, token)
+        self._flush_screenshots(result)
+        return self._run_outcome(control, result)
+    
+    def _execute_steps(self, steps: List[Dict[str, Any]], session_user: Optional[str]) -> Dict[str, Any]:
+        browser = None
         try:
             print(f"🎬 STARTING BROWSER AUTOMATION - HEADLESS: {self.headless}")
+            from playwright.sync_api import sync_playwright
             with sync_playwright() as p:
-                # FORCE VISIBLE BROWSER - IGNORE HEADLESS SETTING!
+                # Demo mode forces a visible browser regardless of the headless setting
                 print("🎬 LAUNCHING VISIBLE BROWSER WINDOW...")
                 print("🚨 BROWSER WINDOW OPENING - WATCH YOUR SCREEN!")
                 
                 # Make browser IMPOSSIBLE to miss
-                browser = p.chromium.launch(
-                    headless=False,  # ALWAYS VISIBLE!
+                browser = self.browser_server.connect(p) if self.browser_server else p.chromium.launch(
+                    headless=self.headless and not self.demo_mode,
                     args=[
                         '--start-maximized',      # Maximize window
                         '--disable-web-security', # Disable security for demo
@@ -34,7 +344,7 @@ class BrowserAutomator:
                         '--disable-blink-features=AutomationControlled',  # Hide automation
                         '--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'  # Human user agent
                     ],
-                    slow_mo=800  # Medium speed - human-like but not too slow (0.8 seconds between actions)
+                    slow_mo=800 if self.demo_mode else 0  # Demo: medium speed, 0.8 seconds between actions
                 )
                 
                 # Play system sound to alert user
@@ -44,7 +354,10 @@ class BrowserAutomator:
                     print("🔊 PLAYED ALERT SOUND - BROWSER IS OPENING!")
                 except:
                     pass
-                page = browser.new_page()
+                
+                session_plan = self.session_store.plan(steps, session_user)
+                snapshot = session_plan['snapshot'] if session_plan else None
+                context, page = self._open_page(browser, snapshot)
                 print("🎬 BROWSER WINDOW SHOULD BE VISIBLE NOW!")
                 
                 # Force browser to foreground and make it obvious
@@ -52,7 +365,6 @@ class BrowserAutomator:
                     # Bring browser to front (Windows specific)
                     import win32gui
                     import win32con
-                    import time
                     time.sleep(1)  # Wait for browser to fully load
                     
                     # Find browser window and bring to front
@@ -73,49 +385,31 @@ class BrowserAutomator:
                 except:
                     print("⚠️ Could not force browser to foreground (install pywin32 for better visibility)")
                 
-                # Make browser more human-like
-                page.add_init_script("""
-                    // Remove webdriver property
-                    Object.defineProperty(navigator, 'webdriver', {
-                        get: () => undefined,
-                    });
-                    
-                    // Override plugins
-                    Object.defineProperty(navigator, 'plugins', {
-                        get: () => [1, 2, 3, 4, 5],
-                    });
-                    
-                    // Override languages
-                    Object.defineProperty(navigator, 'languages', {
-                        get: () => ['en-US', 'en'],
-                    });
-                """)
-                
                 print("🎬 BROWSER READY - STARTING HUMAN-LIKE AUTOMATION!")
                 
                 log = []
                 log.append("🎬 VISIBLE BROWSER OPENED - STARTING AUTOMATION")
+                if self.interstitials:
+                    self.interstitials.install(page, log)
                 
-                for i, step in enumerate(steps):
-                    try:
-                        print(f"🎬 Executing step {i+1}/{len(steps)}: {step.get('action', 'unknown')}")
-                        result = self._execute_single_step(page, step, log)
-                        if not result['success']:
-                            print(f"⚠️ Step {i+1} failed but continuing: {result.get('error', 'Unknown error')}")
-                            # Don't stop on single step failure - continue with next steps
-                            log.append(f"⚠️ Step {i+1} failed: {result.get('error', 'Unknown error')}")
-                        else:
-                            print(f"✅ Step {i+1} completed successfully")
-                    except Exception as e:
-                        print(f"❌ Step {i+1} exception: {str(e)}")
-                        log.append(f"❌ Step {i+1} exception: {str(e)}")
-                        # Continue with next steps even if one fails
+                start_index = self._restore_session(page, snapshot, log) if snapshot else 0
+                if start_index is None:
+                    result = {'success': False, 'log': log}
+                else:
+                    result = self._run_steps(page, context, steps[start_index:], start_index, log, session_plan)
+                
+                if snapshot and not result['success'] and not self._run_stopped():
+                    # The saved session no longer works - drop it and replay the whole workflow
+                    log.append("↩️ Saved session did not work, replaying the full workflow")
+                    self.session_store.invalidate(session_plan['user'], session_plan['domain'])
+                    context.close()
+                    context, page = self._open_page(browser, None)
+                    if self.interstitials:
+                        self.interstitials.install(page, log)
+                    result = self._run_steps(page, context, steps, 0, log, session_plan)
                 
                 browser.close()
-                return {
-                    'success': True,
-                    'log': log
-                }
+                return result
                 
         except Exception as e:
             return {
@@ -123,6 +417,328 @@ class BrowserAutomator:
                 'error': f"Browser automation failed: {str(e)}",
                 'log': []
             }
+        finally:
+            if self.browser_server and browser is not None:
+                self.browser_server.release(browser)
+    
+    def _open_page(self, browser, snapshot: Optional[Dict[str, Any]] = None):
+        """Open a fresh context (optionally from a saved session) and a human-looking page"""
+        context = browser.new_context(storage_state=snapshot['storage_state'] if snapshot else None)
+        browser_watchdog.track_context(context)
+        page = context.new_page()
+        
+        # Make browser more human-like
+        page.add_init_script("""
+            // Remove webdriver property
+            Object.defineProperty(navigator, 'webdriver', {
+                get: () => undefined,
+            });
+            
+            // Override plugins
+            Object.defineProperty(navigator, 'plugins', {
+                get: () => [1, 2, 3, 4, 5],
+            });
+            
+            // Override languages
+            Object.defineProperty(navigator, 'languages', {
+                get: () => ['en-US', 'en'],
+            });
+        """)
+        return context, page
+    
+    def _restore_session(self, page, snapshot: Dict[str, Any], log: List[str]) -> Optional[int]:
+        """Open the page reached at the session checkpoint; returns the step to continue from"""
+        try:
+            page.goto(snapshot['url'], wait_until='domcontentloaded')
+            log.append(f"♻️ Restored saved session for {snapshot['domain']}, skipping {snapshot['checkpoint_step'] + 1} steps")
+            return snapshot['checkpoint_step'] + 1
+        except Exception as e:
+            log.append(f"⚠️ Could not restore saved session: {str(e)}")
+            return None
+    
+    def _save_session(self, context, page, session_plan: Dict[str, Any], log: List[str]) -> None:
+        try:
+            self.session_store.save(session_plan, context.storage_state(), page.url)
+            log.append(f"💾 Saved session state for {session_plan['domain']}")
+        except Exception as e:
+            log.append(f"⚠️ Could not save session state: {str(e)}")
+    
+    def _run_steps(self, page, context, steps: List[Dict[str, Any]], start_index: int, log: List[str],
+                   session_plan: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Run steps on an open page, retrying transient errors under the retry policy.
+        The run stops at the first failed step unless that step is marked optional.
+        start_index is the position of steps[0] in the full step list.
+        """
+        capture = self._new_capture_buffer()
+        run_label = f"run_{uuid.uuid4().hex[:12]}"
+        budget = self.retry_policy.start_run()
+        failure_evidence = {}
+        step_failures = []
+        step_timings = []
+        step_results = []
+        screenshots = []
+        offset = 0
+        unbatched_offset = None
+        
+        while offset < len(steps):
+            end = self._batch_end(steps, offset) if offset != unbatched_offset else offset
+            if end > offset:
+                completed = self._run_batch(page, steps[offset:end], start_index + offset, log, step_timings)
+                if completed:
+                    self._close_leaked_pages(page, log)
+                    self._add_step_results(step_results, [
+                        self._step_result(start_index + offset + n, steps[offset + n], {'success': True, 'attempts': 1})
+                        for n in range(completed)
+                    ])
+                    if capture is not None:
+                        capture.capture(page, start_index + offset + completed - 1, steps[offset + completed - 1].get('action'))
+                    if (session_plan and not step_failures
+                            and start_index + offset <= session_plan['index'] < start_index + offset + completed):
+                        self._save_session(context, page, session_plan, log)
+                    if offset + completed < end:
+                        unbatched_offset = offset + completed
+                    offset += completed
+                    continue
+                unbatched_offset = offset
+            
+            step = steps[offset]
+            i = start_index + offset
+            offset += 1
+            started = time.perf_counter()
+            print(f"🎬 Executing step {i+1}: {step.get('action', 'unknown')}")
+            result = self._attempt_step(page, step, log, budget)
+            self._close_leaked_pages(page, log)
+            if result.get('screenshot'):
+                screenshots.append({'step': i, **result['screenshot']})
+            step_timings.append(self._step_timing(i, step, started, result['success']))
+            self._add_step_results(step_results, [self._step_result(i, step, result)])
+            if capture is not None:
+                capture.capture(page, i, step.get('action'))
+            
+            if result['success']:
+                print(f"✅ Step {i+1} completed successfully")
+                if session_plan and i == session_plan['index'] and not step_failures:
+                    self._save_session(context, page, session_plan, log)
+                continue
+            
+            error = result.get('error', 'Unknown error')
+            log.append(f"⚠️ Step {i+1} failed ({result['error_kind']}, {result['attempts']} attempts): {error}")
+            step_failures.append(i)
+            self._flush_capture(capture, run_label, failure_evidence)
+            if step.get('optional') and result['error_kind'] not in RUN_STOP_KINDS:
+                print(f"⚠️ Optional step {i+1} failed, continuing: {error}")
+                continue
+            
+            print(f"❌ Step {i+1} failed, stopping run: {error}")
+            step_results.extend(self._skipped_result(start_index + n, steps[n]) for n in range(offset, len(steps)))
+            return {
+                'success': False,
+                'error': f"Step {i+1} failed: {error}",
+                'log': log,
+                'failed_step': i,
+                'step_failures': step_failures,
+                'step_timings': step_timings,
+                'step_results': step_results,
+                'screenshots': screenshots,
+                **failure_evidence
+            }
+        
+        return {
+            'success': True,
+            'log': log,
+            'step_failures': step_failures,
+            'step_timings': step_timings,
+            'step_results': step_results,
+            'screenshots': screenshots,
+            **failure_evidence
+        }
+    
+    def _close_leaked_pages(self, page, log: List[str]) -> None:
+        """Close popups and tabs the run opened but never drives"""
+        try:
+            closed = browser_watchdog.close_leaked_pages(page.context, page)
+        except Exception:
+            return
+        if closed:
+            log.append(f"🧹 Closed {closed} leftover page(s)")
+    
+    async def _close_leaked_pages_async(self, page, log: List[str]) -> None:
+        try:
+            closed = await browser_watchdog.close_leaked_pages_async(page.context, page)
+        except Exception:
+            return
+        if closed:
+            log.append(f"🧹 Closed {closed} leftover page(s)")
+    
+    def _step_result(self, index: int, step: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+        """Per-step outcome reported alongside the run result"""
+        outcome = {
+            'step': index,
+            'action': step.get('action'),
+            'status': 'ok' if result['success'] else 'failed',
+            'attempts': result.get('attempts', 1)
+        }
+        if not result['success']:
+            outcome['error_kind'] = result.get('error_kind', ERROR_UNKNOWN)
+            outcome['error'] = result.get('error')
+        return outcome
+    
+    def _add_step_results(self, step_results: List[Dict[str, Any]], outcomes: List[Dict[str, Any]]) -> None:
+        """Record executed steps and report them to the run's on_step listener"""
+        control = current_run.get()
+        for outcome in outcomes:
+            step_results.append(outcome)
+            if control is not None:
+                control.report_step(outcome)
+    
+    def _skipped_result(self, index: int, step: Dict[str, Any]) -> Dict[str, Any]:
+        return {'step': index, 'action': step.get('action'), 'status': 'skipped', 'attempts': 0}
+    
+    def _attempt_step(self, page, step: Dict[str, Any], log: List[str], budget: RunBudget) -> Dict[str, Any]:
+        """Run one step, retrying transient errors with backoff while the run budget lasts"""
+        attempt = 0
+        while True:
+            stopped = self._run_stopped()
+            if stopped:
+                return {'success': False, 'error': str(stopped), 'error_kind': stopped.kind, 'attempts': attempt}
+            attempt += 1
+            waiter = None
+            try:
+                page.set_default_timeout(self._timeout(DEFAULT_ACTION_TIMEOUT_MS))
+                wait = resolve_wait(step, page.url)
+                if wait and wait['response']:
+                    waiter = ResponseWaiter(wait['response']).attach(page)
+                result = self._execute_single_step(page, step, log)
+                if result['success'] and wait:
+                    result.update(self._settle_step(page, wait, waiter, log))
+            except Exception as e:
+                result = {'success': False, 'error': str(e)}
+            finally:
+                if waiter:
+                    waiter.detach(page)
+            result['attempts'] = attempt
+            if result['success']:
+                return result
+            stopped = self._run_stopped()
+            if stopped:
+                result.update(error=str(stopped), error_kind=stopped.kind)
+                return result
+            kind = result.get('error_kind') or classify_error(result.get('error'))
+            result['error_kind'] = kind
+            if kind == ERROR_NAVIGATION and not replay_safe(step):
+                log.append(f"⚠️ Not replaying {step.get('action')}: it may already have taken effect")
+                return result
+            delay = self.retry_policy.next_delay(kind, attempt, budget, step)
+            if delay is None:
+                return result
+            log.append(f"↻ Retrying {step.get('action')} after {kind} error (attempt {attempt + 1})")
+            try:
+                self._sleep(delay)
+            except RunStopped:
+                continue
+            if kind == ERROR_NAVIGATION:
+                try:
+                    page.wait_for_load_state('domcontentloaded', timeout=self._timeout(5000))
+                except Exception:
+                    pass
+    
+    async def _attempt_step_async(self, page, step: Dict[str, Any], log: List[str], budget: RunBudget) -> Dict[str, Any]:
+        """Async counterpart of _attempt_step"""
+        attempt = 0
+        while True:
+            stopped = self._run_stopped()
+            if stopped:
+                return {'success': False, 'error': str(stopped), 'error_kind': stopped.kind, 'attempts': attempt}
+            attempt += 1
+            waiter = None
+            try:
+                page.set_default_timeout(self._timeout(DEFAULT_ACTION_TIMEOUT_MS))
+                wait = resolve_wait(step, page.url)
+                if wait and wait['response']:
+                    waiter = ResponseWaiter(wait['response']).attach(page)
+                result = await self._execute_single_step_async(page, step, log)
+                if result['success'] and wait:
+                    result.update(await self._settle_step_async(page, wait, waiter, log))
+            except Exception as e:
+                result = {'success': False, 'error': str(e)}
+            finally:
+                if waiter:
+                    waiter.detach(page)
+            result['attempts'] = attempt
+            if result['success']:
+                return result
+            stopped = self._run_stopped()
+            if stopped:
+                result.update(error=str(stopped), error_kind=stopped.kind)
+                return result
+            kind = result.get('error_kind') or classify_error(result.get('error'))
+            result['error_kind'] = kind
+            if kind == ERROR_NAVIGATION and not replay_safe(step):
+                log.append(f"⚠️ Not replaying {step.get('action')}: it may already have taken effect")
+                return result
+            delay = self.retry_policy.next_delay(kind, attempt, budget, step)
+            if delay is None:
+                return result
+            log.append(f"↻ Retrying {step.get('action')} after {kind} error (attempt {attempt + 1})")
+            try:
+                await self._sleep_async(delay)
+            except RunStopped:
+                continue
+            if kind == ERROR_NAVIGATION:
+                try:
+                    await page.wait_for_load_state('domcontentloaded', timeout=self._timeout(5000))
+                except Exception:
+                    pass
+    
+    def _check_run(self) -> None:
+        control = current_run.get()
+        if control:
+            control.check()
+    
+    def _pause(self, seconds: float) -> None:
+        """Human-looking pacing for demo mode; otherwise steps rely on element and response waits"""
+        if self.demo_mode:
+            self._sleep(seconds)
+    
+    def _settle_result(self, wait: Dict[str, Any], error: Optional[Exception], log: List[str]) -> Dict[str, Any]:
+        if error is None:
+            log.append(f"✓ Received {describe_wait(wait)}")
+            return {'success': True}
+        if wait['explicit']:
+            # The action already ran, so the step is not retried (that would repeat clicks and submits)
+            return {'success': False, 'error': f"wait_for failed: {str(error)}", 'error_kind': ERROR_SETTLE}
+        log.append(f"⚠️ No {describe_wait(wait)} within {wait['timeout']}ms, continuing")
+        return {'success': True}
+    
+    def _settle_step(self, page, wait: Dict[str, Any], waiter: Optional[ResponseWaiter],
+                     log: List[str]) -> Dict[str, Any]:
+        """Wait for the step's response and/or URL; only explicit waits fail the step on timeout"""
+        timeout = self._timeout(wait['timeout'])
+        try:
+            if waiter:
+                waiter.wait(page, timeout, self._check_run)
+            if wait['url']:
+                page.wait_for_url(url_matcher(wait['url']), wait_until='commit', timeout=timeout)
+        except RunStopped:
+            raise
+        except Exception as e:
+            return self._settle_result(wait, e, log)
+        return self._settle_result(wait, None, log)
+    
+    async def _settle_step_async(self, page, wait: Dict[str, Any], waiter: Optional[ResponseWaiter],
+                                 log: List[str]) -> Dict[str, Any]:
+        timeout = self._timeout(wait['timeout'])
+        try:
+            if waiter:
+                await waiter.wait_async(timeout, self._check_run)
+            if wait['url']:
+                await page.wait_for_url(url_matcher(wait['url']), wait_until='commit', timeout=timeout)
+        except RunStopped:
+            raise
+        except Exception as e:
+            return self._settle_result(wait, e, log)
+        return self._settle_result(wait, None, log)
     
     def _execute_single_step(self, page, step: Dict[str, Any], log: List[str]) -> Dict[str, Any]:
         """
@@ -139,7 +755,7 @@ class BrowserAutomator:
                 
                 page.goto(url, wait_until='domcontentloaded')
                 # Medium wait for page stability
-                time.sleep(1.5)
+                self._pause(1.5)
                 log.append(f"✓ Navigated to: {url}")
                 return {'success': True}
             
@@ -179,8 +795,8 @@ class BrowserAutomator:
                 if "result" in description.lower() or "link" in description.lower() or "first" in description.lower():
                     try:
                         # Wait for search results to load
-                        page.wait_for_selector("#search", timeout=5000)
-                        time.sleep(2)  # Extra wait for results to fully load
+                        self._wait_for_selector(page, "#search", 5000)
+                        self._pause(2)  # Extra wait for results to fully load
                         
                         # Try to click the first search result
                         first_result_selectors = [
@@ -197,7 +813,7 @@ class BrowserAutomator:
                                 if elements and len(elements) > 0:
                                     # Human-like hover before click
                                     elements[0].hover()
-                                    time.sleep(random.uniform(0.3, 0.6))  # Brief hover delay
+                                    self._pause(random.uniform(0.3, 0.6))  # Brief hover delay
                                     
                                     # Click the first result
                                     elements[0].click()
@@ -208,26 +824,32 @@ class BrowserAutomator:
                                 continue
                         
                         if clicked:
-                            time.sleep(2)  # Wait for page to load
+                            self._pause(2)  # Wait for page to load
                             return {'success': True}
                     except:
                         pass
                 
-                # If special handling didn't work, try regular selectors
+                # If special handling didn't work, try the step's selector, then visible fallbacks
+                primary_error = None
                 if not clicked:
-                    for sel in selectors_to_try:
+                    for index, sel in enumerate(selectors_to_try):
                         try:
-                            page.wait_for_selector(sel, state='visible', timeout=3000)
+                            if index == 0:
+                                self._wait_for_selector(page, sel, 3000)
+                            elif not page.is_visible(sel):
+                                continue
                             
                             # Human-like hover before click
                             page.hover(sel)
-                            time.sleep(random.uniform(0.2, 0.4))  # Brief hover delay
+                            self._pause(random.uniform(0.2, 0.4))  # Brief hover delay
                             
                             page.click(sel)
                             log.append(f"✓ Clicked: {sel} - {description}")
                             clicked = True
                             break
-                        except:
+                        except Exception as e:
+                            if index == 0:
+                                primary_error = str(e)
                             continue
                 
                 if not clicked:
@@ -235,7 +857,7 @@ class BrowserAutomator:
                     if "result" in description.lower() or "link" in description.lower():
                         try:
                             # Try JavaScript click on first result
-                            page.evaluate("""
+                            clicked = bool(page.evaluate("""() => {
                                 const firstResult = document.querySelector('h3 a') || 
                                                   document.querySelector('.yuRUbf a') || 
                                                   document.querySelector('.LC20lb') ||
@@ -245,14 +867,14 @@ class BrowserAutomator:
                                     return true;
                                 }
                                 return false;
-                            """)
-                            log.append(f"✓ Clicked first result using JavaScript fallback")
-                            clicked = True
+                            }"""))
+                            if clicked:
+                                log.append(f"✓ Clicked first result using JavaScript fallback")
                         except:
                             pass
                     
-                    # Try pressing Enter as final fallback
-                    if not clicked:
+                    # Demo mode keeps pressing Enter as a last resort
+                    if not clicked and self.demo_mode:
                         try:
                             page.keyboard.press('Enter')
                             log.append(f"✓ Pressed Enter as fallback for click - {description}")
@@ -261,11 +883,11 @@ class BrowserAutomator:
                             pass
                 
                 if clicked:
-                    time.sleep(1.2)  # Medium wait after click
+                    self._pause(1.2)  # Medium wait after click
                     return {'success': True}
                 else:
-                    log.append(f"⚠️ Click failed for all selectors - {description} - Continuing...")
-                    return {'success': True}  # Continue execution
+                    log.append(f"⚠️ Click failed for all selectors - {description}")
+                    return {'success': False, 'error': f"click failed: {primary_error or 'no matching element'}"}
             
             elif action == 'type':
                 selector = step.get('selector')
@@ -291,77 +913,78 @@ class BrowserAutomator:
                     "input:not([type='hidden']):not([type='submit']):not([type='button'])"
                 ]
                 
+                strategy = self._typing_strategy(step)
+                
                 typed = False
-                for sel in selectors_to_try:
+                primary_error = None
+                for index, sel in enumerate(selectors_to_try):
                     try:
-                        page.wait_for_selector(sel, state='visible', timeout=3000)
-                        # Clear and type
-                        page.fill(sel, "")  # Clear first
-                        time.sleep(0.5)
-                        # Medium-speed human-like typing
-                        import random
-                        
-                        # Clear field first
-                        page.fill(sel, "")
-                        time.sleep(random.uniform(0.2, 0.4))  # Brief pause before typing
-                        
-                        # Type with natural speed - not too fast, not too slow
-                        page.type(sel, text, delay=random.randint(80, 150))  # 80-150ms per character
-                        log.append(f"✓ Typed '{text}' into: {sel} - {description}")
+                        if index == 0:
+                            self._wait_for_selector(page, sel, 3000)
+                        elif not page.is_visible(sel):
+                            continue
+                        self._enter_text(page, sel, text, strategy)
+                        log.append(f"✓ Typed '{text}' into: {sel} - {description} ({strategy})")
                         typed = True
                         break
-                    except:
+                    except Exception as e:
+                        if index == 0:
+                            primary_error = str(e)
                         continue
                 
-                if not typed:
+                if not typed and self.demo_mode:
                     # Try typing directly without selector
                     try:
-                        page.keyboard.type(text, delay=100)
+                        if strategy == 'human':
+                            page.keyboard.type(text, delay=100)
+                        else:
+                            page.keyboard.insert_text(text)
                         log.append(f"✓ Typed '{text}' directly - {description}")
                         typed = True
                     except:
                         pass
                 
                 if typed:
-                    time.sleep(0.8)  # Medium wait after typing
+                    if strategy == 'human':
+                        self._sleep(0.8)  # Medium wait after typing
                     
-                    # Special handling for search queries - try to trigger search
-                    if any(word in text.lower() for word in ['search', 'yt', 'youtube', 'google']):
+                    # Explicit submit, or the demo keyword heuristic for search queries
+                    submit = step.get('submit')
+                    if submit is None and strategy == 'human':
+                        submit = any(word in text.lower() for word in ['search', 'yt', 'youtube', 'google'])
+                    if submit:
                         try:
                             # Try pressing Enter to trigger search
                             page.keyboard.press('Enter')
                             log.append(f"✓ Pressed Enter after typing '{text}' to trigger search")
-                            time.sleep(2.0)  # Medium wait for search to process
+                            if strategy == 'human':
+                                self._sleep(2.0)  # Medium wait for search to process
                         except:
                             pass
                     
                     return {'success': True}
                 else:
-                    log.append(f"⚠️ Type failed for all selectors - {description} - Continuing...")
-                    return {'success': True}  # Continue execution
+                    log.append(f"⚠️ Type failed for all selectors - {description}")
+                    return {'success': False, 'error': f"type failed: {primary_error or 'no matching input'}"}
             
             elif action == 'wait':
                 selector = step.get('selector')
                 timeout = step.get('timeout', 5000)
                 
                 if selector:
-                    try:
-                        page.wait_for_selector(selector, state='visible', timeout=timeout)
-                        log.append(f"✓ Waited for element: {selector}")
-                    except:
-                        # If specific selector fails, just wait the timeout
-                        time.sleep(timeout / 1000)
-                        log.append(f"✓ Waited {timeout}ms (selector not found)")
+                    self._wait_for_selector(page, selector, timeout)
+                    log.append(f"✓ Waited for element: {selector}")
                 else:
-                    time.sleep(timeout / 1000)
+                    self._sleep(timeout / 1000)
                     log.append(f"✓ Waited for {timeout}ms")
                 
-                # Additional wait for page stability
-                try:
-                    page.wait_for_load_state('networkidle', timeout=3000)
-                    log.append("✓ Page network activity settled")
-                except:
-                    pass
+                # Demo mode additionally waits for the network to settle (use wait_for for data-driven waits)
+                if self.demo_mode:
+                    try:
+                        page.wait_for_load_state('networkidle', timeout=self._timeout(3000))
+                        log.append("✓ Page network activity settled")
+                    except:
+                        pass
                 
                 return {'success': True}
             
@@ -382,10 +1005,10 @@ class BrowserAutomator:
                 return {'success': True}
             
             elif action == 'screenshot':
-                path = step.get('path', f'screenshot_{int(time.time())}.png')
-                page.screenshot(path=path)
-                log.append(f"✓ Screenshot saved: {path}")
-                return {'success': True}
+                data = page.screenshot(**screenshot_options(step))
+                ref = self.screenshot_writer.submit(data, step.get('format', 'png'), copy_to=step.get('path'))
+                log.append(f"✓ Screenshot captured: {ref['path']}")
+                return {'success': True, 'screenshot': ref}
             
             elif action == 'select':
                 selector = step.get('selector')
@@ -393,7 +1016,7 @@ class BrowserAutomator:
                 if not selector or value is None:
                     return {'success': False, 'error': 'select action requires selector and value'}
                 
-                page.wait_for_selector(selector, state='visible', timeout=10000)
+                self._wait_for_selector(page, selector, 10000)
                 page.select_option(selector, value)
                 log.append(f"✓ Selected '{value}' in: {selector} - {description}")
                 return {'success': True}
@@ -403,7 +1026,7 @@ class BrowserAutomator:
                 if not selector:
                     return {'success': False, 'error': 'hover action requires selector'}
                 
-                page.wait_for_selector(selector, state='visible', timeout=10000)
+                self._wait_for_selector(page, selector, 10000)
                 page.hover(selector)
                 log.append(f"✓ Hovered over: {selector} - {description}")
                 return {'success': True}
@@ -423,50 +1046,98 @@ class BrowserAutomator:
         except Exception as e:
             return {'success': False, 'error': f'{action} failed: {str(e)}'}
     
-    async def execute_steps_async(self, steps: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def execute_steps_async(self, steps: List[Dict[str, Any]], checkpoint: Optional[bool] = None,
+                                  session_user: Optional[str] = None, run_id: Optional[str] = None,
+                                  deadline_seconds: Optional[float] = None,
+                                  on_step: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
         """
-        Execute browser automation steps asynchronously
+        Execute browser automation steps asynchronously.
+        With checkpointing enabled, a failed run keeps its browser alive for
+        checkpoint_grace seconds so it can be continued with resume_steps_async().
+        Steps marked session_checkpoint save/restore storage state like execute_steps().
+        Cancelling the run closes its browser immediately, even mid-step.
+        on_step is called with each step's outcome as soon as it finishes.
         """
+        if checkpoint is None:
+            checkpoint = self.checkpoint_on_failure
+        
+        invalid = self._validation_failure(steps)
+        if invalid:
+            return invalid
+        
+        control, token = self._begin_run(run_id, deadline_seconds, on_step)
+        try:
+            with metrics.track('dependency', 'playwright:run') as call:
+                result = await self._execute_steps_async(steps, checkpoint, session_user, control)
+                if not result.get('success'):
+                    call.failed()
+        finally:
+            self._release_run(control, token)
+        await self._flush_screenshots_async(result)
+        return self._run_outcome(control, result)
+    
+    def _close_on_cancel(self, control: RunControl, playwright, browser) -> None:
+        """Free the run's browser as soon as it is cancelled, from whichever thread cancels it"""
+        loop = asyncio.get_running_loop()
+        control.on_cancel(lambda: loop.call_soon_threadsafe(
+            lambda: asyncio.ensure_future(self._close_async(playwright, browser))
+        ))
+    
+    async def _execute_steps_async(self, steps: List[Dict[str, Any]], checkpoint: bool,
+                                   session_user: Optional[str], control: RunControl) -> Dict[str, Any]:
+        playwright = None
+        browser = None
         try:
             print(f"🎬 STARTING ASYNC BROWSER AUTOMATION - HEADLESS: {self.headless}")
-            async with async_playwright() as p:
-                # FORCE VISIBLE BROWSER - IGNORE HEADLESS SETTING!
-                print("🎬 LAUNCHING VISIBLE BROWSER WINDOW (ASYNC)...")
-                browser = await p.chromium.launch(
-                    headless=False,  # ALWAYS VISIBLE!
+            from playwright.async_api import async_playwright
+            playwright = await async_playwright().start()
+            # Demo mode forces a visible browser regardless of the headless setting
+            print("🎬 LAUNCHING VISIBLE BROWSER WINDOW (ASYNC)...")
+            if self.browser_server:
+                browser = await self.browser_server.connect_async(playwright)
+            else:
+                browser = await playwright.chromium.launch(
+                    headless=self.headless and not self.demo_mode,
                     args=['--start-maximized'],  # Make it obvious
-                    slow_mo=1000  # Slow down actions so you can see them
+                    slow_mo=1000 if self.demo_mode else 0  # Demo: slow down actions so you can see them
                 )
-                page = await browser.new_page()
-                print("🎬 ASYNC BROWSER WINDOW SHOULD BE VISIBLE NOW!")
-                
-                log = []
-                
-                for i, step in enumerate(steps):
-                    try:
-                        result = await self._execute_single_step_async(page, step, log)
-                        if not result['success']:
-                            await browser.close()
-                            return {
-                                'success': False,
-                                'error': result['error'],
-                                'log': log,
-                                'failed_step': i
-                            }
-                    except Exception as e:
-                        await browser.close()
-                        return {
-                            'success': False,
-                            'error': f"Step {i} failed: {str(e)}",
-                            'log': log,
-                            'failed_step': i
-                        }
-                
-                await browser.close()
-                return {
-                    'success': True,
-                    'log': log
-                }
+            self._close_on_cancel(control, playwright, browser)
+            session_plan = self.session_store.plan(steps, session_user)
+            snapshot = session_plan['snapshot'] if session_plan else None
+            context = await browser.new_context(storage_state=snapshot['storage_state'] if snapshot else None)
+            browser_watchdog.track_context(context)
+            page = await context.new_page()
+            print("🎬 ASYNC BROWSER WINDOW SHOULD BE VISIBLE NOW!")
+            
+            log = []
+            if self.interstitials:
+                await self.interstitials.install_async(page, log)
+            start_index = await self._restore_session_async(page, snapshot, log) if snapshot else 0
+            if start_index is None:
+                result = {'success': False, 'log': log}
+            else:
+                result = await self._run_steps_async(page, steps[start_index:], start_index, log, context, session_plan)
+            
+            if snapshot and not result['success'] and not control.stop_reason():
+                # The saved session no longer works - drop it and replay the whole workflow
+                log.append("↩️ Saved session did not work, replaying the full workflow")
+                self.session_store.invalidate(session_plan['user'], session_plan['domain'])
+                await context.close()
+                context = await browser.new_context()
+                browser_watchdog.track_context(context)
+                page = await context.new_page()
+                if self.interstitials:
+                    await self.interstitials.install_async(page, log)
+                result = await self._run_steps_async(page, steps, 0, log, context, session_plan)
+            
+            if not result['success'] and checkpoint and 'failed_step' in result and not control.stop_reason():
+                checkpoint_info = await self._store_checkpoint(playwright, browser, page, steps, result, log)
+                result.update(checkpoint_info)
+                # The checkpoint now owns the browser
+                playwright = None
+                browser = None
+            
+            return result
                 
         except Exception as e:
             return {
@@ -474,6 +1145,236 @@ class BrowserAutomator:
                 'error': f"Browser automation failed: {str(e)}",
                 'log': []
             }
+        finally:
+            await self._close_async(playwright, browser)
+    
+    async def _restore_session_async(self, page, snapshot: Dict[str, Any], log: List[str]) -> Optional[int]:
+        """Async counterpart of _restore_session"""
+        try:
+            await page.goto(snapshot['url'], wait_until='domcontentloaded')
+            log.append(f"♻️ Restored saved session for {snapshot['domain']}, skipping {snapshot['checkpoint_step'] + 1} steps")
+            return snapshot['checkpoint_step'] + 1
+        except Exception as e:
+            log.append(f"⚠️ Could not restore saved session: {str(e)}")
+            return None
+    
+    async def _save_session_async(self, context, page, session_plan: Dict[str, Any], log: List[str]) -> None:
+        try:
+            self.session_store.save(session_plan, await context.storage_state(), page.url)
+            log.append(f"💾 Saved session state for {session_plan['domain']}")
+        except Exception as e:
+            log.append(f"⚠️ Could not save session state: {str(e)}")
+    
+    async def _run_steps_async(self, page, steps: List[Dict[str, Any]], start_index: int,
+                               log: List[str], context=None,
+                               session_plan: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Run steps on an open page under the retry policy, stopping at the first
+        failed step that is not optional. start_index is the position of steps[0]
+        in the original run so failed_step is always reported against the full step list.
+        """
+        capture = self._new_capture_buffer()
+        run_label = f"run_{uuid.uuid4().hex[:12]}"
+        budget = self.retry_policy.start_run()
+        failure_evidence = {}
+        step_failures = []
+        step_timings = []
+        step_results = []
+        screenshots = []
+        offset = 0
+        unbatched_offset = None
+        
+        while offset < len(steps):
+            end = self._batch_end(steps, offset) if offset != unbatched_offset else offset
+            if end > offset:
+                completed = await self._run_batch_async(page, steps[offset:end], start_index + offset, log, step_timings)
+                if completed:
+                    await self._close_leaked_pages_async(page, log)
+                    self._add_step_results(step_results, [
+                        self._step_result(start_index + offset + n, steps[offset + n], {'success': True, 'attempts': 1})
+                        for n in range(completed)
+                    ])
+                    if capture is not None:
+                        await capture.capture_async(page, start_index + offset + completed - 1, steps[offset + completed - 1].get('action'))
+                    if (session_plan and context is not None and not step_failures
+                            and start_index + offset <= session_plan['index'] < start_index + offset + completed):
+                        await self._save_session_async(context, page, session_plan, log)
+                    if offset + completed < end:
+                        unbatched_offset = offset + completed
+                    offset += completed
+                    continue
+                unbatched_offset = offset
+            
+            step = steps[offset]
+            i = start_index + offset
+            offset += 1
+            started = time.perf_counter()
+            result = await self._attempt_step_async(page, step, log, budget)
+            await self._close_leaked_pages_async(page, log)
+            if result.get('screenshot'):
+                screenshots.append({'step': i, **result['screenshot']})
+            step_timings.append(self._step_timing(i, step, started, result['success']))
+            self._add_step_results(step_results, [self._step_result(i, step, result)])
+            if capture is not None:
+                await capture.capture_async(page, i, step.get('action'))
+            
+            if result['success']:
+                if session_plan and context is not None and i == session_plan['index'] and not step_failures:
+                    await self._save_session_async(context, page, session_plan, log)
+                continue
+            
+            error = result.get('error', 'Unknown error')
+            log.append(f"⚠️ Step {i+1} failed ({result['error_kind']}, {result['attempts']} attempts): {error}")
+            step_failures.append(i)
+            self._flush_capture(capture, run_label, failure_evidence)
+            if step.get('optional') and result['error_kind'] not in RUN_STOP_KINDS:
+                continue
+            
+            step_results.extend(self._skipped_result(start_index + n, steps[n]) for n in range(offset, len(steps)))
+            return {
+                'success': False,
+                'error': error,
+                'log': log,
+                'failed_step': i,
+                'step_failures': step_failures,
+                'step_timings': step_timings,
+                'step_results': step_results,
+                'screenshots': screenshots,
+                **failure_evidence
+            }
+        
+        return {
+            'success': True,
+            'log': log,
+            'step_failures': step_failures,
+            'step_timings': step_timings,
+            'step_results': step_results,
+            'screenshots': screenshots,
+            **failure_evidence
+        }
+    
+    async def _close_async(self, playwright, browser) -> None:
+        """Close an async browser and stop its Playwright driver, ignoring errors"""
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception:
+                pass
+            if self.browser_server:
+                self.browser_server.release(browser)
+        if playwright is not None:
+            try:
+                await playwright.stop()
+            except Exception:
+                pass
+    
+    # Checkpointed execution
+    async def _store_checkpoint(self, playwright, browser, page, steps: List[Dict[str, Any]],
+                                result: Dict[str, Any], log: List[str]) -> Dict[str, Any]:
+        """
+        Keep a failed run's browser alive for a bounded grace period.
+        The oldest checkpoint is released when max_checkpoints is reached.
+        """
+        while len(self._checkpoints) >= self.max_checkpoints:
+            oldest_id = min(self._checkpoints, key=lambda cid: self._checkpoints[cid]['created_at'])
+            print(f"♻️ Releasing oldest checkpoint {oldest_id} to stay within limit")
+            await self.release_checkpoint(oldest_id)
+        
+        checkpoint_id = uuid.uuid4().hex
+        expires_at = time.time() + self.checkpoint_grace
+        self._checkpoints[checkpoint_id] = {
+            'playwright': playwright,
+            'browser': browser,
+            'page': page,
+            'steps': list(steps),
+            'log': log,
+            'failed_step': result['failed_step'],
+            'created_at': time.time(),
+            'expires_at': expires_at,
+            'expiry_handle': self._schedule_checkpoint_expiry(checkpoint_id)
+        }
+        print(f"📌 Checkpoint {checkpoint_id} kept alive for {self.checkpoint_grace}s at step {result['failed_step']}")
+        return {
+            'checkpoint_id': checkpoint_id,
+            'checkpoint_expires_at': datetime.utcfromtimestamp(expires_at).isoformat()
+        }
+    
+    def _schedule_checkpoint_expiry(self, checkpoint_id: str):
+        loop = asyncio.get_running_loop()
+        return loop.call_later(
+            self.checkpoint_grace,
+            lambda: asyncio.ensure_future(self.release_checkpoint(checkpoint_id, reason='expired'))
+        )
+    
+    async def release_checkpoint(self, checkpoint_id: str, reason: str = 'released') -> bool:
+        """Close the browser held by a checkpoint"""
+        entry = self._checkpoints.pop(checkpoint_id, None)
+        if entry is None:
+            return False
+        entry['expiry_handle'].cancel()
+        await self._close_async(entry['playwright'], entry['browser'])
+        print(f"🧹 Checkpoint {checkpoint_id} {reason}")
+        return True
+    
+    def list_checkpoints(self) -> List[Dict[str, Any]]:
+        """Describe the checkpoints currently held open"""
+        return [{
+            'checkpoint_id': checkpoint_id,
+            'failed_step': entry['failed_step'],
+            'total_steps': len(entry['steps']),
+            'expires_at': datetime.utcfromtimestamp(entry['expires_at']).isoformat()
+        } for checkpoint_id, entry in self._checkpoints.items()]
+    
+    async def resume_steps_async(self, checkpoint_id: str, steps: List[Dict[str, Any]],
+                                 run_id: Optional[str] = None, deadline_seconds: Optional[float] = None,
+                                 on_step: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Continue a checkpointed run from its failed step.
+        steps replaces the original steps from failed_step onwards. If the resumed
+        run fails again the checkpoint is renewed so it can be corrected once more.
+        """
+        # Invalid corrections leave the checkpoint in place so a fixed step list can still be sent
+        invalid = self._validation_failure(steps)
+        if invalid:
+            return invalid
+        
+        entry = self._checkpoints.pop(checkpoint_id, None)
+        if entry is None:
+            return {
+                'success': False,
+                'error': f"Checkpoint {checkpoint_id} not found or expired",
+                'log': []
+            }
+        entry['expiry_handle'].cancel()
+        
+        failed_step = entry['failed_step']
+        log = entry['log']
+        log.append(f"↻ Resuming from step {failed_step + 1} with {len(steps)} corrected steps")
+        
+        control, token = self._begin_run(run_id, deadline_seconds, on_step)
+        self._close_on_cancel(control, entry['playwright'], entry['browser'])
+        try:
+            result = await self._run_steps_async(entry['page'], steps, failed_step, log)
+        except Exception as e:
+            result = {
+                'success': False,
+                'error': f"Resume failed: {str(e)}",
+                'log': log
+            }
+        finally:
+            self._release_run(control, token)
+        await self._flush_screenshots_async(result)
+        result = self._run_outcome(control, result)
+        
+        result['resumed_from_step'] = failed_step
+        if not result['success'] and 'failed_step' in result and not control.stop_reason():
+            full_steps = entry['steps'][:failed_step] + list(steps)
+            result.update(await self._store_checkpoint(
+                entry['playwright'], entry['browser'], entry['page'], full_steps, result, log
+            ))
+        else:
+            await self._close_async(entry['playwright'], entry['browser'])
+        return result
     
     async def _execute_single_step_async(self, page, step: Dict[str, Any], log: List[str]) -> Dict[str, Any]:
         """
@@ -497,7 +1398,7 @@ class BrowserAutomator:
                 if not selector:
                     return {'success': False, 'error': 'click action requires selector'}
                 
-                await page.wait_for_selector(selector, state='visible', timeout=10000)
+                await page.wait_for_selector(selector, state='visible', timeout=self._timeout(10000))
                 await page.click(selector)
                 log.append(f"✓ Clicked: {selector} - {description}")
                 return {'success': True}
@@ -508,9 +1409,14 @@ class BrowserAutomator:
                 if not selector or text is None:
                     return {'success': False, 'error': 'type action requires selector and text'}
                 
-                await page.wait_for_selector(selector, state='visible', timeout=10000)
-                await page.fill(selector, text)
-                log.append(f"✓ Typed '{text}' into: {selector} - {description}")
+                strategy = self._typing_strategy(step)
+                await page.wait_for_selector(selector, state='visible', timeout=self._timeout(10000))
+                await self._enter_text_async(page, selector, text, strategy)
+                log.append(f"✓ Typed '{text}' into: {selector} - {description} ({strategy})")
+                
+                if step.get('submit'):
+                    await page.keyboard.press('Enter')
+                    log.append(f"✓ Pressed Enter after typing '{text}'")
                 return {'success': True}
             
             elif action == 'wait':
@@ -518,10 +1424,10 @@ class BrowserAutomator:
                 timeout = step.get('timeout', 5000)
                 
                 if selector:
-                    await page.wait_for_selector(selector, state='visible', timeout=timeout)
+                    await page.wait_for_selector(selector, state='visible', timeout=self._timeout(timeout))
                     log.append(f"✓ Waited for element: {selector}")
                 else:
-                    await asyncio.sleep(timeout / 1000)
+                    await self._sleep_async(timeout / 1000)
                     log.append(f"✓ Waited for {timeout}ms")
                 
                 return {'success': True}
@@ -543,10 +1449,10 @@ class BrowserAutomator:
                 return {'success': True}
             
             elif action == 'screenshot':
-                path = step.get('path', f'screenshot_{int(time.time())}.png')
-                await page.screenshot(path=path)
-                log.append(f"✓ Screenshot saved: {path}")
-                return {'success': True}
+                data = await page.screenshot(**screenshot_options(step))
+                ref = await self.screenshot_writer.submit_async(data, step.get('format', 'png'), copy_to=step.get('path'))
+                log.append(f"✓ Screenshot captured: {ref['path']}")
+                return {'success': True, 'screenshot': ref}
             
             elif action == 'select':
                 selector = step.get('selector')
@@ -554,7 +1460,7 @@ class BrowserAutomator:
                 if not selector or value is None:
                     return {'success': False, 'error': 'select action requires selector and value'}
                 
-                await page.wait_for_selector(selector, state='visible', timeout=10000)
+                await page.wait_for_selector(selector, state='visible', timeout=self._timeout(10000))
                 await page.select_option(selector, value)
                 log.append(f"✓ Selected '{value}' in: {selector} - {description}")
                 return {'success': True}
@@ -564,7 +1470,7 @@ class BrowserAutomator:
                 if not selector:
                     return {'success': False, 'error': 'hover action requires selector'}
                 
-                await page.wait_for_selector(selector, state='visible', timeout=10000)
+                await page.wait_for_selector(selector, state='visible', timeout=self._timeout(10000))
                 await page.hover(selector)
                 log.append(f"✓ Hovered over: {selector} - {description}")
                 return {'success': True}
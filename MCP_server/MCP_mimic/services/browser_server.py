@@ -0,0 +1,342 @@
+# services/browser_server.py - Shared Browser Server and Client
+"""
+One Chromium per host instead of one per process.
+
+The server side (BrowserServer) is a small supervisor that launches Chromium
+with a remote-debugging port, restarts it when it crashes and records the
+endpoint in a state file:
+
+    python -m services.browser_server --port 9222
+
+Every other process (Flask service, MCP server, worker pool, helper scripts)
+sets BROWSER_SERVER_ENDPOINT=http://127.0.0.1:9222 and its BrowserAutomator
+attaches with connect_over_cdp instead of launching a browser. Each run gets
+its own browser context; BrowserServerClient caps how many contexts one
+process holds at a time and retries the connection while the supervisor
+brings a crashed browser back.
+
+The supervisor also runs the memory watchdog: it closes pages left open longer
+than WATCHDOG_PAGE_MAX_AGE_SECONDS (for example by a client that crashed) and
+restarts the browser once it is idle and above WATCHDOG_MAX_RSS_MB.
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.request
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from services.watchdog import browser_watchdog, process_tree_rss, MB
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_STATE_FILE = os.path.join(PACKAGE_ROOT, '.browser_server.json')
+
+SERVER_ARGS = [
+    '--no-first-run',
+    '--no-default-browser-check',
+    '--disable-blink-features=AutomationControlled',
+    '--disable-background-networking',
+    '--window-size=1920,1080'
+]
+
+
+def _chromium_executable() -> str:
+    """Chromium binary installed by `playwright install chromium`"""
+    from playwright.sync_api import sync_playwright
+    with sync_playwright() as p:
+        return p.chromium.executable_path
+
+
+class BrowserServer:
+    """Launches and supervises the shared Chromium; restarts it with backoff when it exits"""
+
+    def __init__(self, port: Optional[int] = None, headless: bool = True, executable: Optional[str] = None,
+                 state_file: Optional[str] = None, extra_args: Optional[List[str]] = None):
+        self.port = port or int(os.getenv('BROWSER_SERVER_PORT', '9222'))
+        self.headless = headless
+        self.executable = executable or os.getenv('BROWSER_SERVER_EXECUTABLE')
+        self.state_file = state_file or os.getenv('BROWSER_SERVER_STATE_FILE', DEFAULT_STATE_FILE)
+        self.extra_args = extra_args or []
+        self.endpoint = f"http://127.0.0.1:{self.port}"
+        self.restarts = 0
+        self._process = None
+        self._profile_dir = None
+        self._started_at = None
+        self._started_at_iso = None
+        self._running = False
+        self._stopped = threading.Event()
+        self._recycling = False
+        self._first_seen: Dict[str, float] = {}
+        self.watchdog_interval = float(os.getenv('WATCHDOG_INTERVAL_SECONDS', '15'))
+        self.page_max_age = float(os.getenv('WATCHDOG_PAGE_MAX_AGE_SECONDS', '1800'))
+        self.memory = {'rss_mb': None, 'pages': 0, 'stale_pages_closed': 0, 'recycles': 0}
+
+    def _command(self) -> List[str]:
+        command = [
+            self.executable,
+            f'--remote-debugging-port={self.port}',
+            '--remote-debugging-address=127.0.0.1',
+            f'--user-data-dir={self._profile_dir}',
+            *SERVER_ARGS,
+            *self.extra_args
+        ]
+        if self.headless:
+            command.append('--headless=new')
+        command.append('about:blank')
+        return command
+
+    def _wait_until_ready(self, timeout: float = 15.0) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise Exception(f"Chromium exited with {self._process.returncode} during startup")
+            try:
+                with urllib.request.urlopen(f"{self.endpoint}/json/version", timeout=1) as response:
+                    json.load(response)
+                return
+            except Exception:
+                time.sleep(0.2)
+        raise Exception(f"Chromium did not open {self.endpoint} within {timeout}s")
+
+    def _write_state(self) -> None:
+        state = {
+            'endpoint': self.endpoint,
+            'pid': self._process.pid,
+            'supervisor_pid': os.getpid(),
+            'started_at': self._started_at_iso,
+            'restarts': self.restarts,
+            'memory': self.memory
+        }
+        with open(self.state_file, 'w') as f:
+            json.dump(state, f)
+
+    def _launch(self) -> None:
+        if not self.executable:
+            self.executable = _chromium_executable()
+        # A fresh profile per launch, so a crash cannot leave a locked or corrupt profile behind
+        self._profile_dir = tempfile.mkdtemp(prefix='browser_server_')
+        self._process = subprocess.Popen(self._command(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self._started_at = time.time()
+        self._started_at_iso = datetime.utcnow().isoformat()
+        self._first_seen.clear()
+        self._wait_until_ready()
+        self._write_state()
+        print(f"🌐 Browser server ready at {self.endpoint} (pid {self._process.pid})")
+
+    def _cleanup(self) -> None:
+        if self._process is not None and self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+        if self._profile_dir:
+            shutil.rmtree(self._profile_dir, ignore_errors=True)
+            self._profile_dir = None
+
+    def _get_json(self, path: str) -> Any:
+        with urllib.request.urlopen(f"{self.endpoint}{path}", timeout=2) as response:
+            return json.load(response)
+
+    def _sample(self) -> None:
+        """One watchdog pass: measure, close stale pages, recycle an idle oversized browser"""
+        process = self._process
+        if process is None or process.poll() is not None:
+            return
+        rss = process_tree_rss(process.pid)
+        pages = [t for t in self._get_json('/json/list') if t.get('type') == 'page']
+        now = time.time()
+        seen = {}
+        for target in pages:
+            seen[target['id']] = self._first_seen.get(target['id'], now)
+            if now - seen[target['id']] > self.page_max_age and target.get('url') != 'about:blank':
+                try:
+                    urllib.request.urlopen(f"{self.endpoint}/json/close/{target['id']}", timeout=2).close()
+                    self.memory['stale_pages_closed'] += 1
+                    print(f"🧹 Closed page open for over {int(self.page_max_age)}s: {target.get('url')}")
+                except Exception:
+                    pass
+        self._first_seen = seen
+        self.memory['rss_mb'] = round(rss / MB, 1) if rss is not None else None
+        self.memory['pages'] = len(pages)
+        self._write_state()
+        idle = all(target.get('url') == 'about:blank' for target in pages)
+        if idle and browser_watchdog.over_limit(rss):
+            print(f"♻️ Shared browser uses {rss // MB} MB while idle; recycling")
+            self._recycling = True
+            process.terminate()
+
+    def _watch_loop(self) -> None:
+        while not self._stopped.wait(self.watchdog_interval):
+            try:
+                self._sample()
+            except Exception as e:
+                print(f"⚠️ Browser watchdog sample failed: {str(e)}")
+
+    def serve_forever(self) -> None:
+        """Keep a browser running until stop(); restarts back off when the browser keeps dying on start"""
+        self._running = True
+        threading.Thread(target=self._watch_loop, name='browser-watchdog', daemon=True).start()
+        streak = 0
+        while self._running:
+            self._started_at = None
+            try:
+                self._launch()
+                self._process.wait()
+                exit_code = self._process.returncode
+            except Exception as e:
+                exit_code = str(e)
+            self._cleanup()
+            if not self._running:
+                break
+            if self._recycling:
+                self._recycling = False
+                self.memory['recycles'] += 1
+                continue
+            short_lived = self._started_at is None or time.time() - self._started_at < 10
+            streak = streak + 1 if short_lived else 0
+            delay = min(30, 2 ** streak) if streak else 0
+            self.restarts += 1
+            print(f"💥 Shared browser exited with {exit_code}; restarting in {delay}s")
+            if self._stopped.wait(delay):
+                break
+        try:
+            os.remove(self.state_file)
+        except OSError:
+            pass
+
+    def stop(self) -> None:
+        self._running = False
+        self._stopped.set()
+        if self._process is not None and self._process.poll() is None:
+            self._process.terminate()
+
+
+class BrowserServerClient:
+    """
+    Per-process handle on the shared browser server.
+    Every connected browser holds one of `max_contexts` slots until release(),
+    so a single process cannot open an unbounded number of contexts on the shared browser.
+    """
+
+    def __init__(self, endpoint: str, max_contexts: Optional[int] = None, connect_timeout: Optional[float] = None,
+                 acquire_timeout: Optional[float] = None):
+        self.endpoint = endpoint
+        self.max_contexts = max_contexts or int(os.getenv('BROWSER_SERVER_MAX_CONTEXTS', '4'))
+        self.connect_timeout = connect_timeout or float(os.getenv('BROWSER_SERVER_CONNECT_TIMEOUT', '30'))
+        self.acquire_timeout = acquire_timeout or float(os.getenv('BROWSER_SERVER_ACQUIRE_TIMEOUT', '60'))
+        self._slots = threading.BoundedSemaphore(self.max_contexts)
+        self._leased = set()
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.reconnects = 0
+
+    def _acquire(self) -> None:
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise Exception(f"No free browser context slot on {self.endpoint} after {self.acquire_timeout}s "
+                            f"({self.max_contexts} in use)")
+
+    def _lease(self, browser) -> None:
+        with self._lock:
+            self._leased.add(browser)
+            self.connects += 1
+
+    def release(self, browser) -> None:
+        """Give the browser's slot back; safe to call more than once"""
+        with self._lock:
+            if browser not in self._leased:
+                return
+            self._leased.discard(browser)
+        self._slots.release()
+
+    def connect(self, playwright):
+        """Take a slot and attach a sync Playwright driver, retrying while the server restarts"""
+        self._acquire()
+        deadline = time.monotonic() + self.connect_timeout
+        delay = 0.5
+        while True:
+            try:
+                browser = playwright.chromium.connect_over_cdp(self.endpoint, timeout=self.connect_timeout * 1000)
+                self._lease(browser)
+                return browser
+            except Exception as e:
+                if time.monotonic() + delay >= deadline:
+                    self._slots.release()
+                    raise Exception(f"Browser server at {self.endpoint} unavailable: {str(e)}")
+                self.reconnects += 1
+                print(f"🔌 Browser server at {self.endpoint} unavailable, retrying in {delay}s")
+                time.sleep(delay)
+                delay = min(5.0, delay * 2)
+
+    async def connect_async(self, playwright):
+        """Async counterpart of connect(); waiting for a slot happens off the event loop"""
+        await asyncio.get_running_loop().run_in_executor(None, self._acquire)
+        deadline = time.monotonic() + self.connect_timeout
+        delay = 0.5
+        while True:
+            try:
+                browser = await playwright.chromium.connect_over_cdp(self.endpoint, timeout=self.connect_timeout * 1000)
+                self._lease(browser)
+                return browser
+            except Exception as e:
+                if time.monotonic() + delay >= deadline:
+                    self._slots.release()
+                    raise Exception(f"Browser server at {self.endpoint} unavailable: {str(e)}")
+                self.reconnects += 1
+                print(f"🔌 Browser server at {self.endpoint} unavailable, retrying in {delay}s")
+                await asyncio.sleep(delay)
+                delay = min(5.0, delay * 2)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            in_use = len(self._leased)
+        return {
+            'endpoint': self.endpoint,
+            'max_contexts': self.max_contexts,
+            'contexts_in_use': in_use,
+            'connects': self.connects,
+            'reconnects': self.reconnects,
+            'server': read_server_state()
+        }
+
+
+def read_server_state(state_file: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """The supervisor's last published state (endpoint, pid, restarts, memory), if it runs on this host"""
+    try:
+        with open(state_file or os.getenv('BROWSER_SERVER_STATE_FILE', DEFAULT_STATE_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+_clients: Dict[str, BrowserServerClient] = {}
+_clients_lock = threading.Lock()
+
+
+def client_for(endpoint: str) -> BrowserServerClient:
+    """The process-wide client for an endpoint, so every automator in a process shares its slot limit"""
+    with _clients_lock:
+        if endpoint not in _clients:
+            _clients[endpoint] = BrowserServerClient(endpoint)
+        return _clients[endpoint]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Shared Chromium server for browser automation')
+    parser.add_argument('--port', type=int, default=None)
+    parser.add_argument('--headed', action='store_true', help='Show the browser window')
+    parser.add_argument('--state-file', default=None)
+    args = parser.parse_args()
+
+    server = BrowserServer(port=args.port, headless=not args.headed, state_file=args.state_file)
+    signal.signal(signal.SIGTERM, lambda *_: server.stop())
+    signal.signal(signal.SIGINT, lambda *_: server.stop())
+    print(f"🌐 Starting shared browser server on {server.endpoint}")
+    print(f"   Set BROWSER_SERVER_ENDPOINT={server.endpoint} for the services that should use it")
+    server.serve_forever()
@@ -0,0 +1,76 @@
+# services/capture.py - Failure Screenshot Capture Service
+from collections import deque
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+import os
+import time
+
+
+class ScreenshotRingBuffer:
+    """
+    Keeps the last N low-quality JPEG screenshots of a run in memory.
+    Nothing touches the disk until flush_to_disk() is called on failure.
+    """
+
+    def __init__(self, size: int = 5, quality: int = 40):
+        self.size = max(1, int(size))
+        self.quality = max(1, min(100, int(quality)))
+        self.frames = deque(maxlen=self.size)
+
+    def _screenshot_options(self) -> Dict[str, Any]:
+        return {'type': 'jpeg', 'quality': self.quality, 'animations': 'disabled'}
+
+    def _push(self, data: bytes, step_index: int, action: Optional[str]):
+        self.frames.append({
+            'step': step_index,
+            'action': action,
+            'captured_at': datetime.utcnow(),
+            'data': data
+        })
+
+    def capture(self, page, step_index: int, action: Optional[str] = None) -> bool:
+        """Capture a frame from a sync Playwright page; failures are ignored"""
+        try:
+            data = page.screenshot(**self._screenshot_options())
+            self._push(data, step_index, action)
+            return True
+        except Exception:
+            return False
+
+    async def capture_async(self, page, step_index: int, action: Optional[str] = None) -> bool:
+        """Capture a frame from an async Playwright page; failures are ignored"""
+        try:
+            data = await page.screenshot(**self._screenshot_options())
+            self._push(data, step_index, action)
+            return True
+        except Exception:
+            return False
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Return buffered frames (oldest first) and empty the buffer"""
+        frames = list(self.frames)
+        self.frames.clear()
+        return frames
+
+    def flush_to_disk(self, directory: str, run_label: Optional[str] = None) -> List[str]:
+        """Write buffered frames to disk and return the file paths"""
+        frames = self.drain()
+        if not frames:
+            return []
+
+        os.makedirs(directory, exist_ok=True)
+        run_label = run_label or f"run_{int(time.time() * 1000)}"
+        paths = []
+        for position, frame in enumerate(frames):
+            filename = f"{run_label}_{position:02d}_step{frame['step'] + 1}_{frame['action'] or 'unknown'}.jpg"
+            path = os.path.join(directory, filename)
+            try:
+                with open(path, 'wb') as f:
+                    f.write(frame['data'])
+                paths.append(path)
+            except Exception as e:
+                print(f"⚠️ Could not write failure screenshot {path}: {e}")
+        return paths
+
+    def __len__(self):
+        return len(self.frames)
@@ -0,0 +1,12 @@
+# services/config.py - Shared Environment Setting Parsers
+from typing import Dict, Optional
+
+
+def parse_tool_limits(spec: Optional[str]) -> Dict[str, int]:
+    """Parse "tool=n,tool=n" into a dict, ignoring malformed entries"""
+    limits = {}
+    for item in (spec or '').split(','):
+        name, _, value = item.partition('=')
+        if name.strip() and value.strip().isdigit() and int(value) > 0:
+            limits[name.strip()] = int(value)
+    return limits
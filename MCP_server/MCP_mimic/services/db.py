@@ -1,9 +1,73 @@
 # services/db.py - MongoDB Database Service
 from pymongo import MongoClient
-from bson import ObjectId
-from datetime import datetime
+from bson import ObjectId, Binary
+from datetime import datetime, timedelta
 import os
 from typing import List, Dict, Any, Optional
+from services.serialization import serialize_document, serialize_documents
+from services.resources import ChangeNotifier
+from services.metrics import metrics, mongo_command_listener
+from services.pagination import CursorError, SORT_FIELDS, decode_cursor, keyset_filter, sort_spec, projection, page_size, build_page
+
+# (collection, index keys) pairs created at startup, shared with AsyncDatabase.
+# Listings page newest-first by (sort field, _id), which needs the compound indexes.
+INDEXES = [
+    ('videos', 'video_url'),
+    ('videos', [('uploaded_at', -1), ('_id', -1)]),
+    ('executions', 'video_id'),
+    ('executions', [('created_at', -1), ('_id', -1)]),
+    ('corrections', 'execution_id'),
+    ('corrections', [('created_at', -1), ('_id', -1)]),
+    ('screenshots', 'execution_id'),
+    ('jobs', 'job_id'),
+    ('jobs', 'status'),
+    ('jobs', [('created_at', -1), ('_id', -1)])
+]
+
+def client_options() -> Dict[str, Any]:
+    """Connection-pool settings shared by the sync and async clients, plus command timing"""
+    options = {
+        'maxPoolSize': int(os.getenv('MONGODB_MAX_POOL_SIZE', '50')),
+        'minPoolSize': int(os.getenv('MONGODB_MIN_POOL_SIZE', '0')),
+        'maxIdleTimeMS': int(os.getenv('MONGODB_MAX_IDLE_TIME_MS', '300000')),
+        'serverSelectionTimeoutMS': int(os.getenv('MONGODB_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+    }
+    if metrics.enabled:
+        options['event_listeners'] = [mongo_command_listener()]
+    return options
+
+def page_query(collection: str, cursor: Optional[str] = None, fields: Optional[List[str]] = None,
+               summary: bool = False, match: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """find() arguments for the newest-first page of a collection (filtered by match) that follows cursor"""
+    query = dict(match or {})
+    if cursor:
+        sort_value, doc_id = decode_cursor(cursor)
+        after = keyset_filter(SORT_FIELDS[collection], sort_value, doc_id)
+        query = {'$and': [query, after]} if query else after
+    return {
+        'filter': query,
+        'projection': projection(collection, fields, summary),
+        'sort': sort_spec(collection)
+    }
+
+def failure_screenshot_docs(execution_id: str, frames: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{
+        'execution_id': ObjectId(execution_id),
+        'step': frame.get('step'),
+        'action': frame.get('action'),
+        'format': 'jpeg',
+        'data': Binary(frame['data']),
+        'captured_at': frame.get('captured_at'),
+        'created_at': datetime.utcnow()
+    } for frame in frames]
+
+def execution_stats(total: int, successful: int, failed: int) -> Dict[str, Any]:
+    return {
+        "total_executions": total,
+        "successful_executions": successful,
+        "failed_executions": failed,
+        "success_rate": (successful / total * 100) if total > 0 else 0
+    }
 
 class Database:
     def __init__(self):
@@ -11,13 +75,18 @@ class Database:
         self.mongo_uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
         self.db_name = os.getenv('DB_NAME', 'browser_automation')
         
-        self.client = MongoClient(self.mongo_uri)
+        self.client = MongoClient(self.mongo_uri, **client_options())
         self.db = self.client[self.db_name]
         
         # Collections
         self.videos = self.db.videos
         self.executions = self.db.executions
         self.corrections = self.db.corrections
+        self.screenshots = self.db.screenshots
+        self.jobs = self.db.jobs
+        
+        # Write hook for resource update notifications
+        self.changes = ChangeNotifier()
         
         # Create indexes for better performance
         self._create_indexes()
@@ -25,18 +94,8 @@ class Database:
     def _create_indexes(self):
         """Create database indexes"""
         try:
-            # Index on video_url for videos collection
-            self.videos.create_index("video_url")
-            self.videos.create_index("uploaded_at")
-            
-            # Index on video_id for executions collection
-            self.executions.create_index("video_id")
-            self.executions.create_index("created_at")
-            
-            # Index on execution_id for corrections collection
-            self.corrections.create_index("execution_id")
-            self.corrections.create_index("created_at")
-            
+            for collection, keys in INDEXES:
+                self.db[collection].create_index(keys)
         except Exception as e:
             print(f"Index creation warning: {e}")
     
@@ -45,6 +104,7 @@ class Database:
         """Insert a new video document"""
         try:
             result = self.videos.insert_one(video_doc)
+            self.changes.notify('videos', result.inserted_id, 'insert')
             return result.inserted_id
         except Exception as e:
             raise Exception(f"Failed to insert video: {str(e)}")
@@ -52,23 +112,34 @@ class Database:
     def get_video_by_id(self, video_id: str) -> Optional[Dict[str, Any]]:
         """Get video document by ID"""
         try:
-            video = self.videos.find_one({"_id": ObjectId(video_id)})
-            if video:
-                video['_id'] = str(video['_id'])
-            return video
+            return serialize_document(self.videos.find_one({"_id": ObjectId(video_id)}))
         except Exception as e:
             raise Exception(f"Failed to get video: {str(e)}")
     
     def get_all_videos(self) -> List[Dict[str, Any]]:
         """Get all video documents"""
         try:
-            videos = list(self.videos.find().sort("uploaded_at", -1))
-            for video in videos:
-                video['_id'] = str(video['_id'])
-            return videos
+            return serialize_documents(self.videos.find().sort("uploaded_at", -1))
+        except Exception as e:
+            raise Exception(f"Failed to get videos: {str(e)}")
+    
+    def get_videos_page(self, limit: Optional[int] = None, cursor: Optional[str] = None,
+                        fields: Optional[List[str]] = None, summary: bool = False) -> Dict[str, Any]:
+        """Get one newest-first page of videos; pass next_cursor back to continue"""
+        try:
+            return self._page('videos', limit, cursor, fields, summary)
+        except CursorError:
+            raise
         except Exception as e:
             raise Exception(f"Failed to get videos: {str(e)}")
     
+    def count_videos(self) -> int:
+        """Approximate video count from collection metadata (no collection scan)"""
+        try:
+            return self.videos.estimated_document_count()
+        except Exception as e:
+            raise Exception(f"Failed to count videos: {str(e)}")
+    
     def update_video(self, video_id: str, update_doc: Dict[str, Any]) -> bool:
         """Update video document"""
         try:
@@ -76,6 +147,8 @@ class Database:
                 {"_id": ObjectId(video_id)},
                 {"$set": update_doc}
             )
+            if result.modified_count > 0:
+                self.changes.notify('videos', video_id, 'update')
             return result.modified_count > 0
         except Exception as e:
             raise Exception(f"Failed to update video: {str(e)}")
@@ -84,6 +157,8 @@ class Database:
         """Delete video document"""
         try:
             result = self.videos.delete_one({"_id": ObjectId(video_id)})
+            if result.deleted_count > 0:
+                self.changes.notify('videos', video_id, 'delete')
             return result.deleted_count > 0
         except Exception as e:
             raise Exception(f"Failed to delete video: {str(e)}")
@@ -91,10 +166,7 @@ class Database:
     def find_videos_by_url(self, video_url: str) -> List[Dict[str, Any]]:
         """Find videos by URL"""
         try:
-            videos = list(self.videos.find({"video_url": video_url}))
-            for video in videos:
-                video['_id'] = str(video['_id'])
-            return videos
+            return serialize_documents(self.videos.find({"video_url": video_url}))
         except Exception as e:
             raise Exception(f"Failed to find videos: {str(e)}")
     
@@ -103,6 +175,7 @@ class Database:
         """Insert a new execution document"""
         try:
             result = self.executions.insert_one(execution_doc)
+            self.changes.notify('executions', result.inserted_id, 'insert')
             return result.inserted_id
         except Exception as e:
             raise Exception(f"Failed to insert execution: {str(e)}")
@@ -110,35 +183,21 @@ class Database:
     def get_execution_by_id(self, execution_id: str) -> Optional[Dict[str, Any]]:
         """Get execution document by ID"""
         try:
-            execution = self.executions.find_one({"_id": ObjectId(execution_id)})
-            if execution:
-                execution['_id'] = str(execution['_id'])
-                if execution.get('video_id'):
-                    execution['video_id'] = str(execution['video_id'])
-            return execution
+            return serialize_document(self.executions.find_one({"_id": ObjectId(execution_id)}))
         except Exception as e:
             raise Exception(f"Failed to get execution: {str(e)}")
     
     def get_executions_by_video_id(self, video_id: str) -> List[Dict[str, Any]]:
         """Get all executions for a video"""
         try:
-            executions = list(self.executions.find({"video_id": ObjectId(video_id)}).sort("created_at", -1))
-            for execution in executions:
-                execution['_id'] = str(execution['_id'])
-                execution['video_id'] = str(execution['video_id'])
-            return executions
+            return serialize_documents(self.executions.find({"video_id": ObjectId(video_id)}).sort("created_at", -1))
         except Exception as e:
             raise Exception(f"Failed to get executions: {str(e)}")
     
     def get_all_executions(self) -> List[Dict[str, Any]]:
         """Get all execution documents"""
         try:
-            executions = list(self.executions.find().sort("created_at", -1))
-            for execution in executions:
-                execution['_id'] = str(execution['_id'])
-                if execution.get('video_id'):
-                    execution['video_id'] = str(execution['video_id'])
-            return executions
+            return serialize_documents(self.executions.find().sort("created_at", -1))
         except Exception as e:
             raise Exception(f"Failed to get executions: {str(e)}")
     
@@ -149,6 +208,8 @@ class Database:
                 {"_id": ObjectId(execution_id)},
                 {"$set": update_doc}
             )
+            if result.modified_count > 0:
+                self.changes.notify('executions', execution_id, 'update')
             return result.modified_count > 0
         except Exception as e:
             raise Exception(f"Failed to update execution: {str(e)}")
@@ -158,6 +219,7 @@ class Database:
         """Insert a new correction document"""
         try:
             result = self.corrections.insert_one(correction_doc)
+            self.changes.notify('corrections', result.inserted_id, 'insert')
             return result.inserted_id
         except Exception as e:
             raise Exception(f"Failed to insert correction: {str(e)}")
@@ -165,84 +227,124 @@ class Database:
     def get_correction_by_id(self, correction_id: str) -> Optional[Dict[str, Any]]:
         """Get correction document by ID"""
         try:
-            correction = self.corrections.find_one({"_id": ObjectId(correction_id)})
-            if correction:
-                correction['_id'] = str(correction['_id'])
-                if correction.get('execution_id'):
-                    correction['execution_id'] = str(correction['execution_id'])
-            return correction
+            return serialize_document(self.corrections.find_one({"_id": ObjectId(correction_id)}))
         except Exception as e:
             raise Exception(f"Failed to get correction: {str(e)}")
     
     def get_corrections_by_execution_id(self, execution_id: str) -> List[Dict[str, Any]]:
         """Get all corrections for an execution"""
         try:
-            corrections = list(self.corrections.find({"execution_id": ObjectId(execution_id)}).sort("created_at", -1))
-            for correction in corrections:
-                correction['_id'] = str(correction['_id'])
-                correction['execution_id'] = str(correction['execution_id'])
-            return corrections
+            return serialize_documents(self.corrections.find({"execution_id": ObjectId(execution_id)}).sort("created_at", -1))
         except Exception as e:
             raise Exception(f"Failed to get corrections: {str(e)}")
     
     def get_all_corrections(self) -> List[Dict[str, Any]]:
         """Get all correction documents"""
         try:
-            corrections = list(self.corrections.find().sort("created_at", -1))
-            for correction in corrections:
-                correction['_id'] = str(correction['_id'])
-                if correction.get('execution_id'):
-                    correction['execution_id'] = str(correction['execution_id'])
-            return corrections
+            return serialize_documents(self.corrections.find().sort("created_at", -1))
         except Exception as e:
             raise Exception(f"Failed to get corrections: {str(e)}")
     
+    # Failure screenshot operations
+    def insert_failure_screenshots(self, execution_id: str, frames: List[Dict[str, Any]]) -> List[str]:
+        """Store buffered failure screenshots for an execution"""
+        try:
+            if not frames:
+                return []
+            result = self.screenshots.insert_many(failure_screenshot_docs(execution_id, frames))
+            return [str(inserted_id) for inserted_id in result.inserted_ids]
+        except Exception as e:
+            raise Exception(f"Failed to insert failure screenshots: {str(e)}")
+    
+    def get_failure_screenshots(self, execution_id: str, include_data: bool = False) -> List[Dict[str, Any]]:
+        """Get failure screenshots for an execution (image bytes omitted unless requested)"""
+        try:
+            projection = None if include_data else {'data': 0}
+            return serialize_documents(self.screenshots.find(
+                {"execution_id": ObjectId(execution_id)}, projection
+            ).sort("step", 1))
+        except Exception as e:
+            raise Exception(f"Failed to get failure screenshots: {str(e)}")
+    
+    # Job state operations
+    def insert_job(self, job_doc: Dict[str, Any]) -> ObjectId:
+        """Insert a new job document"""
+        try:
+            result = self.jobs.insert_one(job_doc)
+            return result.inserted_id
+        except Exception as e:
+            raise Exception(f"Failed to insert job: {str(e)}")
+    
+    def update_job(self, job_id: str, update_doc: Dict[str, Any]) -> bool:
+        """Update job document by job_id"""
+        try:
+            result = self.jobs.update_one({"job_id": job_id}, {"$set": update_doc})
+            return result.modified_count > 0
+        except Exception as e:
+            raise Exception(f"Failed to update job: {str(e)}")
+    
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get job document by job_id"""
+        try:
+            return serialize_document(self.jobs.find_one({"job_id": job_id}))
+        except Exception as e:
+            raise Exception(f"Failed to get job: {str(e)}")
+    
+    def get_jobs_page(self, limit: Optional[int] = None, cursor: Optional[str] = None,
+                      status: Optional[str] = None, summary: bool = True) -> Dict[str, Any]:
+        """Get one newest-first page of jobs, optionally only those in one status"""
+        try:
+            return self._page('jobs', limit, cursor, None, summary, {"status": status} if status else None)
+        except CursorError:
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to get jobs: {str(e)}")
+    
+    def get_jobs_by_status(self, statuses: List[str]) -> List[Dict[str, Any]]:
+        """Get jobs in any of the given statuses, oldest first"""
+        try:
+            return serialize_documents(self.jobs.find({"status": {"$in": statuses}}).sort("created_at", 1))
+        except Exception as e:
+            raise Exception(f"Failed to get jobs: {str(e)}")
+    
     # Analytics and reporting methods
     def get_execution_stats(self) -> Dict[str, Any]:
         """Get execution statistics"""
         try:
-            total_executions = self.executions.count_documents({})
-            successful_executions = self.executions.count_documents({"status": "completed"})
-            failed_executions = self.executions.count_documents({"status": "failed"})
-            
-            return {
-                "total_executions": total_executions,
-                "successful_executions": successful_executions,
-                "failed_executions": failed_executions,
-                "success_rate": (successful_executions / total_executions * 100) if total_executions > 0 else 0
-            }
+            return execution_stats(
+                self.executions.count_documents({}),
+                self.executions.count_documents({"status": "completed"}),
+                self.executions.count_documents({"status": "failed"})
+            )
         except Exception as e:
             raise Exception(f"Failed to get execution stats: {str(e)}")
     
-    def get_recent_activity(self, limit: int = 10) -> Dict[str, Any]:
-        """Get recent activity across all collections"""
+    def get_recent_activity(self, limit: int = 10, summary: bool = False,
+                            cursors: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Get recent activity across all collections, optionally continuing from next_cursors"""
         try:
-            recent_videos = list(self.videos.find().sort("uploaded_at", -1).limit(limit))
-            recent_executions = list(self.executions.find().sort("created_at", -1).limit(limit))
-            recent_corrections = list(self.corrections.find().sort("created_at", -1).limit(limit))
-            
-            # Convert ObjectIds to strings
-            for video in recent_videos:
-                video['_id'] = str(video['_id'])
-            
-            for execution in recent_executions:
-                execution['_id'] = str(execution['_id'])
-                if execution.get('video_id'):
-                    execution['video_id'] = str(execution['video_id'])
-            
-            for correction in recent_corrections:
-                correction['_id'] = str(correction['_id'])
-                if correction.get('execution_id'):
-                    correction['execution_id'] = str(correction['execution_id'])
-            
+            cursors = cursors or {}
+            pages = {name: self._page(name, limit, cursors.get(name), None, summary)
+                     for name in ('videos', 'executions', 'corrections')}
             return {
-                "recent_videos": recent_videos,
-                "recent_executions": recent_executions,
-                "recent_corrections": recent_corrections
+                "recent_videos": pages['videos']['items'],
+                "recent_executions": pages['executions']['items'],
+                "recent_corrections": pages['corrections']['items'],
+                "next_cursors": {name: page['next_cursor'] for name, page in pages.items()}
             }
+        except CursorError:
+            raise
         except Exception as e:
             raise Exception(f"Failed to get recent activity: {str(e)}")
     
+    def _page(self, collection: str, limit: Optional[int], cursor: Optional[str],
+              fields: Optional[List[str]], summary: bool, match: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        size = page_size(limit)
+        docs = list(self.db[collection].find(**page_query(collection, cursor, fields, summary, match)).limit(size + 1))
+        page = build_page(docs, size, collection)
+        page['items'] = serialize_documents(page['items'])
+        return page
+    
     def cleanup_old_data(self, days: int = 30) -> Dict[str, int]:
         """Clean up data older than specified days"""
         try:
@@ -258,6 +360,11 @@ class Database:
                 {"created_at": {"$lt": cutoff_date}}
             ).deleted_count
             
+            if executions_deleted:
+                self.changes.notify('executions', None, 'delete')
+            if corrections_deleted:
+                self.changes.notify('corrections', None, 'delete')
+            
             # Optionally delete old videos (be careful with this)
             # videos_deleted = self.videos.delete_many(
             #     {"uploaded_at": {"$lt": cutoff_date}}
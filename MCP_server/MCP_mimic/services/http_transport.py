@@ -0,0 +1,92 @@
+# services/http_transport.py - Streamable HTTP Transport for the MCP Server
+"""
+Serves the MCP server over Streamable HTTP so many clients share one
+long-lived process (one database pool, one browser server, warm caches)
+instead of each client spawning a stdio server:
+
+    MCP_TRANSPORT=http MCP_HTTP_PORT=8765 python mcp_server.py
+    # clients connect to http://127.0.0.1:8765/mcp/
+
+Each client gets its own MCP session (Mcp-Session-Id header). Sessions are
+stateful so progress notifications, resource subscriptions and per-client
+call limits follow the client across requests. MCP_HTTP_MAX_CONNECTIONS caps
+concurrent HTTP connections; excess connections get 503 from uvicorn.
+"""
+import contextlib
+import os
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Mount, Route, BaseRoute
+from mcp.server.lowlevel import Server
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+from services.metrics import metrics, PROMETHEUS_CONTENT_TYPE
+
+MCP_PATH = '/mcp'
+
+
+def http_settings() -> Dict[str, Any]:
+    return {
+        'host': os.getenv('MCP_HTTP_HOST', '127.0.0.1'),
+        'port': int(os.getenv('MCP_HTTP_PORT', '8765')),
+        'max_connections': int(os.getenv('MCP_HTTP_MAX_CONNECTIONS', '200')),
+        'json_response': os.getenv('MCP_HTTP_JSON_RESPONSE', '0') == '1'
+    }
+
+
+def metrics_route() -> Route:
+    """GET /metrics in Prometheus text format"""
+    async def render(request: Request) -> Response:
+        return Response(metrics.render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+    return Route('/metrics', render)
+
+
+def create_app(server: Server, routes: Optional[List[BaseRoute]] = None,
+               on_startup: Optional[Callable[[], Awaitable[None]]] = None,
+               status: Optional[Callable[[], Dict[str, Any]]] = None) -> Starlette:
+    """
+    Starlette app with the MCP endpoint at /mcp, a /healthz probe and any extra routes.
+    on_startup runs once the session manager is up (e.g. to warm services).
+    """
+    settings = http_settings()
+    session_manager = StreamableHTTPSessionManager(
+        app=server,
+        json_response=settings['json_response'],
+        stateless=False
+    )
+
+    async def handle_mcp(scope, receive, send):
+        await session_manager.handle_request(scope, receive, send)
+
+    async def healthz(request: Request) -> JSONResponse:
+        return JSONResponse({'status': 'ok', **(status() if status else {})})
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette):
+        async with session_manager.run():
+            if on_startup is not None:
+                await on_startup()
+            print(f"✅ MCP HTTP transport ready at http://{settings['host']}:{settings['port']}{MCP_PATH}/")
+            yield
+        print("👋 MCP HTTP transport stopped")
+
+    return Starlette(
+        routes=[Route('/healthz', healthz), *(routes or []), Mount(MCP_PATH, app=handle_mcp)],
+        lifespan=lifespan
+    )
+
+
+async def serve(app: Starlette) -> None:
+    """Run app under uvicorn until interrupted"""
+    settings = http_settings()
+    config = uvicorn.Config(
+        app,
+        host=settings['host'],
+        port=settings['port'],
+        limit_concurrency=settings['max_connections'],
+        log_level=os.getenv('MCP_HTTP_LOG_LEVEL', 'info')
+    )
+    await uvicorn.Server(config).serve()
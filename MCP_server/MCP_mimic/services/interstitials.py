@@ -0,0 +1,162 @@
+# services/interstitials.py - Consent / Popup Auto-dismiss Registry
+"""
+Known overlays (consent dialogs, cookie banners, sign-in nags) are registered
+once and installed on every page with Playwright locator handlers
+(page.add_locator_handler, Playwright >= 1.44). Whenever an action is blocked
+by a visible trigger, Playwright runs the handler first, so the step proceeds
+instead of timing out behind the overlay.
+
+Register site-specific overlays with:
+
+    interstitial_registry.register('my_banner', '#banner', '#banner .close')
+"""
+import os
+import threading
+from typing import List, Dict, Any, Optional
+
+# 'reject' keeps fresh profiles free of tracking consent; 'accept' matches what a user clicking through would do
+CONSENT_CHOICE = os.getenv('INTERSTITIAL_CONSENT_CHOICE', 'reject')
+DISMISS_TIMEOUT_MS = 3000
+
+
+def _consent_buttons(reject: str, accept: str) -> str:
+    return f"{reject}, {accept}" if CONSENT_CHOICE == 'reject' else f"{accept}, {reject}"
+
+
+DEFAULT_INTERSTITIALS = [
+    {
+        'name': 'google_consent',
+        'trigger': 'button#W0wltc, button#L2AGLb',
+        'dismiss': _consent_buttons('button#W0wltc', 'button#L2AGLb')
+    },
+    {
+        'name': 'youtube_consent',
+        'trigger': 'ytd-consent-bump-v2-lightbox',
+        'dismiss': _consent_buttons(
+            'ytd-consent-bump-v2-lightbox button[aria-label^="Reject" i]',
+            'ytd-consent-bump-v2-lightbox button[aria-label^="Accept" i]'
+        )
+    },
+    {
+        'name': 'google_consent_page',
+        'trigger': 'form[action*="consent.google."] button, form[action*="consent.youtube."] button',
+        'dismiss': _consent_buttons('button[aria-label="Reject all"]', 'button[aria-label="Accept all"]')
+    },
+    {
+        'name': 'onetrust_cookie_banner',
+        'trigger': '#onetrust-banner-sdk',
+        'dismiss': _consent_buttons('#onetrust-reject-all-handler', '#onetrust-accept-btn-handler')
+    },
+    {
+        'name': 'cookiebot_cookie_banner',
+        'trigger': '#CybotCookiebotDialog',
+        'dismiss': _consent_buttons('#CybotCookiebotDialogBodyButtonDecline',
+                                    '#CybotCookiebotDialogBodyLevelButtonLevelOptinAllowAll')
+    },
+    {
+        'name': 'didomi_cookie_banner',
+        'trigger': '#didomi-notice',
+        'dismiss': _consent_buttons('#didomi-notice-disagree-button', '#didomi-notice-agree-button')
+    },
+    {
+        'name': 'youtube_signin_nag',
+        'trigger': 'yt-mealbar-promo-renderer',
+        'dismiss': 'yt-mealbar-promo-renderer #dismiss-button button, yt-mealbar-promo-renderer #dismiss-button'
+    },
+    {
+        'name': 'google_signin_nag',
+        'trigger': 'div[role="dialog"]:has(button:has-text("Stay signed out"))',
+        'dismiss': 'button:has-text("Stay signed out")'
+    }
+]
+
+
+class InterstitialRegistry:
+    """Pluggable set of overlay handlers with per-handler fire counts"""
+
+    def __init__(self, interstitials: Optional[List[Dict[str, Any]]] = None):
+        self._interstitials: Dict[str, Dict[str, Any]] = {}
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        for interstitial in interstitials or []:
+            self.register(**interstitial)
+
+    def register(self, name: str, trigger: str, dismiss: str) -> None:
+        """Add or replace a handler: when `trigger` is visible, click the first visible `dismiss` match"""
+        with self._lock:
+            self._interstitials[name] = {'name': name, 'trigger': trigger, 'dismiss': dismiss}
+            self._counts.setdefault(name, {'fired': 0, 'dismissed': 0, 'failed': 0})
+
+    def unregister(self, name: str) -> bool:
+        with self._lock:
+            return self._interstitials.pop(name, None) is not None
+
+    def _record(self, name: str, outcome: str) -> None:
+        with self._lock:
+            counts = self._counts[name]
+            counts['fired'] += 1
+            counts[outcome] += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {name: dict(counts) for name, counts in self._counts.items()}
+
+    def _list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._interstitials.values())
+
+    def _handler(self, page, interstitial: Dict[str, Any], log: Optional[List[str]]):
+        # Zero-argument callable: Playwright passes the locator to handlers that take one
+        def handler():
+            name = interstitial['name']
+            try:
+                page.locator(interstitial['dismiss']).locator('visible=true').first.click(timeout=DISMISS_TIMEOUT_MS)
+                self._record(name, 'dismissed')
+                if log is not None:
+                    log.append(f"🧹 Dismissed interstitial: {name}")
+            except Exception as e:
+                self._record(name, 'failed')
+                print(f"⚠️ Could not dismiss interstitial {name}: {str(e)}")
+        return handler
+
+    def _handler_async(self, page, interstitial: Dict[str, Any], log: Optional[List[str]]):
+        async def handler():
+            name = interstitial['name']
+            try:
+                await page.locator(interstitial['dismiss']).locator('visible=true').first.click(timeout=DISMISS_TIMEOUT_MS)
+                self._record(name, 'dismissed')
+                if log is not None:
+                    log.append(f"🧹 Dismissed interstitial: {name}")
+            except Exception as e:
+                self._record(name, 'failed')
+                print(f"⚠️ Could not dismiss interstitial {name}: {str(e)}")
+        return handler
+
+    def install(self, page, log: Optional[List[str]] = None) -> int:
+        """Attach every registered handler to a sync Playwright page; returns how many were installed"""
+        installed = 0
+        for interstitial in self._list():
+            handler = self._handler(page, interstitial, log)
+            try:
+                page.add_locator_handler(page.locator(interstitial['trigger']).first, handler, no_wait_after=True)
+                installed += 1
+            except Exception as e:
+                print(f"⚠️ Interstitial handlers unavailable ({str(e)}); upgrade to playwright>=1.44")
+                break
+        return installed
+
+    async def install_async(self, page, log: Optional[List[str]] = None) -> int:
+        """Async counterpart of install()"""
+        installed = 0
+        for interstitial in self._list():
+            handler = self._handler_async(page, interstitial, log)
+            try:
+                await page.add_locator_handler(page.locator(interstitial['trigger']).first, handler, no_wait_after=True)
+                installed += 1
+            except Exception as e:
+                print(f"⚠️ Interstitial handlers unavailable ({str(e)}); upgrade to playwright>=1.44")
+                break
+        return installed
+
+
+interstitial_registry = InterstitialRegistry(DEFAULT_INTERSTITIALS)
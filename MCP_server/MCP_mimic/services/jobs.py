@@ -0,0 +1,209 @@
+# services/jobs.py - Background Job Queue for Long-Running Tools
+"""
+Lets MCP clients submit a long tool call (run_task_from_video,
+execute_browser_action, ...) and come back for the result instead of holding
+the call open:
+
+    job = await job_queue.submit('run_task_from_video', {'video_url': url})
+    ...
+    await job_queue.get(job['job_id'])      # status, progress, result
+
+Submitted jobs wait in an in-process queue drained by JOB_WORKERS asyncio
+workers; per-tool concurrency limits still apply inside the runner. Job state
+(queued -> running -> completed/failed/cancelled, progress, result) is written
+to the jobs collection, so jobs can be read back after the server restarts.
+On the first use after a restart, jobs left queued are queued again and jobs
+left running are marked failed (set JOB_RECOVERY=0 when several server
+processes share one database).
+"""
+import asyncio
+import os
+import uuid
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+from services.progress import ProgressReporter
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+JOB_STATUSES = [JOB_QUEUED, JOB_RUNNING, JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED]
+
+JobRunner = Callable[[str, Dict[str, Any], ProgressReporter], Awaitable[Dict[str, Any]]]
+
+
+class JobQueueFull(Exception):
+    """Raised when JOB_QUEUE_SIZE jobs are already waiting"""
+
+
+class JobQueue:
+    """
+    Asyncio job queue. runner(tool, arguments, progress) runs one job and returns
+    its result dict (a result with an 'error' marks the job failed); store
+    persists job documents (insert_job, update_job, get_job, get_jobs_by_status).
+    """
+
+    def __init__(self, runner: JobRunner, store: Any, workers: Optional[int] = None,
+                 max_queued: Optional[int] = None, progress_interval: Optional[float] = None):
+        self.runner = runner
+        self.store = store
+        self.workers = workers or int(os.getenv('JOB_WORKERS', '4'))
+        self.max_queued = max_queued or int(os.getenv('JOB_QUEUE_SIZE', '100'))
+        self.progress_interval = (progress_interval if progress_interval is not None
+                                  else float(os.getenv('JOB_PROGRESS_INTERVAL_SECONDS', '2')))
+        self.recover = os.getenv('JOB_RECOVERY', '1') != '0'
+        self._queue: Optional[asyncio.Queue] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._pending: Dict[str, tuple] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._cancel_reasons: Dict[str, str] = {}
+        self._counts = {'submitted': 0, JOB_COMPLETED: 0, JOB_FAILED: 0, JOB_CANCELLED: 0}
+
+    async def start(self) -> None:
+        """Start the workers (and recover persisted jobs) on first use; later calls do nothing"""
+        if self._worker_tasks:
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._worker_tasks:
+                return
+            self._queue = asyncio.Queue()
+            if self.recover:
+                await self._recover()
+            self._worker_tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+            print(f"🧵 Job queue started with {self.workers} workers")
+
+    async def _recover(self) -> None:
+        try:
+            leftovers = await self.store.get_jobs_by_status([JOB_QUEUED, JOB_RUNNING])
+        except Exception as e:
+            print(f"⚠️ Could not recover jobs: {e}")
+            return
+        for job in leftovers:
+            if job['status'] == JOB_RUNNING:
+                await self.store.update_job(job['job_id'], {
+                    'status': JOB_FAILED,
+                    'error': 'Server restarted while the job was running',
+                    'finished_at': datetime.utcnow()
+                })
+            else:
+                self._enqueue(job['job_id'], job['tool'], job.get('arguments') or {})
+        if leftovers:
+            print(f"♻️ Recovered {len(leftovers)} unfinished jobs")
+
+    def _enqueue(self, job_id: str, tool: str, arguments: Dict[str, Any]) -> None:
+        self._pending[job_id] = (tool, arguments)
+        self._queue.put_nowait(job_id)
+
+    async def submit(self, tool: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Persist and queue a job; returns its queued document without waiting for it to run"""
+        await self.start()
+        if len(self._pending) >= self.max_queued:
+            raise JobQueueFull(f"Job queue is full ({self.max_queued} jobs waiting)")
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'tool': tool,
+            'arguments': arguments,
+            'status': JOB_QUEUED,
+            'progress': None,
+            'result': None,
+            'error': None,
+            'created_at': datetime.utcnow(),
+            'started_at': None,
+            'finished_at': None
+        }
+        await self.store.insert_job(dict(job))
+        self._enqueue(job['job_id'], tool, arguments)
+        self._counts['submitted'] += 1
+        return {**job, 'queue_position': len(self._pending)}
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        await self.start()
+        return await self.store.get_job(job_id)
+
+    async def cancel(self, job_id: str, reason: str = 'cancelled by request') -> Dict[str, Any]:
+        """Cancel a queued or running job; finished and unknown jobs are left alone"""
+        await self.start()
+        if job_id in self._running:
+            self._cancel_reasons[job_id] = reason
+            self._running[job_id].cancel()
+            return {'job_id': job_id, 'cancelled': True, 'status': JOB_CANCELLED}
+        if job_id in self._pending:
+            # The worker skips it when it comes up in the queue
+            del self._pending[job_id]
+            await self._finish(job_id, JOB_CANCELLED, error=f"Job cancelled: {reason}")
+            return {'job_id': job_id, 'cancelled': True, 'status': JOB_CANCELLED}
+        job = await self.store.get_job(job_id)
+        if job is None:
+            return {'job_id': job_id, 'cancelled': False, 'error': f"Job {job_id} not found"}
+        return {'job_id': job_id, 'cancelled': False, 'status': job['status'],
+                'error': f"Job {job_id} is already {job['status']}"}
+
+    async def _work(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                queued = self._pending.pop(job_id, None)
+                if queued is not None:
+                    await self._run(job_id, *queued)
+            except Exception as e:
+                print(f"❌ Job worker error on {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str, tool: str, arguments: Dict[str, Any]) -> None:
+        progress = ProgressReporter(lambda done, total, message: self._record_progress(job_id, done, total, message),
+                                    min_interval=self.progress_interval)
+        task = asyncio.ensure_future(self.runner(tool, arguments, progress))
+        self._running[job_id] = task
+        print(f"🧵 Job {job_id} started: {tool}")
+        try:
+            await self.store.update_job(job_id, {'status': JOB_RUNNING, 'started_at': datetime.utcnow()})
+            result = await task
+        except asyncio.CancelledError:
+            if job_id not in self._cancel_reasons:
+                # The worker itself is being shut down
+                task.cancel()
+                raise
+            await self._finish(job_id, JOB_CANCELLED, error=f"Job cancelled: {self._cancel_reasons.pop(job_id)}")
+            return
+        except Exception as e:
+            await self._finish(job_id, JOB_FAILED, error=str(e))
+            return
+        finally:
+            self._running.pop(job_id, None)
+            await progress.close()
+        status = JOB_FAILED if result.get('error') else JOB_COMPLETED
+        await self._finish(job_id, status, result=result, error=result.get('error'))
+
+    async def _finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None,
+                      error: Optional[str] = None) -> None:
+        self._counts[status] += 1
+        print(f"{'✅' if status == JOB_COMPLETED else '⚠️'} Job {job_id} {status}")
+        await self.store.update_job(job_id, {
+            'status': status,
+            'result': result,
+            'error': error,
+            'finished_at': datetime.utcnow()
+        })
+
+    async def _record_progress(self, job_id: str, done: float, total: Optional[float], message: Optional[str]) -> None:
+        await self.store.update_job(job_id, {'progress': {'progress': done, 'total': total, 'message': message}})
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'workers': self.workers,
+            'queued': len(self._pending),
+            'running': len(self._running),
+            'max_queued': self.max_queued,
+            **self._counts
+        }
+
+    async def shutdown(self) -> None:
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
@@ -0,0 +1,64 @@
+# services/lazy.py - Lazily Constructed Services
+"""
+Services whose construction is expensive (Gemini SDK import and configuration,
+Playwright imports, Mongo client setup) are wrapped in LazyService so importing
+a module that owns them costs nothing until a tool actually uses them:
+
+    def _create_analyzer():
+        from services.vision import VideoAnalyzer
+        return VideoAnalyzer()
+
+    video_analyzer = LazyService('video_analyzer', _create_analyzer)
+    video_analyzer.analyze_video(url)   # constructed here, on first use
+
+Construction happens once, under a lock, in whichever thread first needs it.
+A failed construction is not cached, so the next call tries again.
+"""
+import threading
+import time
+from typing import Dict, Any, Optional, Callable
+
+
+class LazyService:
+    """Proxy that builds its service on first attribute access"""
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self.name = name
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+        self._init_ms: Optional[float] = None
+        self._last_error: Optional[str] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    def get(self) -> Any:
+        """The service instance, constructing it if this is the first use"""
+        if self._instance is not None:
+            return self._instance
+        with self._lock:
+            if self._instance is None:
+                started = time.perf_counter()
+                try:
+                    instance = self._factory()
+                except Exception as e:
+                    self._last_error = str(e)
+                    print(f"❌ Error initializing {self.name}: {e}")
+                    raise
+                self._init_ms = round((time.perf_counter() - started) * 1000, 1)
+                self._last_error = None
+                self._instance = instance
+                print(f"✅ {self.name} initialized in {self._init_ms} ms")
+        return self._instance
+
+    def __getattr__(self, attr: str) -> Any:
+        # Only called for attributes the proxy itself does not define; private
+        # names are never forwarded so a half-built proxy cannot recurse
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(self.get(), attr)
+
+    def status(self) -> Dict[str, Any]:
+        return {'loaded': self.loaded, 'init_ms': self._init_ms, 'last_error': self._last_error}
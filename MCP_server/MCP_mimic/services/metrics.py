@@ -0,0 +1,253 @@
+# services/metrics.py - In-Process Latency, Error and In-Flight Metrics
+"""
+One registry per process records, for every series, call and error counts, a
+latency histogram and an in-flight gauge. A series is a (kind, name) pair:
+
+    tool        MCP tool calls                  ('tool', 'get_task')
+    endpoint    Flask routes                    ('endpoint', 'POST /execute_browser_action')
+    dependency  Mongo, Gemini and Playwright    ('dependency', 'mongo:find')
+
+    with metrics.track('dependency', 'gemini:generate_content') as call:
+        response = model.generate_content(prompt)
+        if not response.text:
+            call.failed()
+
+Recording a call costs two perf_counter() reads and one short lock hold. The
+registry is read through snapshot() (the get_server_metrics tool) or
+render_prometheus() (the /metrics endpoints). Set METRICS_ENABLED=0 to turn
+recording off.
+"""
+import bisect
+import contextlib
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple
+
+METRIC_KINDS = ('tool', 'endpoint', 'dependency')
+
+# Seconds; tools range from millisecond reads to multi-minute browser runs
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _Series:
+    __slots__ = ('count', 'errors', 'in_flight', 'total_seconds', 'max_seconds', 'buckets')
+
+    def __init__(self, bucket_count: int):
+        self.count = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        # One slot per bucket plus +Inf; cumulated only when read
+        self.buckets = [0] * (bucket_count + 1)
+
+
+class _Call:
+    """Handle yielded by Metrics.track(); call failed() to count the call as an error"""
+    __slots__ = ('error',)
+
+    def __init__(self):
+        self.error = False
+
+    def failed(self) -> None:
+        self.error = True
+
+
+class Metrics:
+    """Thread-safe registry of per-series counters, latency histograms and in-flight gauges"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS, enabled: Optional[bool] = None):
+        self.buckets = tuple(buckets)
+        self.enabled = enabled if enabled is not None else os.getenv('METRICS_ENABLED', '1') != '0'
+        self.started_at = time.time()
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind: str, name: str) -> _Series:
+        series = self._series.get((kind, name))
+        if series is None:
+            series = self._series[(kind, name)] = _Series(len(self.buckets))
+        return series
+
+    def begin(self, kind: str, name: str) -> None:
+        """Mark a call in flight; pair with end()"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._get(kind, name).in_flight += 1
+
+    def end(self, kind: str, name: str, seconds: float, error: bool = False) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            series = self._get(kind, name)
+            series.in_flight = max(0, series.in_flight - 1)
+            self._record(series, seconds, error)
+
+    def observe(self, kind: str, name: str, seconds: float, error: bool = False) -> None:
+        """Record a finished call that was not tracked while in flight"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._record(self._get(kind, name), seconds, error)
+
+    def _record(self, series: _Series, seconds: float, error: bool) -> None:
+        series.count += 1
+        series.errors += 1 if error else 0
+        series.total_seconds += seconds
+        series.max_seconds = max(series.max_seconds, seconds)
+        series.buckets[bisect.bisect_left(self.buckets, seconds)] += 1
+
+    @contextlib.contextmanager
+    def track(self, kind: str, name: str):
+        """Time the block as one call; exceptions count as errors"""
+        call = _Call()
+        if not self.enabled:
+            yield call
+            return
+        self.begin(kind, name)
+        started = time.perf_counter()
+        try:
+            yield call
+        except BaseException:
+            call.error = True
+            raise
+        finally:
+            self.end(kind, name, time.perf_counter() - started, call.error)
+
+    def _quantile(self, series: _Series, q: float) -> Optional[float]:
+        """Estimate from the histogram by linear interpolation inside the bucket"""
+        if series.count == 0:
+            return None
+        rank = q * series.count
+        seen = 0
+        for index, in_bucket in enumerate(series.buckets):
+            if in_bucket and seen + in_bucket >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else series.max_seconds
+                estimate = lower + (upper - lower) * (rank - seen) / in_bucket
+                return round(min(estimate, series.max_seconds), 4)
+            seen += in_bucket
+        return round(series.max_seconds, 4)
+
+    def snapshot(self, kind: Optional[str] = None) -> Dict[str, Any]:
+        """Per-series counts, error rate, in-flight and latency summary, grouped by kind"""
+        with self._lock:
+            items = [(key, series) for key, series in sorted(self._series.items()) if kind in (None, key[0])]
+            grouped: Dict[str, Dict[str, Any]] = {}
+            for (series_kind, name), series in items:
+                grouped.setdefault(series_kind, {})[name] = {
+                    'count': series.count,
+                    'errors': series.errors,
+                    'error_rate': round(series.errors / series.count, 4) if series.count else 0.0,
+                    'in_flight': series.in_flight,
+                    'mean_ms': round(series.total_seconds / series.count * 1000, 1) if series.count else None,
+                    'p50_ms': self._ms(self._quantile(series, 0.5)),
+                    'p95_ms': self._ms(self._quantile(series, 0.95)),
+                    'p99_ms': self._ms(self._quantile(series, 0.99)),
+                    'max_ms': round(series.max_seconds * 1000, 1)
+                }
+        return {
+            'enabled': self.enabled,
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            **{series_kind: grouped.get(series_kind, {}) for series_kind in METRIC_KINDS if kind in (None, series_kind)}
+        }
+
+    @staticmethod
+    def _ms(seconds: Optional[float]) -> Optional[float]:
+        return round(seconds * 1000, 1) if seconds is not None else None
+
+    def render_prometheus(self, prefix: str = 'mimic') -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            items = [(key, series.count, series.errors, series.in_flight, series.total_seconds, list(series.buckets))
+                     for key, series in sorted(self._series.items())]
+        lines = [
+            f"# HELP {prefix}_uptime_seconds Seconds since the metrics registry was created.",
+            f"# TYPE {prefix}_uptime_seconds gauge",
+            f"{prefix}_uptime_seconds {time.time() - self.started_at:.3f}",
+            f"# HELP {prefix}_calls_total Finished calls per tool, endpoint or dependency.",
+            f"# TYPE {prefix}_calls_total counter"
+        ]
+        lines += [f"{prefix}_calls_total{_labels(kind, name)} {count}" for (kind, name), count, *_ in items]
+        lines += [f"# HELP {prefix}_call_errors_total Failed calls per tool, endpoint or dependency.",
+                  f"# TYPE {prefix}_call_errors_total counter"]
+        lines += [f"{prefix}_call_errors_total{_labels(kind, name)} {errors}" for (kind, name), _, errors, *_ in items]
+        lines += [f"# HELP {prefix}_calls_in_flight Calls currently running.",
+                  f"# TYPE {prefix}_calls_in_flight gauge"]
+        lines += [f"{prefix}_calls_in_flight{_labels(kind, name)} {in_flight}"
+                  for (kind, name), _, _, in_flight, *_ in items]
+        lines += [f"# HELP {prefix}_call_duration_seconds Call latency.",
+                  f"# TYPE {prefix}_call_duration_seconds histogram"]
+        for (kind, name), count, _, _, total, buckets in items:
+            cumulative = 0
+            for bound, in_bucket in zip(self.buckets + (float('inf'),), buckets):
+                cumulative += in_bucket
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{prefix}_call_duration_seconds_bucket{_labels(kind, name, le=le)} {cumulative}")
+            lines.append(f"{prefix}_call_duration_seconds_sum{_labels(kind, name)} {total:.6f}")
+            lines.append(f"{prefix}_call_duration_seconds_count{_labels(kind, name)} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+        self.started_at = time.time()
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(kind: str, name: str, **extra: str) -> str:
+    labels = {'kind': kind, 'name': name, **extra}
+    return '{' + ','.join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + '}'
+
+
+def mongo_command_listener():
+    """pymongo CommandListener recording every Mongo command as a 'mongo:<command>' dependency call"""
+    from pymongo import monitoring
+
+    class MongoCommandMetrics(monitoring.CommandListener):
+        def started(self, event):
+            metrics.begin('dependency', f"mongo:{event.command_name}")
+
+        def succeeded(self, event):
+            metrics.end('dependency', f"mongo:{event.command_name}", event.duration_micros / 1e6)
+
+        def failed(self, event):
+            metrics.end('dependency', f"mongo:{event.command_name}", event.duration_micros / 1e6, error=True)
+
+    return MongoCommandMetrics()
+
+
+def start_metrics_server(port: int, host: str = '0.0.0.0') -> ThreadingHTTPServer:
+    """Serve GET /metrics from a daemon thread (for processes without their own HTTP server)"""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', PROMETHEUS_CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=httpd.serve_forever, name='metrics-http', daemon=True).start()
+    print(f"📈 Metrics available at http://{host}:{port}/metrics")
+    return httpd
+
+
+# Shared registry for the process
+metrics = Metrics()
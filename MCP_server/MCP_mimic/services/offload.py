@@ -0,0 +1,205 @@
+# services/offload.py - Bounded Executor for Blocking Tool Work
+"""
+MCP tool handlers run on one asyncio loop, but pymongo and Gemini calls are
+blocking. ToolExecutor moves those calls onto a bounded thread pool and caps
+how many calls of each tool run at once, so one slow query or model call only
+holds back calls of the same tool:
+
+    async with tool_executor.tool_slot(name):
+        video = await tool_executor.call(db.get_video_by_id, task_id)
+
+Per-tool limits come from TOOL_CONCURRENCY_LIMITS ("analyze_video=2,get_tasks=8")
+on top of DEFAULT_TOOL_LIMITS; other tools get TOOL_CONCURRENCY_DEFAULT.
+
+When one server process is shared by many clients (HTTP transport),
+ClientLimiter additionally caps how many calls each client session runs and
+queues at once.
+"""
+import asyncio
+import contextlib
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Callable
+from services.config import parse_tool_limits
+
+# Model calls and browser runs are heavy; reads are cheap and may run wider
+DEFAULT_TOOL_LIMITS = {
+    'analyze_video': 2,
+    'run_task_from_video': 2,
+    'execute_browser_action': 4,
+    'resume_execution': 2,
+    'fallback_llm': 4
+}
+
+
+class _ToolStats:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.waiting = 0
+        self.running = 0
+        self.max_waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            'limit': self.limit,
+            'waiting': self.waiting,
+            'running': self.running,
+            'max_waiting': self.max_waiting,
+            'completed': self.completed,
+            'failed': self.failed,
+            'avg_wait_ms': round(self.wait_seconds / finished * 1000, 1) if finished else 0,
+            'avg_run_ms': round(self.run_seconds / finished * 1000, 1) if finished else 0
+        }
+
+
+class ToolExecutor:
+    """Per-tool concurrency limits plus a shared, bounded thread pool for blocking calls"""
+
+    def __init__(self, max_workers: Optional[int] = None, default_limit: Optional[int] = None,
+                 tool_limits: Optional[Dict[str, int]] = None):
+        self.max_workers = max_workers or int(os.getenv('BLOCKING_EXECUTOR_WORKERS', '16'))
+        self.default_limit = default_limit or int(os.getenv('TOOL_CONCURRENCY_DEFAULT', '8'))
+        self.tool_limits = {**DEFAULT_TOOL_LIMITS, **parse_tool_limits(os.getenv('TOOL_CONCURRENCY_LIMITS')),
+                            **(tool_limits or {})}
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='tool-blocking')
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._stats: Dict[str, _ToolStats] = {}
+        self._lock = threading.Lock()
+        self._calls_queued = 0
+        self._calls_running = 0
+
+    def _tool(self, name: str):
+        if name not in self._semaphores:
+            limit = self.tool_limits.get(name, self.default_limit)
+            self._semaphores[name] = asyncio.Semaphore(limit)
+            self._stats[name] = _ToolStats(limit)
+        return self._semaphores[name], self._stats[name]
+
+    @contextlib.asynccontextmanager
+    async def tool_slot(self, name: str):
+        """Hold one of the tool's concurrency slots for the duration of a tool call"""
+        semaphore, stats = self._tool(name)
+        stats.waiting += 1
+        stats.max_waiting = max(stats.max_waiting, stats.waiting)
+        queued_at = time.perf_counter()
+        try:
+            await semaphore.acquire()
+        finally:
+            stats.waiting -= 1
+        started = time.perf_counter()
+        stats.wait_seconds += started - queued_at
+        stats.running += 1
+        try:
+            yield
+            stats.completed += 1
+        except BaseException:
+            stats.failed += 1
+            raise
+        finally:
+            stats.running -= 1
+            stats.run_seconds += time.perf_counter() - started
+            semaphore.release()
+
+    def _track(self, fn: Callable, *args, **kwargs):
+        with self._lock:
+            self._calls_queued -= 1
+            self._calls_running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._calls_running -= 1
+
+    async def call(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking function on the bounded pool without blocking the event loop"""
+        with self._lock:
+            self._calls_queued += 1
+        future = self._executor.submit(self._track, fn, *args, **kwargs)
+        try:
+            return await asyncio.wrap_future(future)
+        finally:
+            # A call cancelled before a thread picked it up never reaches _track
+            if future.cancelled():
+                with self._lock:
+                    self._calls_queued -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            queued, running = self._calls_queued, self._calls_running
+        return {
+            'max_workers': self.max_workers,
+            'calls_running': running,
+            'calls_queued': queued,
+            'tools': {name: stats.as_dict() for name, stats in self._stats.items()}
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+class ClientBusy(Exception):
+    """Raised when a client already has MCP_CLIENT_MAX_QUEUED calls waiting"""
+
+
+class _ClientState:
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.waiting = 0
+        self.running = 0
+
+
+class ClientLimiter:
+    """
+    Per-client concurrency limit for a shared server. Clients are keyed by their
+    session object and held weakly, so state goes away with the session.
+    """
+
+    def __init__(self, max_concurrent: Optional[int] = None, max_queued: Optional[int] = None):
+        self.max_concurrent = max_concurrent or int(os.getenv('MCP_CLIENT_MAX_CONCURRENT', '8'))
+        self.max_queued = max_queued or int(os.getenv('MCP_CLIENT_MAX_QUEUED', '32'))
+        self._clients: 'weakref.WeakKeyDictionary[Any, _ClientState]' = weakref.WeakKeyDictionary()
+        self.rejected = 0
+
+    @contextlib.asynccontextmanager
+    async def client_slot(self, client: Any):
+        """Hold one of the client's call slots; calls outside a session (client None) are not limited"""
+        if client is None:
+            yield
+            return
+        state = self._clients.get(client)
+        if state is None:
+            state = self._clients[client] = _ClientState(self.max_concurrent)
+        if state.semaphore.locked() and state.waiting >= self.max_queued:
+            self.rejected += 1
+            raise ClientBusy(f"Too many calls in progress for this client "
+                             f"({self.max_concurrent} running, {state.waiting} waiting)")
+        state.waiting += 1
+        try:
+            await state.semaphore.acquire()
+        finally:
+            state.waiting -= 1
+        state.running += 1
+        try:
+            yield
+        finally:
+            state.running -= 1
+            state.semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        states = list(self._clients.values())
+        return {
+            'clients': len(states),
+            'max_concurrent': self.max_concurrent,
+            'max_queued': self.max_queued,
+            'running': sum(state.running for state in states),
+            'waiting': sum(state.waiting for state in states),
+            'rejected': self.rejected
+        }
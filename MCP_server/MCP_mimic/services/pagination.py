@@ -0,0 +1,137 @@
+# services/pagination.py - Keyset Pagination and Projections for Listing Queries
+"""
+Listing queries page by (sort field, _id) instead of skip/limit, so every page
+is one bounded range scan on the compound index no matter how deep a client
+has paged:
+
+    {"$or": [{"uploaded_at": {"$lt": t}}, {"uploaded_at": t, "_id": {"$lt": id}}]}
+
+Cursors are opaque tokens carrying the last returned document's sort value and
+_id. Summary projections leave out the per-document arrays (steps, logs, step
+results, screenshots) that make full documents grow with every run.
+"""
+import base64
+import json
+import os
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+from bson import ObjectId
+
+# Newest-first listing order per collection; _id breaks ties
+SORT_FIELDS = {
+    'videos': 'uploaded_at',
+    'executions': 'created_at',
+    'corrections': 'created_at',
+    'jobs': 'created_at'
+}
+
+SUMMARY_PROJECTIONS = {
+    'videos': {
+        'video_url': 1,
+        'uploaded_at': 1,
+        'step_count': {'$size': {'$ifNull': ['$steps', []]}}
+    },
+    'executions': {
+        'video_id': 1,
+        'status': 1,
+        'error': 1,
+        'total_steps': 1,
+        'failed_step': 1,
+        'run_id': 1,
+        'checkpoint_id': 1,
+        'created_at': 1,
+        'resumed_at': 1
+    },
+    'corrections': {
+        'execution_id': 1,
+        'error': 1,
+        'created_at': 1
+    },
+    'jobs': {
+        'job_id': 1,
+        'tool': 1,
+        'status': 1,
+        'error': 1,
+        'progress': 1,
+        'created_at': 1,
+        'started_at': 1,
+        'finished_at': 1
+    }
+}
+
+DEFAULT_PAGE_SIZE = int(os.getenv('LIST_PAGE_SIZE', '50'))
+MAX_PAGE_SIZE = int(os.getenv('LIST_MAX_PAGE_SIZE', '200'))
+
+
+class CursorError(ValueError):
+    """Raised for cursors that were not produced by encode_cursor"""
+
+
+def page_size(limit: Optional[int]) -> int:
+    if not limit:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+def encode_cursor(sort_value: Any, doc_id: Any) -> str:
+    if isinstance(sort_value, datetime):
+        value = {'dt': sort_value.isoformat()}
+    else:
+        value = {'v': sort_value}
+    payload = json.dumps({**value, 'id': str(doc_id)}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, ObjectId]:
+    """(sort value, _id) of the document a page ended at"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        sort_value = datetime.fromisoformat(payload['dt']) if 'dt' in payload else payload['v']
+        doc_id = payload['id']
+    except (ValueError, TypeError, KeyError) as e:
+        raise CursorError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(doc_id, str) or not ObjectId.is_valid(doc_id):
+        raise CursorError(f"Invalid cursor: {cursor}")
+    return sort_value, ObjectId(doc_id)
+
+
+def keyset_filter(sort_field: str, sort_value: Any, doc_id: Any) -> Dict[str, Any]:
+    """Documents after (sort_value, doc_id) in descending (sort_field, _id) order"""
+    if sort_value is None:
+        # Documents without a sort value come last in descending order
+        return {sort_field: None, '_id': {'$lt': doc_id}}
+    return {'$or': [
+        {sort_field: {'$lt': sort_value}},
+        {sort_field: sort_value, '_id': {'$lt': doc_id}},
+        {sort_field: None}
+    ]}
+
+
+def sort_spec(collection: str) -> List[Tuple[str, int]]:
+    return [(SORT_FIELDS[collection], -1), ('_id', -1)]
+
+
+def projection(collection: str, fields: Optional[List[str]] = None,
+               summary: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Fields to return: an explicit field list wins over summary mode; None means
+    whole documents. The sort field is always kept so the page can be continued.
+    """
+    if fields:
+        selected = {field: 1 for field in fields if field and not field.startswith('$')}
+        selected[SORT_FIELDS[collection]] = 1
+        return selected
+    if summary:
+        return dict(SUMMARY_PROJECTIONS[collection])
+    return None
+
+
+def build_page(docs: List[Dict[str, Any]], limit: int, collection: str) -> Dict[str, Any]:
+    """Trim a limit + 1 fetch to one page and derive the cursor for the next one"""
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    next_cursor = None
+    if has_more:
+        last = docs[-1]
+        next_cursor = encode_cursor(last.get(SORT_FIELDS[collection]), last['_id'])
+    return {'items': docs, 'next_cursor': next_cursor, 'has_more': has_more}
@@ -0,0 +1,143 @@
+# services/progress.py - Throttled MCP Progress Reporting
+"""
+Progress notifications for long-running tool calls. A tool handler creates one
+ProgressReporter per call from the client's progress token and advances it as
+stages finish:
+
+    progress = ProgressReporter(send)
+    progress.advance("Video uploaded", force=True)
+    ...
+    await progress.close()
+
+advance() may be called from worker threads (Gemini calls, sync browser runs);
+notifications are always sent from the event loop, in order and with strictly
+increasing progress. Reports closer together than PROGRESS_MIN_INTERVAL_SECONDS
+are coalesced into the latest one, which is sent once the interval has passed.
+A reporter without a send function does nothing, so handlers never check for a token.
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Any, Optional, Callable, Awaitable, Tuple
+
+ProgressSender = Callable[[float, Optional[float], Optional[str]], Awaitable[None]]
+
+
+class ProgressReporter:
+    """Counts progress units for one tool call and sends throttled notifications"""
+
+    def __init__(self, send: Optional[ProgressSender] = None, loop: Optional[asyncio.AbstractEventLoop] = None,
+                 min_interval: Optional[float] = None):
+        self._send = send
+        self.min_interval = (min_interval if min_interval is not None
+                             else float(os.getenv('PROGRESS_MIN_INTERVAL_SECONDS', '0.5')))
+        self.progress = 0.0
+        self.total: Optional[float] = None
+        self.sent = 0
+        self._loop = loop or (asyncio.get_running_loop() if send else None)
+        self._lock = threading.Lock()
+        self._send_lock: Optional[asyncio.Lock] = None
+        self._last_sent_at = 0.0
+        self._sent_progress = 0.0
+        self._pending: Optional[Tuple[float, Optional[float], Optional[str]]] = None
+        self._flush_scheduled = False
+        self._tasks = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self._send is not None
+
+    def set_total(self, total: float) -> None:
+        """Set the number of units the call will take once it is known"""
+        with self._lock:
+            self.total = max(total, self.progress)
+
+    def advance(self, message: Optional[str] = None, amount: float = 1, force: bool = False) -> None:
+        """
+        Add amount units of progress and report it. force sends at once (stage
+        changes); otherwise the report may be coalesced with later ones.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.progress += amount
+            if self.total is not None and self.progress > self.total:
+                self.total = self.progress
+            report = (self.progress, self.total, message)
+            now = time.monotonic()
+            wait = self._last_sent_at + self.min_interval - now
+            if force or wait <= 0:
+                self._last_sent_at = now
+                self._pending = None
+            else:
+                self._pending = report
+                if self._flush_scheduled:
+                    return
+                self._flush_scheduled = True
+                report = None
+        if report is not None:
+            self._on_loop(self._dispatch, report)
+        else:
+            self._on_loop(self._loop.call_later, wait, self._flush_pending)
+
+    def on_step(self, outcome: Dict[str, Any]) -> None:
+        """BrowserAutomator on_step listener: one unit per executed step, failures sent at once"""
+        self.advance(f"Step {outcome['step'] + 1} ({outcome.get('action')}): {outcome['status']}",
+                     force=outcome['status'] != 'ok')
+
+    def finish(self, message: Optional[str] = None) -> None:
+        """Jump to the total (steps a failed run skipped included) with a final report"""
+        with self._lock:
+            remaining = (self.total - self.progress) if self.total is not None else 0
+        self.advance(message, amount=max(remaining, 1), force=True)
+
+    def _on_loop(self, fn: Callable, *args) -> None:
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            fn(*args)
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(fn, *args)
+
+    def _flush_pending(self) -> None:
+        with self._lock:
+            self._flush_scheduled = False
+            report, self._pending = self._pending, None
+            if report is not None:
+                self._last_sent_at = time.monotonic()
+        if report is not None:
+            self._dispatch(report)
+
+    def _dispatch(self, report: Tuple[float, Optional[float], Optional[str]]) -> None:
+        task = self._loop.create_task(self._deliver(report))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _deliver(self, report: Tuple[float, Optional[float], Optional[str]]) -> None:
+        if self._send_lock is None:
+            self._send_lock = asyncio.Lock()
+        async with self._send_lock:
+            progress, total, message = report
+            # Clients require progress to increase with every notification
+            if progress <= self._sent_progress:
+                return
+            try:
+                await self._send(progress, total, message)
+                self._sent_progress = progress
+                self.sent += 1
+            except Exception as e:
+                print(f"⚠️ Progress notification failed: {e}")
+
+    async def close(self) -> None:
+        """Send any coalesced report and wait until every notification is delivered"""
+        if not self.enabled:
+            return
+        with self._lock:
+            report, self._pending = self._pending, None
+        if report is not None:
+            self._dispatch(report)
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
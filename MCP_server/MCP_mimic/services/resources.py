@@ -0,0 +1,179 @@
+# services/resources.py - Resource URIs, Change Notification and Subscriptions
+"""
+Videos, executions and corrections are exposed as MCP resources:
+
+    mimic://videos/<id>   mimic://executions/<id>   mimic://corrections/<id>
+
+The database layers call ChangeNotifier.notify() after every successful write.
+ResourceSubscriptions listens to those changes and tells subscribed client
+sessions that a resource changed (notifications/resources/updated). It also
+tells sessions that listed resources when documents are added or removed
+(notifications/resources/list_changed). Clients can then watch a run without
+polling get_task or get_execution. Notifications for one URI are coalesced over
+RESOURCE_UPDATE_DEBOUNCE_SECONDS, so a burst of writes sends one update.
+
+ChangeNotifier is in-process only: it sees writes made through this process's
+Database/AsyncDatabase and nothing else. Executions written by the Flask app
+(main.py), its browser worker processes or another MCP server process never
+notify subscribers here; those clients have to poll, or the notifier would
+have to be fed from a MongoDB change stream (which needs a replica set).
+"""
+import asyncio
+import os
+import threading
+import weakref
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+RESOURCE_SCHEME = 'mimic'
+RESOURCE_COLLECTIONS = ('videos', 'executions', 'corrections')
+
+ChangeListener = Callable[[str, Optional[str], str], None]
+
+
+def resource_uri(collection: str, doc_id: Any) -> str:
+    return f"{RESOURCE_SCHEME}://{collection}/{doc_id}"
+
+
+def parse_resource_uri(uri: str) -> Tuple[str, str]:
+    """(collection, document id) for a mimic:// URI; ValueError for anything else"""
+    prefix = f"{RESOURCE_SCHEME}://"
+    if not uri.startswith(prefix):
+        raise ValueError(f"Not a {RESOURCE_SCHEME} resource: {uri}")
+    collection, _, doc_id = uri[len(prefix):].partition('/')
+    if collection not in RESOURCE_COLLECTIONS or not doc_id or '/' in doc_id:
+        raise ValueError(f"Unknown resource: {uri}")
+    return collection, doc_id
+
+
+class ChangeNotifier:
+    """
+    Write hook shared by the database layers. Listeners receive
+    (collection, document id or None for bulk changes, operation) and must not block.
+    """
+
+    def __init__(self):
+        self._listeners: List[ChangeListener] = []
+
+    def add_listener(self, listener: ChangeListener) -> None:
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: ChangeListener) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def notify(self, collection: str, doc_id: Any, operation: str) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(collection, str(doc_id) if doc_id is not None else None, operation)
+            except Exception as e:
+                print(f"⚠️ Change listener error: {e}")
+
+
+class ResourceSubscriptions:
+    """
+    Per-URI client subscriptions. Sessions need send_resource_updated(uri) and
+    send_resource_list_changed() coroutines (mcp ServerSession). Sessions are
+    held weakly, so disconnected clients drop out without unsubscribing.
+    """
+
+    def __init__(self, debounce_seconds: Optional[float] = None):
+        self.debounce_seconds = (debounce_seconds if debounce_seconds is not None
+                                 else float(os.getenv('RESOURCE_UPDATE_DEBOUNCE_SECONDS', '0.25')))
+        self._subscribers: Dict[str, 'weakref.WeakSet'] = {}
+        self._list_watchers: 'weakref.WeakSet' = weakref.WeakSet()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._pending: set = set()
+        self._list_changed = False
+        self._flush_scheduled = False
+        self.sent = 0
+
+    def _bind_loop(self) -> None:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+
+    def subscribe(self, uri: str, session: Any) -> None:
+        """Register session for updates to uri (call from the event loop)"""
+        self._bind_loop()
+        with self._lock:
+            self._subscribers.setdefault(uri, weakref.WeakSet()).add(session)
+        self._list_watchers.add(session)
+
+    def unsubscribe(self, uri: str, session: Any) -> None:
+        with self._lock:
+            sessions = self._subscribers.get(uri)
+            if sessions is not None:
+                sessions.discard(session)
+                if not sessions:
+                    del self._subscribers[uri]
+
+    def watch_list(self, session: Any) -> None:
+        """Send list_changed notifications to session (it has listed resources)"""
+        self._bind_loop()
+        self._list_watchers.add(session)
+
+    def on_change(self, collection: str, doc_id: Optional[str], operation: str) -> None:
+        """ChangeNotifier listener; safe to call from any thread"""
+        if collection not in RESOURCE_COLLECTIONS or self._loop is None:
+            return
+        uri = resource_uri(collection, doc_id) if doc_id else None
+        with self._lock:
+            updated = uri is not None and uri in self._subscribers
+            list_changed = operation in ('insert', 'delete') and len(self._list_watchers) > 0
+            if not updated and not list_changed:
+                return
+            if updated:
+                self._pending.add(uri)
+            self._list_changed = self._list_changed or list_changed
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        try:
+            self._loop.call_soon_threadsafe(self._loop.call_later, self.debounce_seconds, self._start_flush)
+        except RuntimeError:
+            # Loop closed; nobody is left to notify
+            with self._lock:
+                self._flush_scheduled = False
+
+    def _start_flush(self) -> None:
+        self._loop.create_task(self._flush())
+
+    async def _flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, set()
+            list_changed, self._list_changed = self._list_changed, False
+            self._flush_scheduled = False
+            targets = [(uri, list(self._subscribers.get(uri, ()))) for uri in pending]
+        for uri, sessions in targets:
+            for session in sessions:
+                await self._send(session, 'updated', session.send_resource_updated(uri))
+        if list_changed:
+            for session in list(self._list_watchers):
+                await self._send(session, 'list_changed', session.send_resource_list_changed())
+
+    async def _send(self, session: Any, kind: str, notification) -> None:
+        try:
+            await notification
+            self.sent += 1
+        except Exception as e:
+            # Closed session: stop notifying it
+            print(f"⚠️ Dropping resource subscriber after failed {kind} notification: {e}")
+            self.drop_session(session)
+
+    def drop_session(self, session: Any) -> None:
+        with self._lock:
+            for uri in list(self._subscribers):
+                self._subscribers[uri].discard(session)
+                if not self._subscribers[uri]:
+                    del self._subscribers[uri]
+        self._list_watchers.discard(session)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'subscribed_uris': len(self._subscribers),
+                'subscriptions': sum(len(sessions) for sessions in self._subscribers.values()),
+                'list_watchers': len(self._list_watchers),
+                'notifications_sent': self.sent
+            }
@@ -0,0 +1,111 @@
+# services/retry.py - Step Error Classification and Retry Policy
+import os
+import random
+import re
+import time
+from typing import Dict, Any, Optional, Union
+
+ERROR_TIMEOUT = 'timeout'
+ERROR_DETACHED = 'detached'
+ERROR_NAVIGATION = 'navigation'
+ERROR_SELECTOR = 'selector_syntax'
+ERROR_CLOSED = 'closed'
+ERROR_SETTLE = 'settle'  # the action ran but its wait_for response/URL never arrived; never retried
+ERROR_UNKNOWN = 'unknown'
+
+# Checked in order; the first matching class wins
+ERROR_PATTERNS = [
+    (ERROR_CLOSED, re.compile(r'has been closed|browser has disconnected|Target closed|Connection closed', re.I)),
+    (ERROR_SELECTOR, re.compile(r'not a valid selector|Unexpected token|Unknown engine|SyntaxError|'
+                                r'Failed to execute \'querySelector|while parsing (css )?selector', re.I)),
+    (ERROR_NAVIGATION, re.compile(r'Execution context was destroyed|because of a navigation|navigat(ed|ion) (to|interrupted)|'
+                                  r'net::ERR_ABORTED|Frame was detached|frame got detached', re.I)),
+    (ERROR_DETACHED, re.compile(r'not attached to the DOM|detached from the DOM|Element is detached|'
+                                r'element handle is disposed|Node is detached', re.I)),
+    (ERROR_TIMEOUT, re.compile(r'Timeout \d+ ?ms exceeded|TimeoutError|timed out', re.I)),
+]
+
+# Retryable error classes and how many attempts (including the first) each gets at most
+TRANSIENT_ATTEMPTS = {
+    ERROR_DETACHED: None,    # up to max_attempts
+    ERROR_NAVIGATION: None,  # up to max_attempts
+    ERROR_TIMEOUT: 2         # waiting again rarely helps more than once
+}
+
+
+def classify_error(error: Union[BaseException, str, None]) -> str:
+    """Map a Playwright exception or error message to an error class"""
+    if error is None:
+        return ERROR_UNKNOWN
+    if isinstance(error, BaseException):
+        message = f"{type(error).__name__}: {error}"
+    else:
+        message = str(error)
+    for kind, pattern in ERROR_PATTERNS:
+        if pattern.search(message):
+            return kind
+    return ERROR_UNKNOWN
+
+
+def replay_safe(step: Dict[str, Any]) -> bool:
+    """
+    Whether a step can run again after an error that may have come after it took effect.
+    Clicks, key presses and submitting types can post forms or searches twice.
+    """
+    action = step.get('action')
+    if action in ('click', 'press'):
+        return False
+    return not (action == 'type' and step.get('submit'))
+
+
+class RunBudget:
+    """Wall-clock budget shared by all retries of one run"""
+
+    def __init__(self, seconds: float):
+        self.deadline = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+class RetryPolicy:
+    """
+    Bounded exponential backoff for transient step errors.
+    Unrecoverable classes (selector syntax, closed browser, unknown) are never retried.
+    """
+
+    def __init__(self, max_attempts: Optional[int] = None, base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None, run_budget: Optional[float] = None):
+        self.max_attempts = max_attempts or int(os.getenv('RETRY_MAX_ATTEMPTS', '3'))
+        self.base_delay = base_delay if base_delay is not None else int(os.getenv('RETRY_BASE_DELAY_MS', '250')) / 1000
+        self.max_delay = max_delay if max_delay is not None else int(os.getenv('RETRY_MAX_DELAY_MS', '2000')) / 1000
+        self.run_budget = run_budget or float(os.getenv('RUN_RETRY_BUDGET_SECONDS', '120'))
+
+    def start_run(self) -> RunBudget:
+        return RunBudget(self.run_budget)
+
+    def attempts_for(self, kind: str, step: Optional[Dict[str, Any]] = None) -> int:
+        if kind not in TRANSIENT_ATTEMPTS:
+            return 1
+        limit = self.max_attempts
+        if step and isinstance(step.get('retries'), int):
+            limit = step['retries'] + 1
+        class_limit = TRANSIENT_ATTEMPTS[kind]
+        return min(limit, class_limit) if class_limit else limit
+
+    def next_delay(self, kind: str, attempt: int, budget: RunBudget,
+                   step: Optional[Dict[str, Any]] = None) -> Optional[float]:
+        """Seconds to wait before the next attempt, or None when the step should not be retried"""
+        if attempt >= self.attempts_for(kind, step):
+            return None
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1))) * random.uniform(0.5, 1.0)
+        needed = delay
+        if kind == ERROR_TIMEOUT and step and isinstance(step.get('timeout'), int):
+            needed += step['timeout'] / 1000
+        if budget.remaining() <= needed:
+            return None
+        return delay
@@ -0,0 +1,163 @@
+# services/runs.py - Run Deadlines and Cooperative Cancellation
+import asyncio
+import contextvars
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Callable
+
+
+class RunStopped(Exception):
+    """Raised inside a run once it has been cancelled or has passed its deadline"""
+
+    def __init__(self, kind: str, message: str):
+        super().__init__(message)
+        self.kind = kind
+
+
+class RunControl:
+    """
+    Deadline and cancellation state for one automation run.
+    Every wait in the browser service caps its timeout to remaining_ms(), and
+    cancel() runs the registered callbacks so the run's browser is freed at once.
+    on_step, when given, is called with each executed step's outcome as it finishes.
+    """
+
+    def __init__(self, run_id: Optional[str] = None, deadline_seconds: Optional[float] = None,
+                 on_step: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.run_id = run_id or uuid.uuid4().hex
+        self.on_step = on_step
+        self.started_at = time.time()
+        self.deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+        self.reason = None
+        self._cancelled = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, or None when the run has no deadline"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def stop_reason(self) -> Optional[RunStopped]:
+        if self.cancelled:
+            return RunStopped('cancelled', f"Run cancelled: {self.reason}")
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return RunStopped('deadline', "Run deadline exceeded")
+        return None
+
+    def check(self) -> None:
+        stopped = self.stop_reason()
+        if stopped:
+            raise stopped
+
+    def timeout_ms(self, requested_ms: float) -> float:
+        """Cap a Playwright timeout to the time the run has left"""
+        self.check()
+        remaining = self.remaining()
+        if remaining is None:
+            return requested_ms
+        return max(1, min(requested_ms, remaining * 1000))
+
+    def sleep(self, seconds: float) -> None:
+        """time.sleep that wakes up on cancellation and never outlives the deadline"""
+        self.check()
+        remaining = self.remaining()
+        self._cancelled.wait(seconds if remaining is None else min(seconds, remaining))
+        self.check()
+
+    async def sleep_async(self, seconds: float) -> None:
+        self.check()
+        remaining = self.remaining()
+        end = time.monotonic() + (seconds if remaining is None else min(seconds, remaining))
+        while time.monotonic() < end and not self.cancelled:
+            await asyncio.sleep(min(0.1, end - time.monotonic()))
+        self.check()
+
+    def report_step(self, outcome: Dict[str, Any]) -> None:
+        """Hand a finished step's outcome to on_step; listener errors never fail the run"""
+        if self.on_step is None:
+            return
+        try:
+            self.on_step(outcome)
+        except Exception as e:
+            print(f"⚠️ Step listener for run {self.run_id} failed: {e}")
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        """Run callback when the run is cancelled (immediately if it already was)"""
+        with self._lock:
+            if not self.cancelled:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def cancel(self, reason: str = 'cancelled by request') -> None:
+        with self._lock:
+            if self.cancelled:
+                return
+            self.reason = reason
+            self._cancelled.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"⚠️ Cancel callback for run {self.run_id} failed: {e}")
+
+    def describe(self) -> Dict[str, Any]:
+        remaining = self.remaining()
+        return {
+            'run_id': self.run_id,
+            'started_at': datetime.utcfromtimestamp(self.started_at).isoformat(),
+            'remaining_seconds': round(remaining, 1) if remaining is not None else None,
+            'cancelled': self.cancelled
+        }
+
+
+class RunRegistry:
+    """Process-wide index of active runs so they can be cancelled by id"""
+
+    def __init__(self):
+        self._runs: Dict[str, RunControl] = {}
+        self._lock = threading.Lock()
+
+    def register(self, control: RunControl) -> None:
+        with self._lock:
+            self._runs[control.run_id] = control
+
+    def unregister(self, control: RunControl) -> None:
+        with self._lock:
+            if self._runs.get(control.run_id) is control:
+                del self._runs[control.run_id]
+
+    def get(self, run_id: str) -> Optional[RunControl]:
+        with self._lock:
+            return self._runs.get(run_id)
+
+    def cancel(self, run_id: str, reason: str = 'cancelled by request') -> bool:
+        control = self.get(run_id)
+        if control is None:
+            return False
+        print(f"🛑 Cancelling run {run_id}: {reason}")
+        control.cancel(reason)
+        return True
+
+    def list_runs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            runs = list(self._runs.values())
+        return [control.describe() for control in runs]
+
+
+run_registry = RunRegistry()
+
+# The run the current thread/task is executing, read by the browser service's waits
+current_run: contextvars.ContextVar = contextvars.ContextVar('current_run', default=None)
+
+DEFAULT_RUN_DEADLINE_SECONDS = float(os.getenv('RUN_DEADLINE_SECONDS', '600'))
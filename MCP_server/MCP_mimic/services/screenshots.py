@@ -0,0 +1,129 @@
+# services/screenshots.py - Content-addressed Screenshot Pipeline
+"""
+The `screenshot` action captures to bytes and hands them to a background
+writer, so a run never waits on disk I/O between steps. Files are stored by
+content hash under SCREENSHOT_DIR/<first two hex digits>/<sha256>.<ext>, so
+identical frames are written once and names never collide. The returned
+reference ({'sha256', 'path', 'format', 'bytes'}) is what execution
+documents record.
+"""
+import asyncio
+import hashlib
+import os
+import queue
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+SCREENSHOT_FORMATS = {'png': 'png', 'jpeg': 'jpg'}
+DEFAULT_JPEG_QUALITY = 80
+SCREENSHOT_FLUSH_TIMEOUT = float(os.getenv('SCREENSHOT_FLUSH_TIMEOUT_SECONDS', '10'))
+
+
+def screenshot_options(step: Dict[str, Any]) -> Dict[str, Any]:
+    """Playwright page.screenshot() arguments for a screenshot step"""
+    fmt = step.get('format', 'png')
+    options = {'type': fmt, 'full_page': bool(step.get('full_page', False))}
+    if fmt == 'jpeg':
+        options['quality'] = step.get('quality', DEFAULT_JPEG_QUALITY)
+    if step.get('clip'):
+        options['clip'] = {key: step['clip'][key] for key in ('x', 'y', 'width', 'height')}
+    return options
+
+
+class ScreenshotWriter:
+    """
+    Single background thread that writes screenshot bytes to content-addressed files.
+    submit() only hashes the bytes and enqueues them; the bounded queue applies
+    backpressure if the disk falls behind.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_queue: Optional[int] = None):
+        self.directory = directory or os.getenv('SCREENSHOT_DIR', 'screenshots')
+        self._queue = queue.Queue(maxsize=max_queue or int(os.getenv('SCREENSHOT_QUEUE_SIZE', '64')))
+        self._thread = None
+        self._lock = threading.Lock()
+        self._counts = {'submitted': 0, 'written': 0, 'deduplicated': 0, 'failed': 0}
+
+    def content_path(self, digest: str, fmt: str) -> str:
+        return os.path.join(self.directory, digest[:2], f"{digest}.{SCREENSHOT_FORMATS[fmt]}")
+
+    def submit(self, data: bytes, fmt: str = 'png', copy_to: Optional[str] = None) -> Dict[str, Any]:
+        """Queue bytes for storage and return their reference; copy_to also writes them to that path"""
+        digest = hashlib.sha256(data).hexdigest()
+        ref = {
+            'sha256': digest,
+            'path': self.content_path(digest, fmt),
+            'format': fmt,
+            'bytes': len(data),
+            'captured_at': datetime.utcnow().isoformat()
+        }
+        if copy_to:
+            ref['copy'] = copy_to
+        self._ensure_thread()
+        self._count('submitted')
+        self._queue.put((data, ref))
+        return ref
+
+    async def submit_async(self, data: bytes, fmt: str = 'png', copy_to: Optional[str] = None) -> Dict[str, Any]:
+        """
+        submit() for event-loop code: hashing and a full queue's backpressure wait
+        happen on an executor thread instead of stalling every other task on the loop
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, self.submit, data, fmt, copy_to)
+
+    def flush(self, timeout: Optional[float] = SCREENSHOT_FLUSH_TIMEOUT) -> bool:
+        """Wait until every queued screenshot is on disk; False if the timeout passed first"""
+        done = threading.Event()
+        if self._thread is None:
+            return True
+        self._queue.put((None, done))
+        return done.wait(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counts, 'queued': self._queue.qsize()}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._counts[key] += 1
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='screenshot-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            data, item = self._queue.get()
+            if data is None:
+                item.set()
+                continue
+            try:
+                self._write(data, item)
+            except Exception as e:
+                self._count('failed')
+                print(f"⚠️ Could not store screenshot {item['sha256'][:12]}: {str(e)}")
+
+    def _write(self, data: bytes, ref: Dict[str, Any]) -> None:
+        path = ref['path']
+        if os.path.exists(path):
+            self._count('deduplicated')
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so readers never see a partial file
+            partial = f"{path}.{threading.get_ident()}.part"
+            with open(partial, 'wb') as f:
+                f.write(data)
+            os.replace(partial, path)
+            self._count('written')
+        if ref.get('copy'):
+            directory = os.path.dirname(ref['copy'])
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(ref['copy'], 'wb') as f:
+                f.write(data)
+
+
+screenshot_writer = ScreenshotWriter()
@@ -0,0 +1,223 @@
+# services/serialization.py - Shared Document and Tool Response Serialization
+"""
+Two jobs:
+  - serialize_document(s): stringify MongoDB IDs for API clients (sync and async
+    database layers),
+  - encode_response(): turn a tool's result dict into compact JSON that fits the
+    tool's size budget.
+
+Encoding uses orjson when it is installed and the standard json module
+otherwise; BSON and other non-JSON types are converted explicitly rather than
+through str(). A response over its budget has long strings and lists trimmed
+(lists keep their head and tail, so the end of a log survives), with progressively
+tighter limits until it fits. With RESPONSE_ARTIFACTS=reference, any field larger
+than ARTIFACT_MIN_BYTES is moved to the artifact store and replaced by a
+reference the client reads as an MCP resource.
+"""
+import datetime as dt
+import decimal
+import json
+import os
+import uuid
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+from services.config import parse_tool_limits
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from bson import ObjectId, Binary, Decimal128, Timestamp
+    from bson.dbref import DBRef
+except ImportError:
+    ObjectId = Binary = Decimal128 = Timestamp = DBRef = None
+
+# ObjectId references returned to API clients as strings
+REFERENCE_FIELDS = ('video_id', 'execution_id')
+
+DEFAULT_MAX_BYTES = int(os.getenv('RESPONSE_MAX_BYTES', str(256 * 1024)))
+DEFAULT_MAX_STRING = int(os.getenv('RESPONSE_MAX_STRING', '4000'))
+DEFAULT_MAX_ITEMS = int(os.getenv('RESPONSE_MAX_ITEMS', '200'))
+ARTIFACT_MIN_BYTES = int(os.getenv('ARTIFACT_MIN_BYTES', str(64 * 1024)))
+MAX_SHRINK_ROUNDS = 6
+
+# Tools whose full results are worth more room; everything else gets DEFAULT_MAX_BYTES
+DEFAULT_TOOL_BUDGETS = {
+    'execute_browser_action': 512 * 1024,
+    'resume_execution': 512 * 1024,
+    'run_task_from_video': 512 * 1024,
+    'get_task': 512 * 1024,
+    'get_execution': 512 * 1024,
+    'get_job': 512 * 1024,
+    'health_check': 64 * 1024,
+    'cancel_run': 16 * 1024,
+    'cancel_job': 16 * 1024
+}
+# Per-tool overrides: TOOL_RESPONSE_BUDGETS="get_tasks=131072,get_job=1048576"
+TOOL_BUDGET_OVERRIDES = parse_tool_limits(os.getenv('TOOL_RESPONSE_BUDGETS'))
+
+
+def serialize_document(doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Stringify a MongoDB document's _id and ObjectId references in place"""
+    if doc is None:
+        return None
+    doc['_id'] = str(doc['_id'])
+    for field in REFERENCE_FIELDS:
+        if doc.get(field) is not None:
+            doc[field] = str(doc[field])
+    return doc
+
+
+def serialize_documents(docs: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [serialize_document(doc) for doc in docs]
+
+
+# JSON encoding
+def json_default(value: Any) -> Any:
+    """JSON form of the BSON and Python types tool results carry"""
+    if isinstance(value, (dt.datetime, dt.date, dt.time)):
+        return value.isoformat()
+    if ObjectId is not None and isinstance(value, ObjectId):
+        return str(value)
+    if Decimal128 is not None and isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if Timestamp is not None and isinstance(value, Timestamp):
+        return value.as_datetime().isoformat()
+    if DBRef is not None and isinstance(value, DBRef):
+        return {'$ref': value.collection, '$id': str(value.id)}
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        # Image bytes and other binaries are never inlined
+        size = len(value)
+        subtype = getattr(value, 'subtype', None) if Binary is not None and isinstance(value, Binary) else None
+        return {'$binary': {'bytes': size, **({'subtype': subtype} if subtype is not None else {})}}
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+
+def dumps(value: Any) -> bytes:
+    """Compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(value, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=json_default, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def to_plain(value: Any) -> Any:
+    """Round-trip through JSON so later size checks see only plain JSON types"""
+    return json.loads(dumps(value))
+
+
+# Size budgets
+class ResponseBudget:
+    """Byte budget for one tool's response plus the starting string/list limits used to meet it"""
+
+    def __init__(self, max_bytes: int = None, max_string: int = None, max_items: int = None):
+        self.max_bytes = max_bytes or DEFAULT_MAX_BYTES
+        self.max_string = max_string or DEFAULT_MAX_STRING
+        self.max_items = max_items or DEFAULT_MAX_ITEMS
+
+
+def budget_for(tool: str, overrides: Optional[Dict[str, int]] = None) -> ResponseBudget:
+    budgets = {**DEFAULT_TOOL_BUDGETS, **TOOL_BUDGET_OVERRIDES, **(overrides or {})}
+    return ResponseBudget(max_bytes=budgets.get(tool))
+
+
+def shrink(value: Any, max_string: int, max_items: int) -> Tuple[Any, int]:
+    """Trim long strings and lists inside value; returns (trimmed value, number of cuts)"""
+    if isinstance(value, str):
+        if len(value) <= max_string:
+            return value, 0
+        return value[:max_string] + f"… [{len(value) - max_string} more chars]", 1
+    if isinstance(value, list):
+        head, tail, omitted = len(value), 0, 0
+        if len(value) > max_items:
+            head = max(1, max_items // 2)
+            tail = max(0, max_items - head)
+            omitted = len(value) - head - tail
+        items = []
+        cuts = 1 if omitted else 0
+        for item in value[:head] + (value[-tail:] if tail else []):
+            item, item_cuts = shrink(item, max_string, max_items)
+            items.append(item)
+            cuts += item_cuts
+        if omitted:
+            items.insert(head, f"… {omitted} items omitted …")
+        return items, cuts
+    if isinstance(value, dict):
+        cuts = 0
+        trimmed = {}
+        for key, item in value.items():
+            trimmed[key], item_cuts = shrink(item, max_string, max_items)
+            cuts += item_cuts
+        return trimmed, cuts
+    return value, 0
+
+
+def externalize(value: Any, store: Any, min_bytes: int = None, depth: int = 2,
+                path: str = '') -> Tuple[Any, List[Dict[str, Any]]]:
+    """Replace fields of a result dict larger than min_bytes with artifact references"""
+    min_bytes = min_bytes or ARTIFACT_MIN_BYTES
+    if not isinstance(value, dict) or depth <= 0:
+        return value, []
+    refs = []
+    result = {}
+    for key, item in value.items():
+        field = f"{path}{key}"
+        encoded = dumps(item)
+        if len(encoded) < min_bytes:
+            result[key] = item
+            continue
+        if isinstance(item, dict) and depth > 1:
+            result[key], nested = externalize(item, store, min_bytes, depth - 1, f"{field}.")
+            if len(dumps(result[key])) < min_bytes:
+                refs.extend(nested)
+                continue
+        ref = store.put(encoded, mime_type='application/json', name=field)
+        result[key] = {'$artifact': ref['uri'], 'bytes': ref['bytes']}
+        refs.append(ref)
+    return result, refs
+
+
+def encode_response(payload: Any, budget: Optional[ResponseBudget] = None,
+                    artifact_store: Any = None) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    JSON text for a tool result that fits budget.max_bytes, plus references to
+    any fields moved to artifact_store (only when a store is given).
+    """
+    budget = budget or ResponseBudget()
+    refs = []
+    if artifact_store is not None:
+        payload, refs = externalize(payload, artifact_store)
+    encoded = dumps(payload)
+    if len(encoded) <= budget.max_bytes:
+        return encoded.decode(), refs
+
+    original_bytes = len(encoded)
+    plain = to_plain(payload)
+    max_string, max_items = budget.max_string, budget.max_items
+    for _ in range(MAX_SHRINK_ROUNDS):
+        trimmed, cuts = shrink(plain, max_string, max_items)
+        if isinstance(trimmed, dict):
+            trimmed = {**trimmed, 'truncated': {
+                'original_bytes': original_bytes,
+                'max_string': max_string,
+                'max_items': max_items,
+                'cuts': cuts
+            }}
+        encoded = dumps(trimmed)
+        if len(encoded) <= budget.max_bytes:
+            return encoded.decode(), refs
+        max_string = max(200, max_string // 2)
+        max_items = max(4, max_items // 2)
+
+    # Still too big (very wide objects): return a clearly marked preview
+    preview = encoded[:max(0, budget.max_bytes // 3)].decode('utf-8', 'ignore')
+    return dumps({
+        'truncated': {'original_bytes': original_bytes, 'preview_only': True},
+        'preview': preview
+    }).decode(), refs
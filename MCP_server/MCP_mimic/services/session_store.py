@@ -0,0 +1,123 @@
+# services/session_store.py - Browser Session State Persistence
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlparse
+
+
+def find_session_checkpoint(steps: List[Dict[str, Any]]) -> Optional[int]:
+    """Index of the last step marked with session_checkpoint, or None"""
+    marked = [i for i, step in enumerate(steps) if isinstance(step, dict) and step.get('session_checkpoint')]
+    return marked[-1] if marked else None
+
+
+def session_domain(steps: List[Dict[str, Any]], upto: int) -> Optional[str]:
+    """Domain of the first goto at or before the checkpoint"""
+    for step in steps[:upto + 1]:
+        if step.get('action') == 'goto' and step.get('url'):
+            return urlparse(step['url']).netloc.lower() or None
+    return None
+
+
+def steps_fingerprint(steps: List[Dict[str, Any]]) -> str:
+    """Stable hash of the steps leading to a checkpoint, so an edited login sequence is not skipped"""
+    payload = json.dumps(steps, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SessionStore:
+    """
+    File-backed store of Playwright storage state (cookies + localStorage)
+    keyed by (user, domain), with a time-to-live per snapshot.
+    """
+
+    def __init__(self, directory: Optional[str] = None, ttl_seconds: Optional[int] = None):
+        self.directory = directory or os.getenv('SESSION_STATE_DIR', '.session_state')
+        self.ttl_seconds = ttl_seconds or int(os.getenv('SESSION_STATE_TTL_SECONDS', str(12 * 3600)))
+
+    def _path(self, user: str, domain: str) -> str:
+        key = hashlib.sha256(f"{user}\n{domain}".encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self.directory, f"{key}.json")
+
+    def plan(self, steps: List[Dict[str, Any]], user: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Work out whether a run can use session snapshots.
+        Returns None when the steps have no checkpoint; otherwise the checkpoint
+        index, domain, fingerprint and (if a fresh snapshot exists) the snapshot.
+        """
+        index = find_session_checkpoint(steps)
+        if index is None:
+            return None
+        domain = session_domain(steps, index)
+        if not domain:
+            return None
+        user = user or 'default'
+        fingerprint = steps_fingerprint(steps[:index + 1])
+        snapshot = self.load(user, domain)
+        if snapshot and snapshot.get('fingerprint') != fingerprint:
+            snapshot = None
+        return {
+            'index': index,
+            'user': user,
+            'domain': domain,
+            'fingerprint': fingerprint,
+            'snapshot': snapshot
+        }
+
+    def load(self, user: str, domain: str) -> Optional[Dict[str, Any]]:
+        """Load a snapshot; expired or unreadable snapshots are removed and ignored"""
+        path = self._path(user, domain)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable session snapshot {path}: {e}")
+            self.invalidate(user, domain)
+            return None
+
+        if time.time() - snapshot.get('saved_at', 0) > self.ttl_seconds:
+            print(f"⌛ Session snapshot for {domain} expired")
+            self.invalidate(user, domain)
+            return None
+        return snapshot
+
+    def save(self, plan: Dict[str, Any], storage_state: Dict[str, Any], url: str) -> None:
+        """
+        Store the storage state reached at a plan's checkpoint.
+        Snapshots hold login cookies, so the directory is owner-only (0700) and each
+        save writes its own 0600 temp file before atomically replacing the snapshot.
+        """
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        snapshot = {
+            'user': plan['user'],
+            'domain': plan['domain'],
+            'fingerprint': plan['fingerprint'],
+            'checkpoint_step': plan['index'],
+            'url': url,
+            'storage_state': storage_state,
+            'saved_at': time.time()
+        }
+        path = self._path(plan['user'], plan['domain'])
+        # mkstemp opens with O_CREAT | O_EXCL and mode 0600 under a unique name
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=os.path.basename(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def invalidate(self, user: str, domain: str) -> None:
+        try:
+            os.remove(self._path(user, domain))
+        except FileNotFoundError:
+            pass
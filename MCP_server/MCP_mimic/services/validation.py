@@ -0,0 +1,329 @@
+# services/validation.py - Step List Validation Service
+import re
+from functools import lru_cache
+from typing import List, Dict, Any, Optional
+import soupsieve
+from jsonschema import Draft7Validator
+
+STEP_ACTIONS = ["goto", "click", "type", "wait", "scroll", "screenshot", "select", "hover", "press"]
+
+# Fields each action cannot run without (mirrors the checks in BrowserAutomator._execute_single_step)
+ACTION_REQUIRED_FIELDS = {
+    "goto": ["url"],
+    "click": ["selector"],
+    "type": ["selector", "text"],
+    "select": ["selector", "value"],
+    "hover": ["selector"],
+    "press": ["key"]
+}
+
+# Schema for a single automation step, shared by the MCP tool declarations and the validator
+STEP_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "action": {
+            "type": "string",
+            "enum": STEP_ACTIONS
+        },
+        "selector": {"type": "string"},
+        "url": {"type": "string"},
+        "text": {"type": "string"},
+        "value": {"type": "string"},
+        "key": {"type": "string"},
+        "timeout": {"type": "integer"},
+        "direction": {"type": "string"},
+        "amount": {"type": "integer"},
+        "path": {"type": "string"},
+        "format": {
+            "type": "string",
+            "enum": ["png", "jpeg"],
+            "description": "Screenshot image format"
+        },
+        "quality": {
+            "type": "integer",
+            "minimum": 1,
+            "maximum": 100,
+            "description": "JPEG screenshot quality"
+        },
+        "clip": {
+            "type": "object",
+            "properties": {
+                "x": {"type": "number"},
+                "y": {"type": "number"},
+                "width": {"type": "number", "minimum": 1},
+                "height": {"type": "number", "minimum": 1}
+            },
+            "required": ["x", "y", "width", "height"],
+            "description": "Screenshot only this page region"
+        },
+        "full_page": {
+            "type": "boolean",
+            "description": "Screenshot the full scrollable page"
+        },
+        "typing": {
+            "type": "string",
+            "enum": ["fill", "paste", "human"],
+            "description": "Text entry strategy for type steps: instant fill, paste, or human-like typing"
+        },
+        "submit": {
+            "type": "boolean",
+            "description": "Press Enter after typing"
+        },
+        "optional": {
+            "type": "boolean",
+            "description": "Keep running the remaining steps if this step fails"
+        },
+        "retries": {
+            "type": "integer",
+            "minimum": 0,
+            "description": "Maximum retries for transient errors (timeouts, detached elements, navigation races)"
+        },
+        "batch": {
+            "type": "boolean",
+            "description": "Set false to always run this step through Playwright instead of an in-page batch; clicks join a batch only when this is true (in-page clicks are untrusted synthetic events)"
+        },
+        "wait_for": {
+            "type": ["object", "boolean"],
+            "properties": {
+                "response": {"type": "string", "minLength": 1},
+                "url": {"type": "string", "minLength": 1},
+                "timeout": {"type": "integer", "minimum": 1}
+            },
+            "additionalProperties": False,
+            "description": "After the action, wait for a network response and/or URL matching a substring or glob pattern (false disables the default wait for search submits)"
+        },
+        "session_checkpoint": {
+            "type": "boolean",
+            "description": "Save cookies/localStorage once this step succeeds so later runs can start here"
+        },
+        "description": {"type": "string"}
+    },
+    "required": ["action"],
+    "allOf": [
+        {
+            "if": {"properties": {"action": {"const": action}}, "required": ["action"]},
+            "then": {"required": fields}
+        }
+        for action, fields in ACTION_REQUIRED_FIELDS.items()
+    ]
+}
+
+STEPS_SCHEMA = {
+    "type": "array",
+    "description": "Array of browser automation steps to execute",
+    "items": STEP_SCHEMA
+}
+
+def _error(path, message: str) -> Dict[str, Any]:
+    path = tuple(path)
+    step = path[0] if path and isinstance(path[0], int) else None
+    parts = [str(p) for p in (path[1:] if step is not None else path)]
+    return {'step': step, 'field': '.'.join(parts) or None, 'error': message}
+
+
+def _drop_nulls(value: Any) -> Any:
+    """Null fields count as absent, as they do for the step executor"""
+    if isinstance(value, dict):
+        return {key: _drop_nulls(item) for key, item in value.items() if item is not None}
+    if isinstance(value, list):
+        return [_drop_nulls(item) for item in value]
+    return value
+
+
+def schema_errors(validator: Draft7Validator, value: Any) -> List[Dict[str, Any]]:
+    """Map jsonschema errors to {'step', 'field', 'error'} dicts"""
+    errors = []
+    for error in validator.iter_errors(value):
+        path = tuple(error.absolute_path)
+        if error.validator == 'required':
+            errors.extend(_error(path + (field,), "is required")
+                          for field in error.validator_value if field not in error.instance)
+        elif error.validator == 'additionalProperties':
+            allowed = error.schema.get('properties', {})
+            errors.extend(_error(path + (field,), "unexpected property")
+                          for field in error.instance if field not in allowed)
+        elif error.validator == 'type':
+            expected = error.validator_value
+            expected = ' or '.join(expected) if isinstance(expected, list) else expected
+            errors.append(_error(path, f"expected {expected}, got {type(error.instance).__name__}"))
+        elif error.validator == 'enum':
+            errors.append(_error(path, f"must be one of {error.validator_value}, got {error.instance!r}"))
+        elif error.validator == 'minimum':
+            errors.append(_error(path, f"must be >= {error.validator_value}"))
+        elif error.validator == 'maximum':
+            errors.append(_error(path, f"must be <= {error.validator_value}"))
+        elif error.validator == 'minLength':
+            errors.append(_error(path, f"must be at least {error.validator_value} characters"))
+        else:
+            errors.append(_error(path, error.message))
+    return errors
+
+
+# Playwright selector engines accepted as "engine=body" prefixes
+_ENGINE_PREFIX = re.compile(r'^\s*(css|xpath|text|id|data-testid|data-test-id|data-test|role|nth|visible|internal:[\w-]+)\s*=', re.I)
+
+# Playwright's CSS extensions, which a standard CSS parser does not know
+_PLAYWRIGHT_PSEUDO = re.compile(r':(has-text|text-is|text-matches|text|visible|nth-match|left-of|right-of|above|below|near)(?![\w-])')
+
+
+def _split_top_level(selector: str, separator: str) -> Optional[List[str]]:
+    """Split on a separator outside quotes/brackets; returns None when brackets or quotes are unbalanced"""
+    parts = []
+    stack = []
+    quote = None
+    current = []
+    i = 0
+    pairs = {'(': ')', '[': ']'}
+    while i < len(selector):
+        ch = selector[i]
+        if quote:
+            if ch == '\\':
+                current.append(selector[i:i + 2])
+                i += 2
+                continue
+            if ch == quote:
+                quote = None
+        elif ch in ('"', "'"):
+            quote = ch
+        elif ch in pairs:
+            stack.append(pairs[ch])
+        elif ch in (')', ']'):
+            if not stack or stack.pop() != ch:
+                return None
+        elif not stack and selector.startswith(separator, i):
+            parts.append(''.join(current))
+            current = []
+            i += len(separator)
+            continue
+        current.append(ch)
+        i += 1
+    if quote or stack:
+        return None
+    parts.append(''.join(current))
+    return parts
+
+
+def _standard_css(selector: str) -> str:
+    """Replace Playwright pseudo-classes (and their arguments) with a neutral :is(*)"""
+    result = []
+    position = 0
+    for match in _PLAYWRIGHT_PSEUDO.finditer(selector):
+        if match.start() < position:
+            continue
+        result.append(selector[position:match.start()])
+        position = match.end()
+        if selector.startswith('(', position):
+            # Skip the argument list, which may hold quotes and nested parentheses
+            depth = 0
+            quote = None
+            while position < len(selector):
+                ch = selector[position]
+                if quote:
+                    if ch == '\\':
+                        position += 1
+                    elif ch == quote:
+                        quote = None
+                elif ch in ('"', "'"):
+                    quote = ch
+                elif ch == '(':
+                    depth += 1
+                elif ch == ')':
+                    depth -= 1
+                    if depth == 0:
+                        position += 1
+                        break
+                position += 1
+        result.append(':is(*)')
+    result.append(selector[position:])
+    return ''.join(result)
+
+
+def _check_css(selector: str) -> Optional[str]:
+    try:
+        soupsieve.compile(_standard_css(selector))
+    except soupsieve.SelectorSyntaxError as e:
+        return str(e).splitlines()[0]
+    return None
+
+
+@lru_cache(maxsize=1024)
+def check_selector(selector: str) -> Optional[str]:
+    """
+    Syntax-check a Playwright selector (CSS, engine-prefixed or '>>' chained).
+    CSS parts are parsed with soupsieve; other engines are only checked for a body.
+    Returns an error message or None when the selector parses.
+    """
+    if not selector or not selector.strip():
+        return "selector is empty"
+
+    parts = _split_top_level(selector, '>>')
+    if parts is None:
+        return "unbalanced quotes, brackets or parentheses"
+
+    for part in parts:
+        part = part.strip()
+        if not part:
+            return "empty selector around '>>'"
+        engine = _ENGINE_PREFIX.match(part)
+        if engine:
+            body = part[engine.end():].strip()
+            if not body:
+                return f"{engine.group(1)} selector has no body"
+            if engine.group(1).lower() == 'css':
+                error = _check_css(body)
+                if error:
+                    return error
+            continue
+        # Playwright treats these as xpath and text selectors respectively
+        if part.startswith('//') or part.startswith('..'):
+            continue
+        if len(part) >= 2 and part[0] in ('"', "'") and part[-1] == part[0]:
+            continue
+        error = _check_css(part)
+        if error:
+            return error
+    return None
+
+
+class StepValidator:
+    """
+    Validates step lists before any browser is launched: schema shape, per-action
+    required fields and selector syntax. The jsonschema validator is built once at construction.
+    """
+
+    def __init__(self, schema: Dict[str, Any] = None):
+        self.schema = schema or STEPS_SCHEMA
+        self._validator = Draft7Validator(self.schema)
+
+    def validate(self, steps: Any) -> List[Dict[str, Any]]:
+        """Return a list of validation errors (empty when the steps are valid)"""
+        steps = _drop_nulls(steps)
+        errors = schema_errors(self._validator, steps)
+        if isinstance(steps, list):
+            for index, step in enumerate(steps):
+                if isinstance(step, dict) and isinstance(step.get('selector'), str):
+                    selector_error = check_selector(step['selector'])
+                    if selector_error:
+                        errors.append({'step': index, 'field': 'selector',
+                                       'error': f"invalid selector {step['selector']!r}: {selector_error}"})
+        errors.sort(key=lambda error: -1 if error['step'] is None else error['step'])
+        return errors
+
+
+step_validator = StepValidator()
+
+
+def validate_steps(steps: Any) -> List[Dict[str, Any]]:
+    """Validate a step list with the shared validator"""
+    return step_validator.validate(steps)
+
+
+def format_validation_errors(errors: List[Dict[str, Any]]) -> str:
+    """Render validation errors as a single human-readable message"""
+    messages = []
+    for error in errors:
+        location = f"step {error['step'] + 1}" if error.get('step') is not None else "steps"
+        if error.get('field'):
+            location += f" '{error['field']}'"
+        messages.append(f"{location} {error['error']}")
+    return "Invalid steps: " + "; ".join(messages)
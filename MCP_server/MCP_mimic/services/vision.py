@@ -3,24 +3,42 @@ import google.generativeai as genai
 import os
 import json
 import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable
+from services.metrics import metrics
 
 class VideoAnalyzer:
     def __init__(self):
         genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
         self.model = genai.GenerativeModel('gemini-1.5-pro')
     
-    def analyze_video(self, video_path_or_url: str) -> List[Dict[str, Any]]:
+    # Gemini calls, timed as 'gemini:*' dependency metrics
+    def _generate_content(self, contents):
+        with metrics.track('dependency', 'gemini:generate_content'):
+            return self.model.generate_content(contents)
+    
+    def _upload_file(self, path: str):
+        with metrics.track('dependency', 'gemini:upload_file'):
+            return genai.upload_file(path=path)
+    
+    def _get_file(self, name: str):
+        with metrics.track('dependency', 'gemini:get_file'):
+            return genai.get_file(name)
+    
+    def analyze_video(self, video_path_or_url: str,
+                      on_progress: Optional[Callable[[str], None]] = None) -> List[Dict[str, Any]]:
         """
         Analyze a tutorial video and extract structured browser automation steps
         Supports both local files and URLs
+        on_progress is called with a short message as each stage (upload, processing, analysis) starts
         """
+        progress = on_progress or (lambda message: None)
         try:
             # Check if it's a local file
             if os.path.isfile(video_path_or_url):
-                return self._analyze_local_video(video_path_or_url)
+                return self._analyze_local_video(video_path_or_url, progress)
+            progress("Analyzing video with Gemini")
             # Check if it's a YouTube URL
-            elif 'youtube.com' in video_path_or_url or 'youtu.be' in video_path_or_url:
+            if 'youtube.com' in video_path_or_url or 'youtu.be' in video_path_or_url:
                 return self._analyze_youtube_video(video_path_or_url)
             else:
                 return self._analyze_generic_video(video_path_or_url)
@@ -28,7 +46,7 @@ class VideoAnalyzer:
         except Exception as e:
             raise Exception(f"Video analysis failed: {str(e)}")
     
-    def _analyze_local_video(self, video_path: str) -> List[Dict[str, Any]]:
+    def _analyze_local_video(self, video_path: str, progress: Callable[[str], None]) -> List[Dict[str, Any]]:
         """
         Analyze local video file using Gemini's video analysis
         """
@@ -36,15 +54,17 @@ class VideoAnalyzer:
             print(f"📹 Analyzing local video: {video_path}")
             
             # Upload video file to Gemini
-            video_file = genai.upload_file(path=video_path)
+            progress("Uploading video to Gemini")
+            video_file = self._upload_file(video_path)
             print(f"✅ Video uploaded successfully: {video_file.name}")
             
             # Wait for processing
             import time
             while video_file.state.name == "PROCESSING":
                 print("⏳ Processing video...")
+                progress("Gemini is processing the video")
                 time.sleep(2)
-                video_file = genai.get_file(video_file.name)
+                video_file = self._get_file(video_file.name)
             
             if video_file.state.name == "FAILED":
                 raise Exception("Video processing failed")
@@ -128,7 +148,8 @@ class VideoAnalyzer:
             Return ONLY the JSON array, no other text:
             """
             
-            response = self.model.generate_content([video_file, prompt])
+            progress("Extracting steps with Gemini")
+            response = self._generate_content([video_file, prompt])
             response_text = response.text.strip()
             
             # Extract JSON from response
@@ -150,13 +171,14 @@ class VideoAnalyzer:
             
             # Try alternative analysis with simpler prompt
             try:
-                video_file = genai.upload_file(path=video_path)
+                progress("Retrying analysis with a simpler prompt")
+                video_file = self._upload_file(video_path)
                 
                 # Wait for processing
                 import time
                 while video_file.state.name == "PROCESSING":
                     time.sleep(2)
-                    video_file = genai.get_file(video_file.name)
+                    video_file = self._get_file(video_file.name)
                 
                 if video_file.state.name != "FAILED":
                     # Simpler, more direct prompt
@@ -179,7 +201,7 @@ class VideoAnalyzer:
                     Only return the JSON, nothing else.
                     """
                     
-                    response = self.model.generate_content([video_file, simple_prompt])
+                    response = self._generate_content([video_file, simple_prompt])
                     response_text = response.text.strip()
                     
                     json_start = response_text.find('[')
@@ -220,7 +242,7 @@ class VideoAnalyzer:
             Format: [{{"action": "goto", "url": "https://example.com"}}, ...]
             """
             
-            response = self.model.generate_content(prompt)
+            response = self._generate_content(prompt)
             
             # Extract JSON from response
             response_text = response.text
@@ -259,7 +281,7 @@ class VideoAnalyzer:
             ]
             """
             
-            response = self.model.generate_content(prompt)
+            response = self._generate_content(prompt)
             response_text = response.text
             
             # Extract JSON
@@ -351,7 +373,7 @@ class VideoAnalyzer:
             Provide a concise, actionable suggestion.
             """
             
-            response = self.model.generate_content(prompt)
+            response = self._generate_content(prompt)
             return response.text.strip()
             
         except Exception as e:
@@ -0,0 +1,136 @@
+# services/waits.py - Response-aware Step Waits
+"""
+Instead of sleeping after a click or search submit (or waiting for
+`networkidle`, which never settles on pages with streaming and analytics
+beacons), a step can wait for the network response that carries its data
+or for the URL it leads to:
+
+    {"action": "press", "key": "Enter",
+     "wait_for": {"response": "/youtubei/v1/search", "timeout": 8000}}
+
+Patterns containing `*` are globs matched against the whole URL; anything else
+is a substring. Search submits on known sites get a default response wait
+(SEARCH_RESPONSE_HINTS); `"wait_for": false` turns it off. Explicit waits fail
+the step when nothing matches in time, default waits only log and continue.
+"""
+import asyncio
+import fnmatch
+import re
+import time
+from typing import List, Dict, Any, Optional, Callable
+
+DEFAULT_WAIT_TIMEOUT_MS = 10000
+HEURISTIC_WAIT_TIMEOUT_MS = 8000
+POLL_INTERVAL_MS = 50
+
+# (page URL hint, responses that mean a search submitted there has its results)
+SEARCH_RESPONSE_HINTS = [
+    ('youtube', ['/youtubei/v1/search']),
+    ('google', ['/search?'])
+]
+
+# Steps that submit a search: Enter, type + submit, or a click on a search/submit button
+SEARCH_TRIGGER = re.compile(r'btnK|search[-_ ]?(icon|button|btn)|\bsubmit\b', re.I)
+RESULT_CLICK = re.compile(r'\bresults?\b|\blinks?\b', re.I)
+
+
+def url_matcher(pattern: str) -> Callable[[str], bool]:
+    """Predicate for a glob (when the pattern contains `*`) or substring URL pattern"""
+    if '*' in pattern:
+        return lambda url: fnmatch.fnmatchcase(url, pattern)
+    return lambda url: pattern in url
+
+
+def is_search_trigger(step: Dict[str, Any]) -> bool:
+    action = step.get('action')
+    if action == 'press':
+        return step.get('key') == 'Enter'
+    if action == 'type':
+        return bool(step.get('submit'))
+    if action == 'click':
+        description = step.get('description', '')
+        if RESULT_CLICK.search(description):
+            return False
+        return bool(SEARCH_TRIGGER.search(f"{step.get('selector', '')} {description}"))
+    return False
+
+
+def resolve_wait(step: Dict[str, Any], page_url: str) -> Optional[Dict[str, Any]]:
+    """
+    The wait to arm around a step: {'response': [patterns], 'url': pattern or None,
+    'timeout': ms, 'explicit': bool}, or None when the step needs no wait
+    """
+    spec = step.get('wait_for')
+    if spec is False:
+        return None
+    if isinstance(spec, dict) and (spec.get('response') or spec.get('url')):
+        return {
+            'response': [spec['response']] if spec.get('response') else [],
+            'url': spec.get('url'),
+            'timeout': spec.get('timeout') or DEFAULT_WAIT_TIMEOUT_MS,
+            'explicit': True
+        }
+    if not is_search_trigger(step):
+        return None
+    page_url = (page_url or '').lower()
+    for hint, patterns in SEARCH_RESPONSE_HINTS:
+        if hint in page_url:
+            return {'response': list(patterns), 'url': None, 'timeout': HEURISTIC_WAIT_TIMEOUT_MS, 'explicit': False}
+    return None
+
+
+def describe_wait(wait: Dict[str, Any]) -> str:
+    targets = [f"response {pattern}" for pattern in wait['response']]
+    if wait['url']:
+        targets.append(f"URL {wait['url']}")
+    return ' and '.join(targets)
+
+
+class ResponseWaiter:
+    """
+    Records the first response matching any pattern. Attach it before the step's
+    action so a response that arrives while the action is still running counts.
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = patterns
+        self._matchers = [url_matcher(pattern) for pattern in patterns]
+        self.matched_url = None
+
+    def _on_response(self, response) -> None:
+        if self.matched_url is None and any(match(response.url) for match in self._matchers):
+            self.matched_url = response.url
+
+    def attach(self, page) -> 'ResponseWaiter':
+        page.on('response', self._on_response)
+        return self
+
+    def detach(self, page) -> None:
+        try:
+            page.remove_listener('response', self._on_response)
+        except Exception:
+            pass
+
+    def _timeout_error(self, timeout_ms: float) -> TimeoutError:
+        return TimeoutError(f"Timeout {int(timeout_ms)}ms exceeded waiting for response matching {self.patterns}")
+
+    def wait(self, page, timeout_ms: float, check: Callable[[], None]) -> str:
+        """Sync wait; page.wait_for_timeout keeps Playwright's event dispatch running meanwhile"""
+        end = time.monotonic() + timeout_ms / 1000
+        while self.matched_url is None:
+            check()
+            remaining_ms = (end - time.monotonic()) * 1000
+            if remaining_ms <= 0:
+                raise self._timeout_error(timeout_ms)
+            page.wait_for_timeout(min(POLL_INTERVAL_MS, remaining_ms))
+        return self.matched_url
+
+    async def wait_async(self, timeout_ms: float, check: Callable[[], None]) -> str:
+        end = time.monotonic() + timeout_ms / 1000
+        while self.matched_url is None:
+            check()
+            remaining_ms = (end - time.monotonic()) * 1000
+            if remaining_ms <= 0:
+                raise self._timeout_error(timeout_ms)
+            await asyncio.sleep(min(POLL_INTERVAL_MS, remaining_ms) / 1000)
+        return self.matched_url
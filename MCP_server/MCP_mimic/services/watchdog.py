@@ -0,0 +1,151 @@
+# services/watchdog.py - Browser Memory Watchdog
+"""
+Measures what browsers cost and keeps it bounded:
+  - RSS of browser process trees (psutil when installed, /proc otherwise),
+  - open contexts/pages, counted from Playwright events,
+  - popups and tabs a run leaves behind, which are closed so only the page
+    the run drives stays open (WATCHDOG_MAX_PAGES per context).
+
+Long-lived browser owners (worker processes, the shared browser server) ask
+should_recycle() between runs and restart browsers that grew past
+WATCHDOG_MAX_RSS_MB. The numbers are exported through the health endpoints
+via snapshot().
+"""
+import os
+import threading
+from typing import List, Dict, Any, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+MB = 1024 * 1024
+
+
+def _proc_children() -> Dict[int, List[int]]:
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # Fields after the parenthesised command name: state, ppid, ...
+        ppid = int(stat.rsplit(')', 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def _proc_rss(pid: int) -> int:
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def process_tree_rss(pid: int, include_root: bool = True) -> Optional[int]:
+    """Resident memory in bytes of pid and all its descendants, or None when it cannot be measured"""
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            processes = root.children(recursive=True) + ([root] if include_root else [])
+        except psutil.Error:
+            return None
+        total = 0
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                continue
+        return total
+    if not os.path.isdir('/proc'):
+        return None
+    children = _proc_children()
+    total = _proc_rss(pid) if include_root else 0
+    pending = list(children.get(pid, []))
+    while pending:
+        child = pending.pop()
+        total += _proc_rss(child)
+        pending.extend(children.get(child, []))
+    return total
+
+
+class BrowserWatchdog:
+    """Process-wide browser memory accounting and recycling thresholds"""
+
+    def __init__(self, max_rss_mb: Optional[int] = None, max_pages: Optional[int] = None):
+        self.max_rss_mb = max_rss_mb or int(os.getenv('WATCHDOG_MAX_RSS_MB', '2048'))
+        self.max_pages = max_pages or int(os.getenv('WATCHDOG_MAX_PAGES', '1'))
+        self._lock = threading.Lock()
+        self._counts = {'contexts_open': 0, 'pages_open': 0, 'leaked_pages_closed': 0, 'recycles': 0}
+
+    def _add(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[key] += amount
+
+    # Context/page accounting
+    def track_context(self, context) -> None:
+        """Count a context and every page opened in it until they close"""
+        self._add('contexts_open')
+        context.on('close', lambda _: self._add('contexts_open', -1))
+        for page in context.pages:
+            self._track_page(page)
+        context.on('page', self._track_page)
+
+    def _track_page(self, page) -> None:
+        self._add('pages_open')
+        page.on('close', lambda _: self._add('pages_open', -1))
+
+    def leaked_pages(self, context, active_page) -> List[Any]:
+        """Pages beyond max_pages in a context, oldest first, never the page the run drives"""
+        pages = [page for page in context.pages if page is not active_page]
+        excess = len(pages) + 1 - self.max_pages
+        return pages[:excess] if excess > 0 else []
+
+    def close_leaked_pages(self, context, active_page) -> int:
+        closed = 0
+        for page in self.leaked_pages(context, active_page):
+            try:
+                page.close()
+                closed += 1
+            except Exception:
+                pass
+        self._add('leaked_pages_closed', closed)
+        return closed
+
+    async def close_leaked_pages_async(self, context, active_page) -> int:
+        closed = 0
+        for page in self.leaked_pages(context, active_page):
+            try:
+                await page.close()
+                closed += 1
+            except Exception:
+                pass
+        self._add('leaked_pages_closed', closed)
+        return closed
+
+    # Recycling
+    def over_limit(self, rss_bytes: Optional[int]) -> bool:
+        return rss_bytes is not None and rss_bytes > self.max_rss_mb * MB
+
+    def record_recycle(self) -> None:
+        self._add('recycles')
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters plus the RSS of every browser/driver process this process started"""
+        rss = process_tree_rss(os.getpid(), include_root=False)
+        with self._lock:
+            counts = dict(self._counts)
+        return {
+            **counts,
+            'browser_rss_mb': round(rss / MB, 1) if rss is not None else None,
+            'max_rss_mb': self.max_rss_mb,
+            'max_pages': self.max_pages
+        }
+
+
+browser_watchdog = BrowserWatchdog()
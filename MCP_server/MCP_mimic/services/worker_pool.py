@@ -0,0 +1,445 @@
+# services/worker_pool.py - Multi-process Browser Worker Pool
+"""
+Supervisor/worker split for browser automation.
+
+The supervisor (BrowserWorkerPool) runs inside the Flask or MCP process and
+dispatches step lists over a local authenticated socket to N worker processes.
+Each worker owns its own browsers and runs up to `per_worker_concurrency`
+step lists at once. Runs go through the same synchronous
+BrowserAutomator.execute_steps the Flask process uses in-process (selector
+fallbacks and search heuristics included), one thread per concurrent run;
+the worker's asyncio loop only reads supervisor messages and sends results.
+
+Workers are started as `python -m services.worker_pool --worker ...` so they
+never re-import the parent's main module (which would reconnect to MongoDB,
+configure Gemini, and so on).
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import secrets
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from multiprocessing.connection import Listener, Client
+from typing import List, Dict, Any, Optional
+from services.watchdog import browser_watchdog, process_tree_rss, MB
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class _WorkerHandle:
+    """Supervisor-side view of one worker process"""
+
+    def __init__(self, slot: int, process: subprocess.Popen):
+        self.slot = slot
+        self.process = process
+        self.conn = None
+        self.in_flight: Dict[str, Dict[str, Any]] = {}
+        self.completed = 0
+        self.started_at = time.time()
+        self.rss = None
+        self.retiring = False
+        self.exited = False
+
+    @property
+    def ready(self) -> bool:
+        return self.conn is not None
+
+
+class BrowserWorkerPool:
+    """
+    Dispatches step lists to browser worker processes, returns their results,
+    restarts crashed workers and enforces a per-worker concurrency limit.
+    """
+
+    def __init__(self, num_workers: Optional[int] = None, per_worker_concurrency: Optional[int] = None,
+                 automator_options: Optional[Dict[str, Any]] = None):
+        self.num_workers = num_workers or int(os.getenv('BROWSER_WORKERS', '0')) or (os.cpu_count() or 1)
+        self.per_worker_concurrency = per_worker_concurrency or int(os.getenv('BROWSER_WORKER_CONCURRENCY', '2'))
+        self.automator_options = automator_options or {}
+
+        self._authkey = secrets.token_bytes(16)
+        self._listener = None
+        self._workers: Dict[int, _WorkerHandle] = {}
+        self._queue = deque()
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.RLock()
+        self._task_ids = itertools.count(1)
+        self._running = False
+        self._crash_streaks: Dict[int, int] = {}
+        self.restarts = 0
+        self.recycles = 0
+        self.watchdog_interval = float(os.getenv('WATCHDOG_INTERVAL_SECONDS', '15'))
+
+    # Lifecycle
+    def start(self) -> 'BrowserWorkerPool':
+        with self._lock:
+            if self._running:
+                return self
+            self._listener = Listener(('127.0.0.1', 0), authkey=self._authkey)
+            self._running = True
+            for slot in range(self.num_workers):
+                self._spawn(slot)
+
+        threading.Thread(target=self._accept_loop, name='worker-pool-accept', daemon=True).start()
+        threading.Thread(target=self._monitor_loop, name='worker-pool-monitor', daemon=True).start()
+        print(f"🏭 Browser worker pool started: {self.num_workers} workers x {self.per_worker_concurrency} concurrent runs")
+        return self
+
+    def shutdown(self, timeout: float = 10.0):
+        """Stop all workers; pending and in-flight runs are failed"""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            workers = list(self._workers.values())
+            for worker in workers:
+                if worker.conn is not None:
+                    try:
+                        worker.conn.send(('stop',))
+                    except Exception:
+                        pass
+            while self._queue:
+                task = self._queue.popleft()
+                self._fail(task['task_id'], 'Worker pool shut down')
+
+        deadline = time.time() + timeout
+        for worker in workers:
+            try:
+                worker.process.wait(timeout=max(0.1, deadline - time.time()))
+            except subprocess.TimeoutExpired:
+                worker.process.kill()
+            for task_id in list(worker.in_flight):
+                self._fail(task_id, 'Worker pool shut down')
+        try:
+            self._listener.close()
+        except Exception:
+            pass
+
+    def _start_process(self, slot: int) -> subprocess.Popen:
+        address = self._listener.address
+        env = dict(os.environ)
+        env['BROWSER_WORKER_AUTHKEY'] = self._authkey.hex()
+        return subprocess.Popen(
+            [sys.executable, '-m', 'services.worker_pool', '--worker',
+             '--host', address[0], '--port', str(address[1]), '--slot', str(slot)],
+            cwd=PACKAGE_ROOT,
+            env=env
+        )
+
+    def _spawn(self, slot: int):
+        self._workers[slot] = _WorkerHandle(slot, self._start_process(slot))
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                conn = self._listener.accept()
+                kind, slot, pid = conn.recv()
+            except Exception:
+                if not self._running:
+                    return
+                continue
+            with self._lock:
+                worker = self._workers.get(slot)
+                if kind != 'hello' or worker is None or worker.process.pid != pid:
+                    conn.close()
+                    continue
+                conn.send(('configure', self.automator_options, self.per_worker_concurrency))
+                worker.conn = conn
+            threading.Thread(target=self._reader_loop, args=(worker,), name=f'worker-{slot}-reader', daemon=True).start()
+            self._dispatch()
+
+    def _reader_loop(self, worker: _WorkerHandle):
+        conn = worker.conn
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            if message[0] == 'done':
+                _, task_id, result = message
+                with self._lock:
+                    worker.in_flight.pop(task_id, None)
+                    worker.completed += 1
+                    future = self._futures.pop(task_id, None)
+                    self._retire_if_idle(worker)
+                if future is not None and not future.done():
+                    future.set_result(result)
+                self._dispatch()
+        self._handle_worker_exit(worker)
+
+    def _monitor_loop(self):
+        # Catches workers that die before connecting; connected workers are detected by their reader
+        last_sample = time.monotonic()
+        while self._running:
+            time.sleep(1.0)
+            with self._lock:
+                dead = [w for w in self._workers.values() if not w.ready and w.process.poll() is not None]
+            for worker in dead:
+                self._handle_worker_exit(worker)
+            if time.monotonic() - last_sample >= self.watchdog_interval:
+                last_sample = time.monotonic()
+                self._check_memory()
+
+    def _check_memory(self):
+        """Sample each worker's process tree and retire workers whose browsers grew past the limit"""
+        with self._lock:
+            workers = [w for w in self._workers.values() if w.ready]
+        for worker in workers:
+            worker.rss = process_tree_rss(worker.process.pid)
+            if not worker.retiring and browser_watchdog.over_limit(worker.rss):
+                print(f"♻️ Browser worker {worker.slot} uses {worker.rss // MB} MB; recycling after its current runs")
+                with self._lock:
+                    worker.retiring = True
+                    self._retire_if_idle(worker)
+
+    def _retire_if_idle(self, worker: _WorkerHandle):
+        # Called with the lock held; the worker's exit is handled like any other and it is restarted fresh
+        if worker.retiring and not worker.in_flight and worker.conn is not None:
+            try:
+                worker.conn.send(('stop',))
+            except Exception:
+                pass
+
+    def _handle_worker_exit(self, worker: _WorkerHandle):
+        # Only bookkeeping happens under the lock; reaping and respawning the
+        # process would otherwise stall submit(), stats() and cancel()
+        with self._lock:
+            if self._workers.get(worker.slot) is not worker or worker.exited:
+                return
+            worker.exited = True
+            lost = list(worker.in_flight)
+            worker.in_flight.clear()
+            conn, worker.conn = worker.conn, None
+            running = self._running
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        if not running:
+            for task_id in lost:
+                self._fail(task_id, 'Worker pool shut down')
+            return
+        try:
+            exit_code = worker.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            worker.process.kill()
+            exit_code = 'killed'
+        with self._lock:
+            if worker.retiring:
+                print(f"♻️ Recycled browser worker {worker.slot} (pid {worker.process.pid})")
+                self.recycles += 1
+                browser_watchdog.record_recycle()
+                delay = 0
+            else:
+                # Back off when a worker keeps dying right after start (bad install, no browsers, ...)
+                if time.time() - worker.started_at < 10:
+                    streak = self._crash_streaks.get(worker.slot, 0) + 1
+                else:
+                    streak = 0
+                self._crash_streaks[worker.slot] = streak
+                delay = min(30, 2 ** streak) if streak else 0
+                print(f"💥 Browser worker {worker.slot} (pid {worker.process.pid}) exited with {exit_code}; restarting in {delay}s")
+                self.restarts += 1
+        for task_id in lost:
+            self._fail(task_id, f'Browser worker {worker.slot} crashed during the run')
+        if delay:
+            threading.Timer(delay, self._respawn, args=(worker,)).start()
+        else:
+            self._respawn(worker)
+
+    def _respawn(self, worker: _WorkerHandle):
+        with self._lock:
+            if not (self._running and self._workers.get(worker.slot) is worker):
+                return
+        process = self._start_process(worker.slot)
+        with self._lock:
+            if self._running and self._workers.get(worker.slot) is worker:
+                self._workers[worker.slot] = _WorkerHandle(worker.slot, process)
+                return
+        # The pool shut down while the process was starting
+        process.kill()
+
+    def _fail(self, task_id: str, error: str):
+        future = self._futures.pop(task_id, None)
+        if future is not None and not future.done():
+            future.set_result({'success': False, 'error': error, 'log': []})
+
+    # Dispatch
+    def _dispatch(self):
+        with self._lock:
+            while self._queue:
+                candidates = [w for w in self._workers.values()
+                              if w.ready and not w.retiring and len(w.in_flight) < self.per_worker_concurrency]
+                if not candidates:
+                    return
+                worker = min(candidates, key=lambda w: len(w.in_flight))
+                task = self._queue.popleft()
+                try:
+                    worker.conn.send(('run', task['task_id'], task['payload']))
+                except Exception:
+                    self._queue.appendleft(task)
+                    return
+                worker.in_flight[task['task_id']] = task
+
+    def submit(self, steps: List[Dict[str, Any]], session_user: Optional[str] = None,
+               run_id: Optional[str] = None, deadline_seconds: Optional[float] = None) -> Future:
+        """Queue a step list; the returned future resolves to the automator's result dict"""
+        if not self._running:
+            self.start()
+        task_id = f"task-{next(self._task_ids)}"
+        future = Future()
+        with self._lock:
+            self._futures[task_id] = future
+            self._queue.append({
+                'task_id': task_id,
+                'run_id': run_id,
+                'payload': {
+                    'steps': steps,
+                    'session_user': session_user,
+                    'run_id': run_id,
+                    'deadline_seconds': deadline_seconds
+                },
+                'submitted_at': time.time()
+            })
+        self._dispatch()
+        return future
+
+    def cancel(self, run_id: str, reason: str = 'cancelled by request') -> bool:
+        """Drop a queued run or ask the worker executing it to stop"""
+        with self._lock:
+            for task in list(self._queue):
+                if task['run_id'] == run_id:
+                    self._queue.remove(task)
+                    self._fail(task['task_id'], f"Run cancelled: {reason}")
+                    return True
+            for worker in self._workers.values():
+                if any(task['run_id'] == run_id for task in worker.in_flight.values()):
+                    try:
+                        worker.conn.send(('cancel', run_id, reason))
+                        return True
+                    except Exception:
+                        return False
+        return False
+
+    def execute(self, steps: List[Dict[str, Any]], session_user: Optional[str] = None,
+                timeout: Optional[float] = None, run_id: Optional[str] = None,
+                deadline_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Blocking helper around submit(). A run that outlives timeout is cancelled,
+        so it stops driving a browser and frees its worker slot.
+        """
+        # The run needs an ID so it can be cancelled on timeout
+        run_id = run_id or f"pool-{uuid.uuid4().hex[:12]}"
+        future = self.submit(steps, session_user=session_user, run_id=run_id, deadline_seconds=deadline_seconds)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            cancelled = self.cancel(run_id, 'worker pool timeout')
+            return {
+                'success': False,
+                'error': f"Worker pool run did not finish within {timeout}s"
+                         + (" and was cancelled" if cancelled else ""),
+                'run_id': run_id,
+                'cancelled': cancelled,
+                'deadline_exceeded': True,
+                'log': []
+            }
+        except Exception as e:
+            return {'success': False, 'error': f"Worker pool run failed: {type(e).__name__}: {e}", 'run_id': run_id, 'log': []}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'running': self._running,
+                'workers': [{
+                    'slot': worker.slot,
+                    'pid': worker.process.pid,
+                    'ready': worker.ready,
+                    'in_flight': len(worker.in_flight),
+                    'completed': worker.completed,
+                    'uptime_seconds': round(time.time() - worker.started_at, 1),
+                    'rss_mb': round(worker.rss / MB, 1) if worker.rss is not None else None,
+                    'retiring': worker.retiring
+                } for worker in self._workers.values()],
+                'queued': len(self._queue),
+                'per_worker_concurrency': self.per_worker_concurrency,
+                'restarts': self.restarts,
+                'recycles': self.recycles
+            }
+
+
+# Worker process
+async def _worker_loop(conn, slot: int):
+    from services.browser import BrowserAutomator
+    from services.runs import run_registry
+
+    kind, automator_options, concurrency = conn.recv()
+    automator = BrowserAutomator(**automator_options)
+    loop = asyncio.get_running_loop()
+    # Sync Playwright keeps one driver per thread, so each concurrent run gets its own thread
+    runners = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"worker-{slot}-run")
+    send_lock = asyncio.Lock()
+    running = set()
+    print(f"🧑‍🏭 Browser worker {slot} ready (pid {os.getpid()}, concurrency {concurrency})")
+
+    def execute(payload: Dict[str, Any]) -> Dict[str, Any]:
+        return automator.execute_steps(
+            payload['steps'],
+            session_user=payload.get('session_user'),
+            run_id=payload.get('run_id'),
+            deadline_seconds=payload.get('deadline_seconds')
+        )
+
+    async def run(task_id: str, payload: Dict[str, Any]):
+        try:
+            result = await loop.run_in_executor(runners, execute, payload)
+        except Exception as e:
+            result = {'success': False, 'error': f"Worker error: {str(e)}", 'log': []}
+        async with send_lock:
+            conn.send(('done', task_id, result))
+
+    while True:
+        try:
+            message = await loop.run_in_executor(None, conn.recv)
+        except (EOFError, OSError):
+            break
+        if message[0] == 'stop':
+            break
+        if message[0] == 'cancel':
+            run_registry.cancel(message[1], message[2])
+        if message[0] == 'run':
+            task = asyncio.create_task(run(message[1], message[2]))
+            running.add(task)
+            task.add_done_callback(running.discard)
+
+    if running:
+        await asyncio.gather(*running, return_exceptions=True)
+    runners.shutdown(wait=False)
+
+
+def _worker_main(host: str, port: int, slot: int):
+    authkey = bytes.fromhex(os.environ['BROWSER_WORKER_AUTHKEY'])
+    conn = Client((host, port), authkey=authkey)
+    conn.send(('hello', slot, os.getpid()))
+    try:
+        asyncio.run(_worker_loop(conn, slot))
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Browser automation worker process')
+    parser.add_argument('--worker', action='store_true', required=True)
+    parser.add_argument('--host', required=True)
+    parser.add_argument('--port', type=int, required=True)
+    parser.add_argument('--slot', type=int, required=True)
+    args = parser.parse_args()
+    _worker_main(args.host, args.port, args.slot)
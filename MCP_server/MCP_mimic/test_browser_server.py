@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the shared browser server client
+"""
+import unittest
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.browser_server import BrowserServerClient, client_for
+
+
+class FakeChromium:
+    """connect_over_cdp that fails a given number of times before succeeding"""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = 0
+
+    def connect_over_cdp(self, endpoint, timeout=None):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise Exception('connect ECONNREFUSED 127.0.0.1:9222')
+        return object()
+
+
+class FakePlaywright:
+    def __init__(self, failures=0):
+        self.chromium = FakeChromium(failures)
+
+
+class TestBrowserServerClient(unittest.TestCase):
+    """Test per-process context slots and reconnects"""
+
+    def test_context_slots_are_limited_per_client(self):
+        client = BrowserServerClient('http://127.0.0.1:9222', max_contexts=1, acquire_timeout=0.05)
+        browser = client.connect(FakePlaywright())
+        self.assertEqual(client.stats()['contexts_in_use'], 1)
+        with self.assertRaises(Exception):
+            client.connect(FakePlaywright())
+        client.release(browser)
+        client.release(browser)
+        self.assertEqual(client.stats()['contexts_in_use'], 0)
+        client.release(client.connect(FakePlaywright()))
+
+    def test_reconnects_while_server_restarts(self):
+        client = BrowserServerClient('http://127.0.0.1:9222', max_contexts=1, connect_timeout=5)
+        playwright = FakePlaywright(failures=1)
+        client.release(client.connect(playwright))
+        self.assertEqual(playwright.chromium.calls, 2)
+        self.assertEqual(client.reconnects, 1)
+
+    def test_gives_up_and_frees_slot_when_server_stays_down(self):
+        client = BrowserServerClient('http://127.0.0.1:9222', max_contexts=1, connect_timeout=0.1, acquire_timeout=0.05)
+        with self.assertRaises(Exception):
+            client.connect(FakePlaywright(failures=100))
+        client.release(client.connect(FakePlaywright()))
+
+    def test_client_is_shared_per_endpoint(self):
+        self.assertIs(client_for('http://127.0.0.1:9333'), client_for('http://127.0.0.1:9333'))
+
+
+if __name__ == '__main__':
+    unittest.main()
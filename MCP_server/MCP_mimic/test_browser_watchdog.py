@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the browser memory watchdog
+"""
+import unittest
+import os
+import subprocess
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.watchdog import BrowserWatchdog, process_tree_rss, MB
+
+
+class FakeEmitter:
+    def __init__(self):
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers.setdefault(event, []).append(handler)
+
+    def emit(self, event, value=None):
+        for handler in self.handlers.get(event, []):
+            handler(value)
+
+
+class FakePage(FakeEmitter):
+    def __init__(self, context):
+        super().__init__()
+        self.context = context
+
+    def close(self):
+        self.context.pages.remove(self)
+        self.emit('close', self)
+
+
+class FakeContext(FakeEmitter):
+    def __init__(self):
+        super().__init__()
+        self.pages = []
+
+    def new_page(self):
+        page = FakePage(self)
+        self.pages.append(page)
+        self.emit('page', page)
+        return page
+
+
+class TestBrowserWatchdog(unittest.TestCase):
+    """Test memory sampling, page accounting and leaked page cleanup"""
+
+    @unittest.skipUnless(os.path.isdir('/proc'), 'needs /proc or psutil')
+    def test_process_tree_rss_includes_children(self):
+        child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(5)'])
+        try:
+            own = process_tree_rss(os.getpid(), include_root=True)
+            children = process_tree_rss(os.getpid(), include_root=False)
+            self.assertGreater(children, 0)
+            self.assertGreater(own, children)
+        finally:
+            child.kill()
+            child.wait()
+
+    def test_counts_pages_and_closes_leaked_popups(self):
+        watchdog = BrowserWatchdog(max_rss_mb=100, max_pages=1)
+        context = FakeContext()
+        watchdog.track_context(context)
+        main_page = context.new_page()
+        context.new_page()
+        context.new_page()
+        self.assertEqual(watchdog.snapshot()['pages_open'], 3)
+        self.assertEqual(watchdog.close_leaked_pages(context, main_page), 2)
+        self.assertEqual(context.pages, [main_page])
+        snapshot = watchdog.snapshot()
+        self.assertEqual((snapshot['pages_open'], snapshot['leaked_pages_closed']), (1, 2))
+        context.emit('close')
+        self.assertEqual(watchdog.snapshot()['contexts_open'], 0)
+
+    def test_over_limit(self):
+        watchdog = BrowserWatchdog(max_rss_mb=100)
+        self.assertFalse(watchdog.over_limit(None))
+        self.assertFalse(watchdog.over_limit(100 * MB))
+        self.assertTrue(watchdog.over_limit(101 * MB))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the failure screenshot ring buffer
+"""
+import unittest
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.capture import ScreenshotRingBuffer
+
+
+class FakePage:
+    """Minimal stand-in for a sync Playwright page"""
+
+    def __init__(self):
+        self.calls = 0
+        self.last_options = None
+
+    def screenshot(self, **options):
+        self.calls += 1
+        self.last_options = options
+        return f"frame-{self.calls}".encode()
+
+
+class BrokenPage:
+    def screenshot(self, **options):
+        raise RuntimeError("page closed")
+
+
+class TestScreenshotRingBuffer(unittest.TestCase):
+    """Test bounded in-memory capture"""
+
+    def test_keeps_only_last_frames(self):
+        buffer = ScreenshotRingBuffer(size=3, quality=30)
+        page = FakePage()
+        for i in range(5):
+            buffer.capture(page, i, 'click')
+
+        frames = buffer.drain()
+        self.assertEqual([frame['step'] for frame in frames], [2, 3, 4])
+        self.assertEqual(page.last_options['type'], 'jpeg')
+        self.assertEqual(page.last_options['quality'], 30)
+        self.assertEqual(len(buffer), 0)
+
+    def test_capture_errors_are_ignored(self):
+        buffer = ScreenshotRingBuffer(size=2)
+        self.assertFalse(buffer.capture(BrokenPage(), 0, 'goto'))
+        self.assertEqual(len(buffer), 0)
+
+    def test_flush_writes_frames_and_empties_buffer(self):
+        buffer = ScreenshotRingBuffer(size=2)
+        page = FakePage()
+        buffer.capture(page, 0, 'goto')
+        buffer.capture(page, 1, 'type')
+
+        with tempfile.TemporaryDirectory() as directory:
+            paths = buffer.flush_to_disk(directory, 'run_test')
+            self.assertEqual(len(paths), 2)
+            with open(paths[-1], 'rb') as f:
+                self.assertEqual(f.read(), b'frame-2')
+            self.assertEqual(buffer.flush_to_disk(directory, 'run_test'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
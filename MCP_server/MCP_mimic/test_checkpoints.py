@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Unit tests for checkpointed execution (eviction, expiry, renewal on resume)
+"""
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.browser import BrowserAutomator
+from services.session_store import SessionStore
+
+STEPS = [
+    {"action": "goto", "url": "https://example.com"},
+    {"action": "click", "selector": "#login"},
+    {"action": "type", "selector": "#email", "text": "user@example.com"}
+]
+
+
+class FakeBrowser:
+    """Async browser and Playwright driver stand-in that records being closed"""
+
+    def __init__(self):
+        self.closed = False
+        self.stopped = False
+
+    async def close(self):
+        self.closed = True
+
+    async def stop(self):
+        self.stopped = True
+
+
+class FakePage:
+    def __init__(self, browser):
+        self.browser = browser
+
+
+class TestCheckpoints(unittest.TestCase):
+    """Test the checkpoint lifecycle against fake browsers, without launching Chromium"""
+
+    def make_automator(self, grace=60, limit=3, results=()):
+        automator = BrowserAutomator(
+            checkpoint_on_failure=True, checkpoint_grace=grace, max_checkpoints=limit,
+            session_store=SessionStore(tempfile.mkdtemp()), browser_server=None, demo_mode=False
+        )
+        automator.resumed = []
+        scripted = list(results)
+
+        async def run_steps(page, steps, start_index, log, context=None, session_plan=None):
+            automator.resumed.append((page, list(steps), start_index))
+            return {**scripted.pop(0), 'log': log}
+
+        automator._run_steps_async = run_steps
+        return automator
+
+    async def checkpoint(self, automator, failed_step=1):
+        browser = FakeBrowser()
+        info = await automator._store_checkpoint(
+            browser, browser, FakePage(browser), STEPS,
+            {'success': False, 'failed_step': failed_step}, []
+        )
+        return info['checkpoint_id'], browser
+
+    async def release_all(self, automator):
+        for checkpoint_id in list(automator._checkpoints):
+            await automator.release_checkpoint(checkpoint_id)
+
+    def test_oldest_checkpoint_is_evicted_at_limit(self):
+        async def scenario():
+            automator = self.make_automator(limit=2)
+            first, first_browser = await self.checkpoint(automator)
+            second, second_browser = await self.checkpoint(automator)
+            third, third_browser = await self.checkpoint(automator)
+            held = [entry['checkpoint_id'] for entry in automator.list_checkpoints()]
+            await self.release_all(automator)
+            return held, first, second, third, first_browser, second_browser
+
+        held, first, second, third, first_browser, second_browser = asyncio.run(scenario())
+        self.assertEqual(held, [second, third])
+        self.assertTrue(first_browser.closed and first_browser.stopped)
+        self.assertNotIn(first, held)
+
+    def test_checkpoint_is_released_on_expiry(self):
+        async def scenario():
+            automator = self.make_automator(grace=0.05)
+            checkpoint_id, browser = await self.checkpoint(automator)
+            self.assertEqual(len(automator.list_checkpoints()), 1)
+            await asyncio.sleep(0.2)
+            result = await automator.resume_steps_async(checkpoint_id, STEPS[1:])
+            return automator, browser, result
+
+        automator, browser, result = asyncio.run(scenario())
+        self.assertEqual(automator.list_checkpoints(), [])
+        self.assertTrue(browser.closed)
+        self.assertIn('not found or expired', result['error'])
+        self.assertEqual(automator.resumed, [])
+
+    def test_failed_resume_renews_checkpoint(self):
+        async def scenario():
+            automator = self.make_automator(results=[{'success': False, 'error': 'still broken', 'failed_step': 2}])
+            checkpoint_id, browser = await self.checkpoint(automator, failed_step=1)
+            corrected = [{"action": "click", "selector": "#sign-in"}, STEPS[2]]
+            result = await automator.resume_steps_async(checkpoint_id, corrected)
+            held = automator.list_checkpoints()
+            await self.release_all(automator)
+            return automator, checkpoint_id, browser, result, held
+
+        automator, checkpoint_id, browser, result, held = asyncio.run(scenario())
+        self.assertEqual(automator.resumed[0][2], 1)
+        self.assertFalse(result['success'])
+        self.assertEqual(result['resumed_from_step'], 1)
+        self.assertNotEqual(result['checkpoint_id'], checkpoint_id)
+        self.assertEqual([entry['checkpoint_id'] for entry in held], [result['checkpoint_id']])
+        self.assertEqual(held[0]['failed_step'], 2)
+        self.assertEqual(held[0]['total_steps'], 3)
+
+    def test_successful_resume_closes_browser(self):
+        async def scenario():
+            automator = self.make_automator(results=[{'success': True}])
+            checkpoint_id, browser = await self.checkpoint(automator)
+            result = await automator.resume_steps_async(checkpoint_id, STEPS[1:])
+            return automator, browser, result
+
+        automator, browser, result = asyncio.run(scenario())
+        self.assertTrue(result['success'])
+        self.assertNotIn('checkpoint_id', result)
+        self.assertTrue(browser.closed)
+        self.assertEqual(automator.list_checkpoints(), [])
+
+    def test_invalid_resume_steps_keep_checkpoint(self):
+        async def scenario():
+            automator = self.make_automator()
+            checkpoint_id, browser = await self.checkpoint(automator)
+            result = await automator.resume_steps_async(checkpoint_id, [{"action": "click"}])
+            held = automator.list_checkpoints()
+            await self.release_all(automator)
+            return automator, checkpoint_id, browser, result, held
+
+        automator, checkpoint_id, browser, result, held = asyncio.run(scenario())
+        self.assertFalse(result['success'])
+        self.assertTrue(result['validation_errors'])
+        self.assertEqual([entry['checkpoint_id'] for entry in held], [checkpoint_id])
+        self.assertEqual(automator.resumed, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Unit tests for recording an execution's progress while its run is in progress
+"""
+import unittest
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import mcp_server
+from services.progress import ProgressReporter
+
+
+class FakeDatabase:
+    """Records execution writes in order; updates can be slowed down to overlap"""
+
+    def __init__(self, update_delay=0.0):
+        self.writes = []
+        self.update_delay = update_delay
+
+    async def insert_execution(self, execution_doc):
+        self.writes.append(('insert', dict(execution_doc)))
+        return 'exec-1'
+
+    async def update_execution(self, execution_id, update_doc):
+        await asyncio.sleep(self.update_delay)
+        self.writes.append(('update', dict(update_doc)))
+        return True
+
+
+class TestExecutionRecorder(unittest.TestCase):
+    """Test that an execution is visible as running and updated per step"""
+
+    def setUp(self):
+        self.saved = mcp_server.db._instance
+
+    def tearDown(self):
+        mcp_server.db._instance = self.saved
+
+    def test_execution_is_inserted_running_and_updated_per_step(self):
+        database = FakeDatabase(update_delay=0.01)
+        mcp_server.db._instance = database
+
+        async def run():
+            recorder = mcp_server.ExecutionRecorder(ProgressReporter())
+            execution_id = await recorder.start({'video_id': 'v1', 'total_steps': 2})
+            self.assertEqual(database.writes[0][1]['status'], 'running')
+            recorder.on_step({'step': 0, 'action': 'goto', 'status': 'ok'})
+            await asyncio.sleep(0.05)
+            recorder.on_step({'step': 1, 'action': 'click', 'status': 'failed'})
+            await recorder.finish({'status': 'failed', 'failed_step': 1})
+            return execution_id
+
+        self.assertEqual(asyncio.run(run()), 'exec-1')
+        kinds = [kind for kind, _ in database.writes]
+        self.assertEqual(kinds, ['insert', 'update', 'update', 'update'])
+        self.assertEqual(database.writes[1][1]['completed_steps'], 1)
+        self.assertEqual(database.writes[2][1]['completed_steps'], 2)
+        self.assertEqual(database.writes[3][1]['status'], 'failed')
+        self.assertIn('finished_at', database.writes[3][1])
+
+
+if __name__ == '__main__':
+    unittest.main()
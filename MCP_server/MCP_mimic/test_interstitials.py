@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the consent/popup interstitial registry
+"""
+import unittest
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.interstitials import InterstitialRegistry, DEFAULT_INTERSTITIALS
+
+
+class FakeLocator:
+    def __init__(self, page, selector):
+        self.page = page
+        self.selector = selector
+
+    def locator(self, selector):
+        return FakeLocator(self.page, f"{self.selector} >> {selector}")
+
+    @property
+    def first(self):
+        return self
+
+    def click(self, timeout=None):
+        if self.page.fail_clicks:
+            raise Exception(f"Timeout {timeout}ms exceeded")
+        self.page.clicked.append(self.selector)
+
+
+class FakePage:
+    def __init__(self, fail_clicks=False):
+        self.handlers = {}
+        self.clicked = []
+        self.fail_clicks = fail_clicks
+
+    def locator(self, selector):
+        return FakeLocator(self, selector)
+
+    def add_locator_handler(self, locator, handler, no_wait_after=False):
+        self.handlers[locator.selector] = handler
+
+
+class TestInterstitialRegistry(unittest.TestCase):
+    """Test handler installation, dismissal and fire counts"""
+
+    def test_defaults_cover_consent_cookie_and_signin_overlays(self):
+        names = {item['name'] for item in DEFAULT_INTERSTITIALS}
+        self.assertTrue({'google_consent', 'youtube_consent', 'onetrust_cookie_banner', 'youtube_signin_nag'} <= names)
+
+    def test_handler_dismisses_and_counts(self):
+        registry = InterstitialRegistry([{'name': 'banner', 'trigger': '#banner', 'dismiss': '#banner .close'}])
+        page, log = FakePage(), []
+        self.assertEqual(registry.install(page, log), 1)
+        page.handlers['#banner']()
+        self.assertEqual(page.clicked, ['#banner .close >> visible=true'])
+        self.assertEqual(registry.stats()['banner'], {'fired': 1, 'dismissed': 1, 'failed': 0})
+        self.assertIn("🧹 Dismissed interstitial: banner", log)
+
+    def test_failed_dismiss_is_counted_not_raised(self):
+        registry = InterstitialRegistry([{'name': 'banner', 'trigger': '#banner', 'dismiss': '#nope'}])
+        page = FakePage(fail_clicks=True)
+        registry.install(page)
+        page.handlers['#banner']()
+        self.assertEqual(registry.stats()['banner']['failed'], 1)
+
+    def test_register_and_unregister(self):
+        registry = InterstitialRegistry()
+        registry.register('nag', '#nag', '#nag button')
+        self.assertEqual(registry.install(FakePage()), 1)
+        self.assertTrue(registry.unregister('nag'))
+        self.assertEqual(registry.install(FakePage()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
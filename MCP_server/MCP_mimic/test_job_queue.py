@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the background job queue behind submit_job/get_job/cancel_job
+"""
+import unittest
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.jobs import JobQueue, JobQueueFull
+
+
+class MemoryJobStore:
+    """In-memory stand-in for the jobs collection"""
+
+    def __init__(self, jobs=None):
+        self.jobs = {job['job_id']: job for job in (jobs or [])}
+
+    async def insert_job(self, job):
+        self.jobs[job['job_id']] = job
+
+    async def update_job(self, job_id, update):
+        self.jobs[job_id].update(update)
+        return True
+
+    async def get_job(self, job_id):
+        job = self.jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def get_jobs_by_status(self, statuses):
+        return [dict(job) for job in self.jobs.values() if job['status'] in statuses]
+
+
+async def runner(tool, arguments, progress):
+    for step in range(arguments.get('steps', 1)):
+        await asyncio.sleep(arguments.get('seconds', 0.01))
+        progress.advance(f"step {step + 1}", force=True)
+    if arguments.get('fail'):
+        return {'error': 'Step 2 failed'}
+    return {'tool': tool, 'success': True, 'error': None}
+
+
+async def wait_for(store, job_id, *statuses):
+    for _ in range(200):
+        if store.jobs[job_id]['status'] in statuses:
+            return store.jobs[job_id]
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} stuck in {store.jobs[job_id]['status']}")
+
+
+class TestJobQueue(unittest.TestCase):
+    """Test submission, completion, failure, cancellation and restart recovery"""
+
+    def test_submit_returns_immediately_and_job_completes(self):
+        store = MemoryJobStore()
+
+        async def scenario():
+            queue = JobQueue(runner, store, workers=2, progress_interval=0)
+            job = await queue.submit('execute_browser_action', {'steps': 3, 'seconds': 0.05})
+            self.assertEqual(job['status'], 'queued')
+            self.assertIsNone(store.jobs[job['job_id']]['result'])
+            failed = await queue.submit('run_task_from_video', {'fail': True})
+            done = await wait_for(store, job['job_id'], 'completed')
+            await wait_for(store, failed['job_id'], 'failed')
+            stats = queue.stats()
+            await queue.shutdown()
+            return done, store.jobs[failed['job_id']], stats
+
+        done, failed, stats = asyncio.run(scenario())
+        self.assertTrue(done['result']['success'])
+        self.assertEqual(done['progress']['message'], 'step 3')
+        self.assertEqual(failed['error'], 'Step 2 failed')
+        self.assertEqual((stats['submitted'], stats['completed'], stats['failed']), (2, 1, 1))
+
+    def test_cancel_running_and_queued_jobs(self):
+        store = MemoryJobStore()
+
+        async def scenario():
+            queue = JobQueue(runner, store, workers=1, progress_interval=0)
+            running = await queue.submit('run_task_from_video', {'steps': 1, 'seconds': 5})
+            queued = await queue.submit('analyze_video', {})
+            await wait_for(store, running['job_id'], 'running')
+            self.assertTrue((await queue.cancel(queued['job_id']))['cancelled'])
+            self.assertTrue((await queue.cancel(running['job_id'], 'user gave up'))['cancelled'])
+            await wait_for(store, running['job_id'], 'cancelled')
+            again = await queue.cancel(running['job_id'])
+            await queue.shutdown()
+            return again
+
+        again = asyncio.run(scenario())
+        statuses = sorted(job['status'] for job in store.jobs.values())
+        self.assertEqual(statuses, ['cancelled', 'cancelled'])
+        self.assertFalse(again['cancelled'])
+        self.assertTrue(any('user gave up' in job['error'] for job in store.jobs.values()))
+
+    def test_recovery_and_queue_limit(self):
+        store = MemoryJobStore([
+            {'job_id': 'left-running', 'tool': 'analyze_video', 'arguments': {}, 'status': 'running'},
+            {'job_id': 'left-queued', 'tool': 'analyze_video', 'arguments': {}, 'status': 'queued'}
+        ])
+
+        async def scenario():
+            queue = JobQueue(runner, store, workers=1, max_queued=1, progress_interval=0)
+            await queue.start()
+            await wait_for(store, 'left-queued', 'completed')
+            await queue.submit('analyze_video', {'seconds': 1})
+            with self.assertRaises(JobQueueFull):
+                await queue.submit('analyze_video', {})
+                await queue.submit('analyze_video', {})
+            await queue.shutdown()
+
+        asyncio.run(scenario())
+        self.assertEqual(store.jobs['left-running']['status'], 'failed')
+
+
+if __name__ == '__main__':
+    unittest.main()
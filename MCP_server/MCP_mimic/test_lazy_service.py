@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Unit tests for lazily constructed services
+"""
+import unittest
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.lazy import LazyService
+
+
+class Analyzer:
+    def __init__(self):
+        time.sleep(0.05)
+
+    def analyze(self, url):
+        return f"steps for {url}"
+
+
+class TestLazyService(unittest.TestCase):
+    """Test first-use construction, sharing and retry after failure"""
+
+    def test_constructed_once_on_first_use(self):
+        built = []
+
+        def factory():
+            built.append(True)
+            return Analyzer()
+
+        service = LazyService('video_analyzer', factory)
+        self.assertFalse(service.loaded)
+        instances = []
+        threads = [threading.Thread(target=lambda: instances.append(service.get())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(built), 1)
+        self.assertEqual(len({id(instance) for instance in instances}), 1)
+        self.assertEqual(service.analyze('https://example.com'), "steps for https://example.com")
+        self.assertTrue(service.status()['loaded'])
+
+    def test_failed_construction_is_retried(self):
+        attempts = []
+
+        def factory():
+            attempts.append(True)
+            if len(attempts) == 1:
+                raise ConnectionError("mongo unreachable")
+            return Analyzer()
+
+        service = LazyService('database', factory)
+        with self.assertRaises(ConnectionError):
+            service.get()
+        self.assertEqual(service.status()['last_error'], "mongo unreachable")
+        self.assertIsInstance(service.get(), Analyzer)
+        self.assertIsNone(service.status()['last_error'])
+        with self.assertRaises(AttributeError):
+            service._missing
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Unit tests for listing endpoints rejecting bad pagination cursors (Flask /tasks and the MCP get_tasks tool)
+"""
+import unittest
+import asyncio
+import base64
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+BAD_ID_CURSOR = base64.urlsafe_b64encode(json.dumps({"v": 1, "id": "nothex"}).encode()).decode()
+
+
+class TestListEndpoints(unittest.TestCase):
+    """A well-formed cursor with an invalid id is a client error, found before any query runs"""
+
+    def test_flask_tasks_returns_400(self):
+        import main
+        client = main.app.test_client()
+        for cursor in (BAD_ID_CURSOR, 'not-a-cursor'):
+            response = client.get('/tasks', query_string={'cursor': cursor})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('Invalid cursor', response.get_json()['error'])
+
+    def test_mcp_get_tasks_reports_invalid_cursor(self):
+        import mcp_server
+
+        async def call():
+            database = mcp_server.db.get()
+
+            async def count_videos():
+                return 0
+
+            database.count_videos = count_videos
+            return await mcp_server._call_tool('get_tasks', {'cursor': BAD_ID_CURSOR}, mcp_server.ProgressReporter())
+
+        result = asyncio.run(call())
+        self.assertIn('Invalid cursor', result['error'])
+        self.assertEqual(result['invalid_argument'], 'cursor')
+
+
+if __name__ == '__main__':
+    unittest.main()
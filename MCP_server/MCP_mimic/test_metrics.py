@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the in-process metrics registry and its Prometheus output
+"""
+import unittest
+import os
+import sys
+import threading
+import urllib.request
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.metrics import Metrics, metrics, start_metrics_server
+
+
+class TestMetrics(unittest.TestCase):
+    """Test counting, in-flight tracking, percentiles and the exposition format"""
+
+    def test_track_counts_calls_errors_and_in_flight(self):
+        registry = Metrics()
+        with registry.track('tool', 'get_task'):
+            self.assertEqual(registry.snapshot('tool')['tool']['get_task']['in_flight'], 1)
+        with registry.track('tool', 'get_task') as call:
+            call.failed()
+        with self.assertRaises(ValueError):
+            with registry.track('tool', 'get_task'):
+                raise ValueError("bad id")
+        series = registry.snapshot()['tool']['get_task']
+        self.assertEqual((series['count'], series['errors'], series['in_flight']), (3, 2, 0))
+        self.assertAlmostEqual(series['error_rate'], 0.6667)
+        self.assertEqual(registry.snapshot('dependency'), {
+            'enabled': True, 'uptime_seconds': registry.snapshot()['uptime_seconds'], 'dependency': {}
+        })
+
+    def test_percentiles_from_histogram(self):
+        registry = Metrics()
+        for _ in range(90):
+            registry.observe('dependency', 'mongo:find', 0.002)
+        for _ in range(10):
+            registry.observe('dependency', 'mongo:find', 0.8)
+        series = registry.snapshot()['dependency']['mongo:find']
+        self.assertLessEqual(series['p50_ms'], 5.0)
+        self.assertGreater(series['p95_ms'], 500.0)
+        self.assertLessEqual(series['p99_ms'], series['max_ms'])
+
+    def test_concurrent_recording(self):
+        registry = Metrics()
+
+        def record():
+            for _ in range(1000):
+                with registry.track('endpoint', 'GET /tasks'):
+                    pass
+
+        threads = [threading.Thread(target=record) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(registry.snapshot()['endpoint']['GET /tasks']['count'], 8000)
+
+    def test_prometheus_exposition(self):
+        registry = Metrics()
+        registry.observe('endpoint', 'POST /execute_browser_action', 3.0, error=True)
+        registry.observe('tool', 'say "hi"', 0.001)
+        text = registry.render_prometheus()
+        self.assertIn('# TYPE mimic_call_duration_seconds histogram', text)
+        self.assertIn('mimic_call_errors_total{kind="endpoint",name="POST /execute_browser_action"} 1', text)
+        self.assertIn('mimic_call_duration_seconds_bucket{kind="endpoint",name="POST /execute_browser_action",le="2.5"} 0', text)
+        self.assertIn('mimic_call_duration_seconds_bucket{kind="endpoint",name="POST /execute_browser_action",le="+Inf"} 1', text)
+        self.assertIn('name="say \\"hi\\""', text)
+
+    def test_metrics_server(self):
+        metrics.observe('tool', 'health_check', 0.01)
+        httpd = start_metrics_server(0, host='127.0.0.1')
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{httpd.server_address[1]}/metrics") as response:
+                body = response.read().decode()
+                self.assertTrue(response.headers['Content-Type'].startswith('text/plain'))
+        finally:
+            httpd.shutdown()
+        self.assertIn('mimic_calls_total{kind="tool",name="health_check"}', body)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Unit tests for keyset pagination cursors, filters and projections
+"""
+import unittest
+import os
+import sys
+import base64
+import json
+from datetime import datetime
+
+from bson import ObjectId
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.pagination import (
+    CursorError, build_page, decode_cursor, encode_cursor, keyset_filter, page_size, projection
+)
+
+
+class TestPagination(unittest.TestCase):
+    """Test cursor round-trips, page assembly and projections"""
+
+    def test_cursor_round_trip(self):
+        uploaded_at = datetime(2026, 3, 1, 12, 30, 5, 123000)
+        doc_id = ObjectId()
+        cursor = encode_cursor(uploaded_at, doc_id)
+        self.assertEqual(decode_cursor(cursor), (uploaded_at, doc_id))
+        self.assertEqual(decode_cursor(encode_cursor(None, doc_id)), (None, doc_id))
+        with self.assertRaises(CursorError):
+            decode_cursor('not-a-cursor')
+
+    def test_cursor_with_bad_id_is_rejected(self):
+        for payload in ({"v": 1, "id": "nothex"}, {"v": 1, "id": 5}, {"v": 1}, [1, 2]):
+            cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+            with self.assertRaises(CursorError):
+                decode_cursor(cursor)
+
+    def test_page_continues_after_last_document(self):
+        ids = [ObjectId() for _ in range(4)]
+        docs = [{'_id': ids[n], 'uploaded_at': datetime(2026, 1, 10 - n)} for n in range(4)]
+        page = build_page(docs, 3, 'videos')
+        self.assertEqual(len(page['items']), 3)
+        self.assertTrue(page['has_more'])
+        self.assertEqual(decode_cursor(page['next_cursor']), (datetime(2026, 1, 8), ids[2]))
+
+        last = build_page(docs[:2], 3, 'videos')
+        self.assertFalse(last['has_more'])
+        self.assertIsNone(last['next_cursor'])
+
+    def test_keyset_filter_breaks_ties_on_id(self):
+        at = datetime(2026, 1, 1)
+        self.assertEqual(keyset_filter('created_at', at, 'id9'), {'$or': [
+            {'created_at': {'$lt': at}},
+            {'created_at': at, '_id': {'$lt': 'id9'}},
+            {'created_at': None}
+        ]})
+        self.assertEqual(keyset_filter('created_at', None, 'id9'), {'created_at': None, '_id': {'$lt': 'id9'}})
+
+    def test_projections_and_page_size(self):
+        self.assertIsNone(projection('videos'))
+        self.assertNotIn('steps', projection('videos', summary=True))
+        self.assertIn('step_count', projection('videos', summary=True))
+        self.assertEqual(projection('videos', fields=['video_url'], summary=True),
+                         {'video_url': 1, 'uploaded_at': 1})
+        self.assertEqual(page_size(10000), 200)
+        self.assertEqual(page_size(None), 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Unit tests for throttled MCP progress reporting
+"""
+import unittest
+import asyncio
+import os
+import sys
+import threading
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.progress import ProgressReporter
+
+
+class TestProgressReporter(unittest.TestCase):
+    """Test coalescing, ordering and thread-safe reporting"""
+
+    def run_reporter(self, scenario, min_interval=0.2):
+        sent = []
+
+        async def send(progress, total, message):
+            sent.append((progress, total, message))
+
+        async def main():
+            reporter = ProgressReporter(send, min_interval=min_interval)
+            await scenario(reporter)
+            await reporter.close()
+            return reporter
+
+        reporter = asyncio.run(main())
+        return reporter, sent
+
+    def test_fast_reports_are_coalesced_into_latest(self):
+        async def scenario(reporter):
+            reporter.set_total(12)
+            reporter.advance("Analyzing video", force=True)
+            for n in range(10):
+                reporter.on_step({'step': n, 'action': 'click', 'status': 'ok'})
+            await asyncio.sleep(0.3)
+
+        reporter, sent = self.run_reporter(scenario)
+        self.assertEqual(sent[0], (1, 12, "Analyzing video"))
+        self.assertEqual(sent[-1], (11, 12, "Step 10 (click): ok"))
+        self.assertLessEqual(len(sent), 3)
+
+    def test_failures_and_finish_are_sent_immediately(self):
+        async def scenario(reporter):
+            reporter.set_total(4)
+            reporter.on_step({'step': 0, 'action': 'goto', 'status': 'ok'})
+            reporter.on_step({'step': 1, 'action': 'click', 'status': 'failed'})
+            reporter.finish("Execution logged")
+
+        reporter, sent = self.run_reporter(scenario, min_interval=60)
+        self.assertEqual([report[2] for report in sent],
+                         ["Step 1 (goto): ok", "Step 2 (click): failed", "Execution logged"])
+        self.assertEqual(sent[-1][:2], (4, 4))
+
+    def test_reports_from_threads_arrive_in_increasing_order(self):
+        async def scenario(reporter):
+            def work():
+                for n in range(50):
+                    reporter.advance(f"poll {n}", force=n % 7 == 0)
+
+            threads = [threading.Thread(target=work) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            await asyncio.get_running_loop().run_in_executor(None, lambda: [t.join() for t in threads])
+
+        reporter, sent = self.run_reporter(scenario, min_interval=0.01)
+        progress = [report[0] for report in sent]
+        self.assertEqual(progress, sorted(set(progress)))
+        self.assertEqual(progress[-1], 200)
+
+    def test_reporter_without_token_is_a_no_op(self):
+        reporter = ProgressReporter()
+        reporter.advance("ignored", force=True)
+        reporter.finish()
+        asyncio.run(reporter.close())
+        self.assertEqual(reporter.sent, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Unit tests for resource URIs, database change hooks and subscription notifications
+"""
+import unittest
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.resources import ChangeNotifier, ResourceSubscriptions, resource_uri, parse_resource_uri
+
+
+class FakeSession:
+    """Records notifications the way mcp ServerSession would send them"""
+
+    def __init__(self, fail=False):
+        self.updated = []
+        self.list_changed = 0
+        self.fail = fail
+
+    async def send_resource_updated(self, uri):
+        if self.fail:
+            raise ConnectionError("session closed")
+        self.updated.append(uri)
+
+    async def send_resource_list_changed(self):
+        if self.fail:
+            raise ConnectionError("session closed")
+        self.list_changed += 1
+
+
+class TestResourceSubscriptions(unittest.TestCase):
+    """Test URI parsing, coalesced updates, list changes and dropping dead sessions"""
+
+    def test_resource_uris(self):
+        uri = resource_uri('executions', '665f1c2a9b1e8a0012345678')
+        self.assertEqual(uri, 'mimic://executions/665f1c2a9b1e8a0012345678')
+        self.assertEqual(parse_resource_uri(uri), ('executions', '665f1c2a9b1e8a0012345678'))
+        for bad in ('artifact://sha256/abc', 'mimic://jobs/1', 'mimic://videos/', 'mimic://videos/a/b'):
+            with self.assertRaises(ValueError):
+                parse_resource_uri(bad)
+
+    def test_updates_are_coalesced_per_subscriber(self):
+        changes = ChangeNotifier()
+        subscriptions = ResourceSubscriptions(debounce_seconds=0.05)
+        changes.add_listener(subscriptions.on_change)
+        watcher, other = FakeSession(), FakeSession()
+        uri = resource_uri('executions', 'e1')
+
+        async def scenario():
+            subscriptions.subscribe(uri, watcher)
+            subscriptions.subscribe(resource_uri('videos', 'v1'), other)
+            for _ in range(5):
+                changes.notify('executions', 'e1', 'update')
+            changes.notify('executions', 'e2', 'update')
+            await asyncio.sleep(0.15)
+            changes.notify('corrections', 'c1', 'insert')
+            await asyncio.sleep(0.15)
+
+        asyncio.run(scenario())
+        self.assertEqual(watcher.updated, [uri])
+        self.assertEqual(other.updated, [])
+        self.assertEqual((watcher.list_changed, other.list_changed), (1, 1))
+
+    def test_failed_sessions_are_dropped(self):
+        subscriptions = ResourceSubscriptions(debounce_seconds=0)
+        dead, alive = FakeSession(fail=True), FakeSession()
+        uri = resource_uri('videos', 'v1')
+
+        async def scenario():
+            subscriptions.subscribe(uri, dead)
+            subscriptions.subscribe(uri, alive)
+            subscriptions.on_change('videos', 'v1', 'update')
+            await asyncio.sleep(0.05)
+            subscriptions.unsubscribe(uri, alive)
+            subscriptions.on_change('videos', 'v1', 'update')
+            await asyncio.sleep(0.05)
+
+        asyncio.run(scenario())
+        self.assertEqual(alive.updated, [uri])
+        self.assertEqual(subscriptions.stats()['subscriptions'], 0)
+
+    def test_listener_errors_do_not_break_writes(self):
+        changes = ChangeNotifier()
+        seen = []
+
+        def broken(collection, doc_id, operation):
+            raise RuntimeError("listener bug")
+
+        changes.add_listener(broken)
+        changes.add_listener(lambda *change: seen.append(change))
+        changes.notify('videos', 42, 'insert')
+        self.assertEqual(seen, [('videos', '42', 'insert')])
+
+
+if __name__ == '__main__':
+    unittest.main()
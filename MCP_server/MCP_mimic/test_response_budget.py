@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Unit tests for tool response encoding, size budgets and artifact references
+"""
+import unittest
+import json
+import os
+import sys
+from datetime import datetime
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.serialization import encode_response, budget_for, ResponseBudget, shrink, dumps
+from services.artifacts import ArtifactStore
+
+
+def execution_result(steps=500, log_chars=20000):
+    return {
+        'success': True,
+        'execution_id': 'exec-1',
+        'started_at': datetime(2026, 1, 2, 3, 4, 5),
+        'cost': Decimal('0.25'),
+        'tags': {'smoke'},
+        'screenshot': b'\x89PNG' * 1000,
+        'step_results': [{'step': i, 'status': 'ok', 'log': 'x' * 50} for i in range(steps)],
+        'console': 'y' * log_chars
+    }
+
+
+class TestResponseBudget(unittest.TestCase):
+    """Test compact encoding, truncation to budget and artifact offload"""
+
+    def test_small_results_are_encoded_whole(self):
+        text, refs = encode_response(execution_result(steps=3, log_chars=10))
+        data = json.loads(text)
+        self.assertEqual(refs, [])
+        self.assertNotIn('truncated', data)
+        self.assertEqual(data['started_at'], '2026-01-02T03:04:05')
+        self.assertEqual(data['cost'], '0.25')
+        self.assertEqual(data['tags'], ['smoke'])
+        self.assertEqual(data['screenshot'], {'$binary': {'bytes': 4000}})
+        self.assertNotIn(' ', text.replace('"ok"', ''))
+
+    def test_large_results_fit_budget_and_keep_list_tail(self):
+        budget = ResponseBudget(max_bytes=8000, max_string=2000, max_items=100)
+        text, _ = encode_response(execution_result(), budget)
+        data = json.loads(text)
+        self.assertLessEqual(len(text.encode()), 8000)
+        self.assertGreater(data['truncated']['original_bytes'], 8000)
+        steps = data['step_results']
+        self.assertEqual(steps[0]['step'], 0)
+        self.assertEqual(steps[-1]['step'], 499)
+        self.assertTrue(any(isinstance(step, str) and 'items omitted' in step for step in steps))
+
+    def test_shrink_counts_cuts_and_budgets_per_tool(self):
+        trimmed, cuts = shrink({'a': 'z' * 50, 'b': list(range(10))}, max_string=10, max_items=4)
+        self.assertEqual(cuts, 2)
+        self.assertEqual(trimmed['b'], [0, 1, '… 6 items omitted …', 8, 9])
+        self.assertEqual(budget_for('cancel_job').max_bytes, 16 * 1024)
+        self.assertEqual(budget_for('get_tasks', {'get_tasks': 1000}).max_bytes, 1000)
+
+    def test_large_fields_become_artifact_references(self):
+        store = ArtifactStore(max_bytes=10 * 1024 * 1024, ttl_seconds=60)
+        result = {'job': {'status': 'completed', 'result': execution_result(steps=1500)}}
+        text, refs = encode_response(result, artifact_store=store)
+        data = json.loads(text)
+        self.assertTrue(refs)
+        self.assertEqual(data['job']['status'], 'completed')
+        ref = data['job']['result']
+        self.assertTrue(ref['$artifact'].startswith('artifact://sha256/'))
+        stored = store.get(ref['$artifact'])
+        self.assertEqual(json.loads(stored['data'])['execution_id'], 'exec-1')
+        # Same content, same artifact
+        encode_response(result, artifact_store=store)
+        self.assertEqual(store.stats()['artifacts'], 1)
+
+    def test_artifact_store_evicts_oldest(self):
+        store = ArtifactStore(max_bytes=100, ttl_seconds=60)
+        first = store.put(dumps('a' * 60))
+        second = store.put(dumps('b' * 60))
+        self.assertIsNone(store.get(first['uri']))
+        self.assertIsNotNone(store.get(second['uri']))
+        self.assertEqual(store.stats()['evicted'], 1)
+
+    def test_artifacts_are_scoped_to_their_session(self):
+        store = ArtifactStore(max_bytes=10 * 1024 * 1024, ttl_seconds=60)
+        alice, bob = store.for_owner('alice'), store.for_owner('bob')
+        _, refs = encode_response({'log': ['x' * 100] * 1000}, artifact_store=alice)
+        uri = refs[0]['uri']
+        self.assertIsNotNone(alice.get(uri))
+        self.assertEqual([ref['uri'] for ref in alice.list()], [uri])
+        self.assertIsNone(bob.get(uri))
+        self.assertEqual(bob.list(), [])
+        self.assertIsNone(store.get(uri))
+        # Identical content produced by both sessions is shared, not leaked
+        encode_response({'log': ['x' * 100] * 1000}, artifact_store=bob)
+        self.assertIsNotNone(bob.get(uri))
+        self.assertEqual(store.stats()['artifacts'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Unit tests for response-aware step waits
+"""
+import unittest
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.waits import ResponseWaiter, resolve_wait, url_matcher
+from services.validation import validate_steps
+
+
+class FakeResponse:
+    def __init__(self, url):
+        self.url = url
+
+
+class FakePage:
+    """Delivers queued responses while the sync waiter polls"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.listeners = []
+
+    def on(self, event, listener):
+        self.listeners.append(listener)
+
+    def remove_listener(self, event, listener):
+        self.listeners.remove(listener)
+
+    def wait_for_timeout(self, ms):
+        if self.responses:
+            response = FakeResponse(self.responses.pop(0))
+            for listener in list(self.listeners):
+                listener(response)
+
+
+class TestResponseWaits(unittest.TestCase):
+    """Test which steps wait for responses and how patterns match"""
+
+    def test_patterns_are_substrings_or_globs(self):
+        self.assertTrue(url_matcher('/youtubei/v1/search')('https://www.youtube.com/youtubei/v1/search?key=x'))
+        self.assertTrue(url_matcher('**/search?*')('https://www.google.com/search?q=cats'))
+        self.assertFalse(url_matcher('**/search?*')('https://www.google.com/'))
+
+    def test_search_submits_get_a_default_wait(self):
+        wait = resolve_wait({'action': 'press', 'key': 'Enter'}, 'https://www.youtube.com/')
+        self.assertEqual(wait['response'], ['/youtubei/v1/search'])
+        self.assertFalse(wait['explicit'])
+        self.assertIsNotNone(resolve_wait({'action': 'click', 'selector': "input[name='btnK']"}, 'https://www.google.com/'))
+        self.assertIsNone(resolve_wait({'action': 'click', 'selector': 'h3 a', 'description': 'Click first search result'},
+                                       'https://www.google.com/search?q=cats'))
+        self.assertIsNone(resolve_wait({'action': 'press', 'key': 'Enter'}, 'https://example.com/'))
+        self.assertIsNone(resolve_wait({'action': 'press', 'key': 'Enter', 'wait_for': False}, 'https://www.youtube.com/'))
+
+    def test_explicit_wait_overrides_heuristic(self):
+        step = {'action': 'click', 'selector': '#load-more', 'wait_for': {'response': '/api/items', 'timeout': 2000}}
+        self.assertEqual(resolve_wait(step, 'https://example.com/'),
+                         {'response': ['/api/items'], 'url': None, 'timeout': 2000, 'explicit': True})
+        self.assertEqual(validate_steps([step]), [])
+        self.assertNotEqual(validate_steps([{'action': 'click', 'selector': '#x', 'wait_for': {'resp': '/api'}}]), [])
+
+    def test_waiter_ends_on_first_matching_response(self):
+        page = FakePage(['https://example.com/beacon', 'https://example.com/api/items?page=2'])
+        waiter = ResponseWaiter(['/api/items']).attach(page)
+        self.assertEqual(waiter.wait(page, 1000, lambda: None), 'https://example.com/api/items?page=2')
+        waiter.detach(page)
+        self.assertEqual(page.listeners, [])
+        with self.assertRaises(TimeoutError):
+            ResponseWaiter(['/never']).attach(FakePage([])).wait(FakePage([]), 20, lambda: None)
+
+
+if __name__ == '__main__':
+    unittest.main()
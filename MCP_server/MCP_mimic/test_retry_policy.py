@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Unit tests for step error classification and the retry policy
+"""
+import unittest
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.retry import RetryPolicy, RunBudget, classify_error, replay_safe
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """Test error classes and which of them are retried"""
+
+    def setUp(self):
+        self.policy = RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.05, run_budget=30)
+
+    def test_classify_playwright_errors(self):
+        self.assertEqual(classify_error("click failed: Timeout 3000ms exceeded."), 'timeout')
+        self.assertEqual(classify_error("Element is not attached to the DOM"), 'detached')
+        self.assertEqual(classify_error("Execution context was destroyed, most likely because of a navigation"), 'navigation')
+        self.assertEqual(classify_error("SyntaxError: 'div[' is not a valid selector"), 'selector_syntax')
+        self.assertEqual(classify_error("Target page, context or browser has been closed"), 'closed')
+        self.assertEqual(classify_error("Unknown action: fly"), 'unknown')
+
+    def test_transient_errors_retry_with_bounded_backoff(self):
+        budget = self.policy.start_run()
+        delays = [self.policy.next_delay('detached', attempt, budget) for attempt in (1, 2, 3)]
+        self.assertIsNotNone(delays[0])
+        self.assertIsNotNone(delays[1])
+        self.assertIsNone(delays[2])
+        self.assertTrue(all(d <= 0.05 for d in delays[:2]))
+        self.assertIsNotNone(self.policy.next_delay('timeout', 1, budget))
+        self.assertIsNone(self.policy.next_delay('timeout', 2, budget))
+
+    def test_unrecoverable_errors_are_not_retried(self):
+        budget = self.policy.start_run()
+        for kind in ('selector_syntax', 'closed', 'unknown'):
+            self.assertIsNone(self.policy.next_delay(kind, 1, budget))
+
+    def test_budget_and_step_overrides(self):
+        self.assertIsNone(self.policy.next_delay('navigation', 1, RunBudget(0)))
+        budget = self.policy.start_run()
+        self.assertIsNone(self.policy.next_delay('detached', 1, budget, {"retries": 0}))
+        self.assertIsNone(self.policy.next_delay('timeout', 1, budget, {"timeout": 60000}))
+
+    def test_settle_failures_and_sent_actions_are_not_replayed(self):
+        budget = self.policy.start_run()
+        self.assertIsNone(self.policy.next_delay('settle', 1, budget))
+        self.assertFalse(replay_safe({"action": "click", "selector": "#buy"}))
+        self.assertFalse(replay_safe({"action": "press", "key": "Enter"}))
+        self.assertFalse(replay_safe({"action": "type", "selector": "#q", "text": "x", "submit": True}))
+        self.assertTrue(replay_safe({"action": "type", "selector": "#q", "text": "x"}))
+        self.assertTrue(replay_safe({"action": "goto", "url": "https://example.com"}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Unit tests for run deadlines and cancellation
+"""
+import unittest
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.runs import RunControl, RunRegistry, RunStopped
+
+
+class TestRunControl(unittest.TestCase):
+    """Test deadline capping, cancel-aware sleeps and the registry"""
+
+    def test_timeouts_are_capped_to_the_deadline(self):
+        control = RunControl(deadline_seconds=2)
+        self.assertLessEqual(control.timeout_ms(10000), 2000)
+        self.assertEqual(control.timeout_ms(500), 500)
+        self.assertEqual(RunControl().timeout_ms(10000), 10000)
+
+    def test_expired_deadline_stops_the_run(self):
+        control = RunControl(deadline_seconds=0.01)
+        time.sleep(0.02)
+        with self.assertRaises(RunStopped) as raised:
+            control.timeout_ms(1000)
+        self.assertEqual(raised.exception.kind, 'deadline')
+
+    def test_cancel_wakes_sleep_and_runs_callbacks(self):
+        control = RunControl()
+        closed = []
+        control.on_cancel(lambda: closed.append(True))
+        threading.Timer(0.05, control.cancel, args=('user request',)).start()
+        started = time.monotonic()
+        with self.assertRaises(RunStopped) as raised:
+            control.sleep(5)
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(raised.exception.kind, 'cancelled')
+        self.assertEqual(closed, [True])
+
+    def test_registry_cancels_by_id(self):
+        registry = RunRegistry()
+        control = RunControl(run_id='run-1')
+        registry.register(control)
+        self.assertEqual([run['run_id'] for run in registry.list_runs()], ['run-1'])
+        self.assertTrue(registry.cancel('run-1', 'stop'))
+        self.assertTrue(control.cancelled)
+        registry.unregister(control)
+        self.assertFalse(registry.cancel('run-1'))
+
+    def test_step_listener_errors_do_not_fail_the_run(self):
+        seen = []
+
+        def listener(outcome):
+            seen.append(outcome['step'])
+            raise ValueError("client went away")
+
+        control = RunControl(on_step=listener)
+        control.report_step({'step': 0, 'action': 'goto', 'status': 'ok'})
+        RunControl().report_step({'step': 1, 'action': 'click', 'status': 'ok'})
+        self.assertEqual(seen, [0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the content-addressed screenshot writer
+"""
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.screenshots import ScreenshotWriter, screenshot_options
+
+
+class TestScreenshotWriter(unittest.TestCase):
+    """Test background storage of screenshot bytes"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.writer = ScreenshotWriter(directory=self.tmp.name, max_queue=4)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_identical_frames_are_stored_once(self):
+        first = self.writer.submit(b'frame-bytes', 'png')
+        second = self.writer.submit(b'frame-bytes', 'png')
+        self.assertTrue(self.writer.flush(timeout=5))
+        self.assertEqual(first['path'], second['path'])
+        self.assertTrue(first['path'].endswith(f"{first['sha256'][:2]}{os.sep}{first['sha256']}.png"))
+        with open(first['path'], 'rb') as f:
+            self.assertEqual(f.read(), b'frame-bytes')
+        stats = self.writer.stats()
+        self.assertEqual((stats['written'], stats['deduplicated']), (1, 1))
+
+    def test_copy_to_requested_path(self):
+        copy_path = os.path.join(self.tmp.name, 'named', 'result.jpg')
+        ref = self.writer.submit(b'jpeg-bytes', 'jpeg', copy_to=copy_path)
+        self.assertTrue(self.writer.flush(timeout=5))
+        self.assertTrue(ref['path'].endswith('.jpg'))
+        with open(copy_path, 'rb') as f:
+            self.assertEqual(f.read(), b'jpeg-bytes')
+
+    def test_screenshot_options(self):
+        self.assertEqual(screenshot_options({'action': 'screenshot'}), {'type': 'png', 'full_page': False})
+        options = screenshot_options({'action': 'screenshot', 'format': 'jpeg', 'quality': 50,
+                                      'clip': {'x': 0, 'y': 0, 'width': 320, 'height': 200}})
+        self.assertEqual(options['quality'], 50)
+        self.assertEqual(options['clip'], {'x': 0, 'y': 0, 'width': 320, 'height': 200})
+
+    def test_full_queue_does_not_block_event_loop(self):
+        writer = ScreenshotWriter(directory=self.tmp.name, max_queue=1)
+        writer._ensure_thread = lambda: None
+        writer.submit(b'fills-the-queue', 'png')
+
+        async def scenario():
+            ticks = 0
+            pending = asyncio.ensure_future(writer.submit_async(b'waits-for-room', 'png'))
+            while ticks < 5:
+                await asyncio.sleep(0.01)
+                ticks += 1
+            self.assertFalse(pending.done())
+            # Start the writer; the blocked submit goes through once the queue drains
+            ScreenshotWriter._ensure_thread(writer)
+            return await asyncio.wait_for(pending, 5)
+
+        ref = asyncio.run(scenario())
+        self.assertEqual(ref['bytes'], len(b'waits-for-room'))
+        self.assertTrue(writer.flush(timeout=5))
+
+
+if __name__ == '__main__':
+    unittest.main()
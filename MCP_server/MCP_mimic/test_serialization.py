@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the document serializer shared by the sync and async database layers
+"""
+import unittest
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.serialization import serialize_document, serialize_documents
+
+
+class FakeObjectId:
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return self.value
+
+
+class TestSerialization(unittest.TestCase):
+    """Test ID stringification of MongoDB documents"""
+
+    def test_ids_and_references_become_strings(self):
+        doc = serialize_document({
+            '_id': FakeObjectId('a1'),
+            'video_id': FakeObjectId('v1'),
+            'execution_id': None,
+            'status': 'completed'
+        })
+        self.assertEqual(doc, {'_id': 'a1', 'video_id': 'v1', 'execution_id': None, 'status': 'completed'})
+
+    def test_missing_document_and_lists(self):
+        self.assertIsNone(serialize_document(None))
+        docs = serialize_documents(iter([{'_id': FakeObjectId('a')}, {'_id': FakeObjectId('b')}]))
+        self.assertEqual([doc['_id'] for doc in docs], ['a', 'b'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Unit tests for browser session state snapshots
+"""
+import unittest
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.session_store import SessionStore, find_session_checkpoint, session_domain
+
+LOGIN_STEPS = [
+    {"action": "goto", "url": "https://app.example.com/login"},
+    {"action": "type", "selector": "#email", "text": "me@example.com"},
+    {"action": "click", "selector": "#submit", "session_checkpoint": True},
+    {"action": "click", "selector": "#reports"}
+]
+
+
+class TestSessionStore(unittest.TestCase):
+    """Test snapshot planning, expiry and invalidation"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SessionStore(directory=self.tmp.name, ttl_seconds=60)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_plan_without_checkpoint(self):
+        self.assertIsNone(self.store.plan([{"action": "goto", "url": "https://x.com"}], 'u1'))
+
+    def test_checkpoint_and_domain(self):
+        self.assertEqual(find_session_checkpoint(LOGIN_STEPS), 2)
+        self.assertEqual(session_domain(LOGIN_STEPS, 2), 'app.example.com')
+
+    def test_save_and_restore(self):
+        plan = self.store.plan(LOGIN_STEPS, 'u1')
+        self.assertIsNone(plan['snapshot'])
+        self.store.save(plan, {"cookies": [{"name": "sid"}], "origins": []}, "https://app.example.com/home")
+
+        restored = self.store.plan(LOGIN_STEPS, 'u1')['snapshot']
+        self.assertEqual(restored['checkpoint_step'], 2)
+        self.assertEqual(restored['url'], "https://app.example.com/home")
+        # Snapshots are per user
+        self.assertIsNone(self.store.plan(LOGIN_STEPS, 'u2')['snapshot'])
+
+    def test_changed_login_steps_are_not_skipped(self):
+        plan = self.store.plan(LOGIN_STEPS, 'u1')
+        self.store.save(plan, {"cookies": [], "origins": []}, "https://app.example.com/home")
+        edited = [dict(step) for step in LOGIN_STEPS]
+        edited[1]['text'] = 'other@example.com'
+        self.assertIsNone(self.store.plan(edited, 'u1')['snapshot'])
+
+    def test_expired_snapshot_is_removed(self):
+        plan = self.store.plan(LOGIN_STEPS, 'u1')
+        self.store.save(plan, {"cookies": [], "origins": []}, "https://app.example.com/home")
+        path = self.store._path('u1', 'app.example.com')
+        self.store.ttl_seconds = -1
+        self.assertIsNone(self.store.load('u1', 'app.example.com'))
+        self.assertFalse(os.path.exists(path))
+
+    def test_snapshots_are_private_and_leave_no_temp_files(self):
+        store = SessionStore(directory=os.path.join(self.tmp.name, 'state'), ttl_seconds=60)
+        plan = store.plan(LOGIN_STEPS, 'u1')
+        for _ in range(2):
+            store.save(plan, {"cookies": [{"name": "sid"}], "origins": []}, "https://app.example.com/home")
+        path = store._path('u1', 'app.example.com')
+        self.assertEqual(os.stat(store.directory).st_mode & 0o777, 0o700)
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+        self.assertEqual(os.listdir(store.directory), [os.path.basename(path)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Unit tests for per-step retries around settle waits and actions that already took effect
+"""
+import unittest
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.browser import BrowserAutomator
+from services.retry import RetryPolicy
+from services.session_store import SessionStore
+
+
+class FakePage:
+    url = 'https://example.com/search'
+
+    def set_default_timeout(self, timeout):
+        pass
+
+    def wait_for_load_state(self, state, timeout=None):
+        pass
+
+
+class TestStepAttempts(unittest.TestCase):
+    """Test that only replay-safe failures re-run the action"""
+
+    def make_automator(self, action_results, settle_result=None):
+        automator = BrowserAutomator(
+            session_store=SessionStore(tempfile.mkdtemp()), browser_server=None, demo_mode=False,
+            retry_policy=RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.002, run_budget=30)
+        )
+        automator.actions = 0
+        results = list(action_results)
+
+        def execute(page, step, log):
+            automator.actions += 1
+            return dict(results.pop(0))
+
+        automator._execute_single_step = execute
+        automator._settle_step = lambda page, wait, waiter, log: dict(settle_result)
+        return automator
+
+    def test_failed_wait_for_does_not_repeat_the_click(self):
+        automator = self.make_automator(
+            [{'success': True, 'clicked': '#search'}],
+            {'success': False, 'error': 'wait_for failed: Timeout 3000ms exceeded.', 'error_kind': 'settle'}
+        )
+        step = {'action': 'click', 'selector': '#search', 'wait_for': {'url': '**/results'}}
+        result = automator._attempt_step(FakePage(), step, [], automator.retry_policy.start_run())
+        self.assertFalse(result['success'])
+        self.assertEqual((result['error_kind'], result['attempts']), ('settle', 1))
+        self.assertEqual(result['clicked'], '#search')
+        self.assertEqual(automator.actions, 1)
+
+    def test_navigation_error_does_not_resubmit(self):
+        automator = self.make_automator([
+            {'success': False, 'error': 'Execution context was destroyed, most likely because of a navigation'},
+            {'success': True}
+        ])
+        log = []
+        step = {'action': 'press', 'key': 'Enter'}
+        result = automator._attempt_step(FakePage(), step, log, automator.retry_policy.start_run())
+        self.assertFalse(result['success'])
+        self.assertEqual(automator.actions, 1)
+        self.assertIn('Not replaying press', log[-1])
+
+    def test_replay_safe_step_is_retried(self):
+        automator = self.make_automator([
+            {'success': False, 'error': 'Execution context was destroyed, most likely because of a navigation'},
+            {'success': True}
+        ])
+        step = {'action': 'type', 'selector': '#q', 'text': 'hello'}
+        result = automator._attempt_step(FakePage(), step, [], automator.retry_policy.start_run())
+        self.assertTrue(result['success'])
+        self.assertEqual((automator.actions, result['attempts']), (2, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
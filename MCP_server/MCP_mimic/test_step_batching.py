@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Unit tests for planning in-page step batches
+"""
+import unittest
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.batching import batch_end, is_batchable, is_css_selector
+
+FORM_STEPS = [
+    {"action": "goto", "url": "https://example.com/signup"},
+    {"action": "type", "selector": "#name", "text": "Ada"},
+    {"action": "type", "selector": "#email", "text": "ada@example.com"},
+    {"action": "select", "selector": "select[name='plan']", "value": "pro"},
+    {"action": "click", "selector": "#terms"},
+    {"action": "press", "key": "Enter"}
+]
+
+
+def fill(step):
+    return step.get('typing', 'fill')
+
+
+class TestStepBatching(unittest.TestCase):
+    """Test which steps are grouped into a single injected script"""
+
+    def test_form_run_is_batched_between_navigation_steps(self):
+        self.assertEqual(batch_end(FORM_STEPS, 0, fill), 0)
+        self.assertEqual(batch_end(FORM_STEPS, 1, fill), 4)
+
+    def test_clicks_are_batched_only_on_request(self):
+        self.assertFalse(is_batchable({"action": "click", "selector": "#terms"}, 'fill'))
+        self.assertTrue(is_batchable({"action": "click", "selector": "#terms", "batch": True}, 'fill'))
+        steps = FORM_STEPS[:4] + [{"action": "click", "selector": "#terms", "batch": True}] + FORM_STEPS[5:]
+        self.assertEqual(batch_end(steps, 1, fill), 5)
+
+    def test_playwright_only_selectors_are_not_batched(self):
+        self.assertTrue(is_css_selector("input[name='q']"))
+        self.assertFalse(is_css_selector("text=Sign in"))
+        self.assertFalse(is_css_selector("#menu >> button"))
+        self.assertFalse(is_css_selector("button:has-text('Save')"))
+        self.assertFalse(is_css_selector("//div[@id='x']"))
+
+    def test_human_typing_submit_and_opt_out_break_batches(self):
+        self.assertFalse(is_batchable({"action": "type", "selector": "#q", "text": "x"}, 'human'))
+        self.assertFalse(is_batchable({"action": "type", "selector": "#q", "text": "x", "submit": True}, 'fill'))
+        self.assertFalse(is_batchable({"action": "click", "selector": "#go", "batch": False}, 'fill'))
+        self.assertFalse(is_batchable({"action": "hover", "selector": "#menu"}, 'fill'))
+
+    def test_single_step_runs_and_session_checkpoints(self):
+        steps = [
+            {"action": "type", "selector": "#user", "text": "ada"},
+            {"action": "type", "selector": "#pass", "text": "pw", "session_checkpoint": True},
+            {"action": "click", "selector": "#reports"},
+            {"action": "goto", "url": "https://example.com"}
+        ]
+        self.assertEqual(batch_end(steps, 0, fill), 2)
+        self.assertEqual(batch_end(steps, 2, fill), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Unit tests for static step list validation
+"""
+import unittest
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from jsonschema import Draft7Validator
+
+from services.validation import validate_steps, check_selector, schema_errors, format_validation_errors
+
+
+class TestStepValidation(unittest.TestCase):
+    """Test schema and per-action checks"""
+
+    def test_valid_steps_pass(self):
+        steps = [
+            {"action": "goto", "url": "https://www.google.com"},
+            {"action": "type", "selector": "textarea[name='q']", "text": "hello"},
+            {"action": "click", "selector": "input[name='btnK']"},
+            {"action": "wait", "timeout": 2000},
+            {"action": "press", "key": "Enter"}
+        ]
+        self.assertEqual(validate_steps(steps), [])
+
+    def test_missing_action_fields(self):
+        errors = validate_steps([
+            {"action": "goto"},
+            {"action": "type", "selector": "#q"},
+            {"action": "select", "selector": "#s"}
+        ])
+        self.assertEqual(
+            [(e['step'], e['field']) for e in errors],
+            [(0, 'url'), (1, 'text'), (2, 'value')]
+        )
+
+    def test_unknown_action_and_wrong_types(self):
+        errors = validate_steps([{"action": "teleport"}, {"action": "wait", "timeout": "5s"}])
+        self.assertEqual(errors[0]['field'], 'action')
+        self.assertEqual(errors[1]['field'], 'timeout')
+
+    def test_not_a_list(self):
+        errors = validate_steps({"action": "goto"})
+        self.assertEqual(errors[0]['step'], None)
+        self.assertIn("Invalid steps", format_validation_errors(errors))
+
+    def test_invalid_selectors(self):
+        errors = validate_steps([{"action": "click", "selector": "a[href"}])
+        self.assertEqual(errors[0]['field'], 'selector')
+
+    def test_validation_is_fast(self):
+        steps = [
+            {"action": "goto", "url": "https://www.youtube.com"},
+            {"action": "type", "selector": "input[name='search_query']", "text": "lofi"},
+            {"action": "click", "selector": "button[id='search-icon-legacy']"},
+            {"action": "click", "selector": "a[href*='/watch?v=']"}
+        ]
+        per_call = timeit.timeit(lambda: validate_steps(steps), number=1000) / 1000
+        self.assertLess(per_call, 0.001)
+
+
+class TestSelectorSyntax(unittest.TestCase):
+    """Test selector syntax checks"""
+
+    def test_accepts_common_selectors(self):
+        for selector in ["h3 a", ".yuRUbf a", "[placeholder*='search' i]",
+                         "input:not([type='hidden']):not([type='submit'])", "div:has(> a)",
+                         "text=Sign in", "//div[@id='x']", "button >> nth=0", "#search, .search",
+                         "button:has-text('Go (now)')", "a:visible", "li:nth-match(:text('x'), 2)"]:
+            self.assertIsNone(check_selector(selector), selector)
+
+    def test_rejects_broken_selectors(self):
+        for selector in ["", "a[href", "h3 >", "div,,a", "[='x']", "css=", "a >> ", "div > > a", "a:not(.x", "button.  x", "css=a[b=]"]:
+            self.assertIsNotNone(check_selector(selector), selector)
+
+
+class TestSchemaErrors(unittest.TestCase):
+    """Test how jsonschema errors map to step/field errors"""
+
+    def test_range_and_additional_properties(self):
+        validator = Draft7Validator({
+            "type": "object",
+            "properties": {"limit": {"type": "integer", "minimum": 1, "maximum": 100}},
+            "additionalProperties": False
+        })
+        self.assertEqual(schema_errors(validator, {"limit": 10}), [])
+        self.assertEqual(schema_errors(validator, {"limit": 0}),
+                         [{'step': None, 'field': 'limit', 'error': 'must be >= 1'}])
+        self.assertEqual(schema_errors(validator, {"other": 1}),
+                         [{'step': None, 'field': 'other', 'error': 'unexpected property'}])
+
+    def test_null_fields_count_as_missing(self):
+        errors = validate_steps([{"action": "click", "selector": None, "timeout": None}])
+        self.assertEqual(errors, [{'step': 0, 'field': 'selector', 'error': 'is required'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
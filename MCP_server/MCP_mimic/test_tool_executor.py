@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the bounded executor used by MCP tool handlers
+"""
+import unittest
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.offload import ToolExecutor, ClientLimiter, ClientBusy
+from services.config import parse_tool_limits
+
+
+class TestToolExecutor(unittest.TestCase):
+    """Test per-tool limits, offloading and queue metrics"""
+
+    def test_slow_tool_does_not_block_other_tools(self):
+        executor = ToolExecutor(max_workers=4, tool_limits={'slow': 1})
+
+        async def call(name, seconds):
+            async with executor.tool_slot(name):
+                await executor.call(time.sleep, seconds)
+                return time.perf_counter()
+
+        async def scenario():
+            started = time.perf_counter()
+            done = await asyncio.gather(call('slow', 0.3), call('slow', 0.3), call('fast', 0.01))
+            return [t - started for t in done]
+
+        slow_first, slow_second, fast = asyncio.run(scenario())
+        self.assertLess(fast, 0.2)
+        self.assertGreaterEqual(slow_second, 0.55)
+        stats = executor.stats()['tools']
+        self.assertEqual(stats['slow']['max_waiting'], 1)
+        self.assertEqual(stats['slow']['completed'], 2)
+        self.assertEqual(executor.stats()['calls_queued'], 0)
+        executor.shutdown()
+
+    def test_failed_calls_are_counted_and_raised(self):
+        executor = ToolExecutor(max_workers=1)
+
+        async def scenario():
+            async with executor.tool_slot('get_task'):
+                await executor.call(int, 'not a number')
+
+        with self.assertRaises(ValueError):
+            asyncio.run(scenario())
+        self.assertEqual(executor.stats()['tools']['get_task']['failed'], 1)
+        executor.shutdown()
+
+    def test_parse_tool_limits(self):
+        self.assertEqual(parse_tool_limits('analyze_video=1, get_tasks=8,bad,zero=0'),
+                         {'analyze_video': 1, 'get_tasks': 8})
+
+
+
+class Client:
+    """Stands in for an MCP client session"""
+
+
+class TestClientLimiter(unittest.TestCase):
+    """Test per-client call limits on a shared server"""
+
+    def test_busy_client_does_not_hold_back_others(self):
+        limiter = ClientLimiter(max_concurrent=1, max_queued=1)
+        busy, other = Client(), Client()
+
+        async def call(client, seconds):
+            async with limiter.client_slot(client):
+                await asyncio.sleep(seconds)
+                return time.perf_counter()
+
+        async def scenario():
+            started = time.perf_counter()
+            first = asyncio.ensure_future(call(busy, 0.2))
+            second = asyncio.ensure_future(call(busy, 0.2))
+            await asyncio.sleep(0.01)
+            with self.assertRaises(ClientBusy):
+                await call(busy, 0)
+            other_done = await call(other, 0.01)
+            await asyncio.gather(first, second)
+            return other_done - started, time.perf_counter() - started
+
+        other_done, total = asyncio.run(scenario())
+        self.assertLess(other_done, 0.1)
+        self.assertGreaterEqual(total, 0.38)
+        self.assertEqual(limiter.stats()['rejected'], 1)
+        self.assertEqual(limiter.stats()['running'], 0)
+
+    def test_calls_outside_a_session_are_not_limited(self):
+        limiter = ClientLimiter(max_concurrent=1, max_queued=1)
+
+        async def scenario():
+            async with limiter.client_slot(None):
+                async with limiter.client_slot(None):
+                    return limiter.stats()['clients']
+
+        self.assertEqual(asyncio.run(scenario()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
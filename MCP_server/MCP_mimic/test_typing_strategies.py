@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Unit tests for text entry strategies (fill, paste, human) and how they are selected
+"""
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+from unittest import mock
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.browser import BrowserAutomator
+from services.session_store import SessionStore
+
+
+class FakeKeyboard:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def insert_text(self, text):
+        self.calls.append(('insert_text', text))
+
+    def press(self, key):
+        self.calls.append(('press', key))
+
+
+class FakePage:
+    """Sync page that records the Playwright calls made to enter text"""
+
+    def __init__(self):
+        self.calls = []
+        self.keyboard = FakeKeyboard(self.calls)
+
+    def wait_for_selector(self, selector, state=None, timeout=None):
+        self.calls.append(('wait_for_selector', selector))
+
+    def fill(self, selector, text):
+        self.calls.append(('fill', selector, text))
+
+    def focus(self, selector):
+        self.calls.append(('focus', selector))
+
+    def type(self, selector, text, delay=None):
+        self.calls.append(('type', selector, text, delay))
+
+    def entry_calls(self):
+        return [call for call in self.calls if call[0] != 'wait_for_selector']
+
+
+class FakeAsyncKeyboard(FakeKeyboard):
+    async def insert_text(self, text):
+        super().insert_text(text)
+
+    async def press(self, key):
+        super().press(key)
+
+
+class FakeAsyncPage(FakePage):
+    """Async counterpart of FakePage"""
+
+    def __init__(self):
+        super().__init__()
+        self.keyboard = FakeAsyncKeyboard(self.calls)
+
+    async def wait_for_selector(self, selector, state=None, timeout=None):
+        super().wait_for_selector(selector, state, timeout)
+
+    async def fill(self, selector, text):
+        super().fill(selector, text)
+
+    async def focus(self, selector):
+        super().focus(selector)
+
+    async def type(self, selector, text, delay=None):
+        super().type(selector, text, delay)
+
+
+class TestTypingStrategies(unittest.TestCase):
+    """Test each strategy against fake pages and per-step vs per-profile selection"""
+
+    def make_automator(self, **kwargs):
+        automator = BrowserAutomator(session_store=SessionStore(tempfile.mkdtemp()), browser_server=None, **kwargs)
+        automator.pauses = []
+        automator._sleep = automator.pauses.append
+
+        async def sleep_async(seconds):
+            automator.pauses.append(seconds)
+
+        automator._sleep_async = sleep_async
+        return automator
+
+    def test_fill_sets_value_in_one_call(self):
+        automator = self.make_automator(typing_strategy='fill', demo_mode=False)
+        page = FakePage()
+        automator._enter_text(page, '#email', 'user@example.com', 'fill')
+        self.assertEqual(page.calls, [('fill', '#email', 'user@example.com')])
+        self.assertEqual(automator.pauses, [])
+
+    def test_paste_clears_focuses_and_inserts(self):
+        automator = self.make_automator(typing_strategy='fill', demo_mode=False)
+        page = FakePage()
+        automator._enter_text(page, '#email', 'user@example.com', 'paste')
+        self.assertEqual(page.calls, [
+            ('fill', '#email', ''),
+            ('focus', '#email'),
+            ('insert_text', 'user@example.com')
+        ])
+        self.assertEqual(automator.pauses, [])
+
+    def test_human_types_per_character_with_pauses(self):
+        automator = self.make_automator(typing_strategy='fill', demo_mode=False)
+        page = FakePage()
+        automator._enter_text(page, '#q', 'openai', 'human')
+        kind, selector, text, delay = page.calls[-1]
+        self.assertEqual((kind, selector, text), ('type', '#q', 'openai'))
+        self.assertTrue(80 <= delay <= 150)
+        self.assertTrue(automator.pauses)
+
+    def test_step_strategy_overrides_profile(self):
+        automator = self.make_automator(typing_strategy='fill', demo_mode=False)
+        self.assertEqual(automator._typing_strategy({'action': 'type'}), 'fill')
+        self.assertEqual(automator._typing_strategy({'action': 'type', 'typing': 'paste'}), 'paste')
+        self.assertEqual(automator._typing_strategy({'action': 'type', 'typing': 'human'}), 'human')
+        # Unknown per-step values fall back to the profile default
+        self.assertEqual(automator._typing_strategy({'action': 'type', 'typing': 'morse'}), 'fill')
+
+    def test_profile_defaults(self):
+        with mock.patch.dict(os.environ, {}, clear=False):
+            os.environ.pop('TYPING_STRATEGY', None)
+            self.assertEqual(self.make_automator(demo_mode=False).typing_strategy, 'fill')
+            self.assertEqual(self.make_automator(demo_mode=True).typing_strategy, 'human')
+            os.environ['TYPING_STRATEGY'] = 'paste'
+            self.assertEqual(self.make_automator(demo_mode=False).typing_strategy, 'paste')
+        with self.assertRaises(ValueError):
+            self.make_automator(typing_strategy='morse', demo_mode=False)
+
+    def test_sync_type_step_uses_step_strategy(self):
+        automator = self.make_automator(typing_strategy='human', demo_mode=False)
+        page = FakePage()
+        log = []
+        result = automator._execute_single_step(
+            page, {'action': 'type', 'selector': '#email', 'text': 'a@b.c', 'typing': 'paste'}, log
+        )
+        self.assertTrue(result['success'])
+        self.assertEqual(page.entry_calls(), [('fill', '#email', ''), ('focus', '#email'), ('insert_text', 'a@b.c')])
+        self.assertIn('(paste)', log[-1])
+
+    def test_async_type_step_uses_profile_strategy(self):
+        automator = self.make_automator(typing_strategy='paste', demo_mode=False)
+        page = FakeAsyncPage()
+        log = []
+        result = asyncio.run(automator._execute_single_step_async(
+            page, {'action': 'type', 'selector': '#email', 'text': 'a@b.c', 'submit': True}, log
+        ))
+        self.assertTrue(result['success'])
+        self.assertEqual(page.entry_calls(), [
+            ('fill', '#email', ''),
+            ('focus', '#email'),
+            ('insert_text', 'a@b.c'),
+            ('press', 'Enter')
+        ])
+        self.assertIn('(paste)', log[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
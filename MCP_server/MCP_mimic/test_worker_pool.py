@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the browser worker pool supervisor (dispatch, crash handling, cancel)
+"""
+import unittest
+import asyncio
+import os
+import queue
+import sys
+import threading
+import time
+from unittest import mock
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.worker_pool import BrowserWorkerPool, _WorkerHandle, _worker_loop
+
+STEPS = [{"action": "goto", "url": "https://example.com"}]
+
+
+class FakeProcess:
+    """Stands in for a worker's subprocess.Popen"""
+    pids = iter(range(1000, 2000))
+
+    def __init__(self, wait_seconds=0.0):
+        self.pid = next(self.pids)
+        self.wait_seconds = wait_seconds
+        self.killed = False
+
+    def poll(self):
+        return None
+
+    def wait(self, timeout=None):
+        time.sleep(self.wait_seconds)
+        return 1
+
+    def kill(self):
+        self.killed = True
+
+
+class FakeConn:
+    """Worker connection: records what the supervisor sends, replays what the worker would send back"""
+
+    def __init__(self):
+        self.sent = []
+        self.inbox = queue.Queue()
+
+    def send(self, message):
+        self.sent.append(message)
+
+    def recv(self):
+        message = self.inbox.get()
+        if message is EOFError:
+            raise EOFError
+        return message
+
+    def close(self):
+        pass
+
+    def runs(self):
+        return [message for message in self.sent if message[0] == 'run']
+
+
+class TestBrowserWorkerPool(unittest.TestCase):
+    """Test the supervisor against fake workers, without starting processes"""
+
+    def make_pool(self, workers=2, concurrency=1, wait_seconds=0.0):
+        pool = BrowserWorkerPool(num_workers=workers, per_worker_concurrency=concurrency)
+        pool._running = True
+        pool.spawned = []
+
+        def start_process(slot):
+            process = FakeProcess()
+            pool.spawned.append(slot)
+            return process
+
+        pool._start_process = start_process
+        conns = []
+        for slot in range(workers):
+            worker = _WorkerHandle(slot, FakeProcess(wait_seconds))
+            worker.started_at -= 60
+            worker.conn = FakeConn()
+            pool._workers[slot] = worker
+            conns.append(worker.conn)
+            threading.Thread(target=pool._reader_loop, args=(worker,), daemon=True).start()
+        return pool, conns
+
+    def test_dispatch_respects_per_worker_limit(self):
+        pool, conns = self.make_pool(workers=2, concurrency=1)
+        futures = [pool.submit(STEPS, run_id=f"run-{i}") for i in range(3)]
+        self.assertEqual([len(conn.runs()) for conn in conns], [1, 1])
+        self.assertEqual(pool.stats()['queued'], 1)
+
+        # A finished run frees the slot for the queued one
+        _, task_id, _ = conns[0].runs()[0]
+        conns[0].inbox.put(('done', task_id, {'success': True}))
+        self.assertEqual(futures[0].result(2), {'success': True})
+        deadline = time.time() + 2
+        while pool.stats()['queued'] and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(conns[0].runs()), 2)
+        self.assertEqual(conns[0].runs()[1][2]['run_id'], 'run-2')
+
+    def test_crashed_worker_fails_in_flight_runs_and_restarts(self):
+        pool, conns = self.make_pool(workers=1, concurrency=2, wait_seconds=0.3)
+        futures = [pool.submit(STEPS, run_id=f"run-{i}") for i in range(2)]
+        conns[0].inbox.put(EOFError)
+
+        # Reaping the dead process must not block the supervisor lock
+        time.sleep(0.05)
+        started = time.perf_counter()
+        pool.stats()
+        self.assertLess(time.perf_counter() - started, 0.1)
+
+        for future in futures:
+            result = future.result(2)
+            self.assertFalse(result['success'])
+            self.assertIn('crashed', result['error'])
+        deadline = time.time() + 2
+        while not pool.spawned and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(pool.spawned, [0])
+        self.assertEqual(pool.restarts, 1)
+        self.assertFalse(pool._workers[0].ready)
+
+    def test_cancel_queued_run_and_execute_timeout(self):
+        pool, conns = self.make_pool(workers=1, concurrency=1)
+        busy = pool.submit(STEPS, run_id='busy')
+        queued = pool.submit(STEPS, run_id='queued')
+        self.assertTrue(pool.cancel('queued', 'user gave up'))
+        self.assertIn('user gave up', queued.result(1)['error'])
+        self.assertEqual(pool.stats()['queued'], 0)
+
+        # In-flight runs are cancelled on the worker
+        self.assertTrue(pool.cancel('busy'))
+        self.assertEqual(conns[0].sent[-1], ('cancel', 'busy', 'cancelled by request'))
+
+        # A run that times out while queued is dropped, with a descriptive result
+        result = pool.execute(STEPS, timeout=0.1)
+        self.assertTrue(result['deadline_exceeded'])
+        self.assertTrue(result['cancelled'])
+        self.assertIn('did not finish within 0.1s and was cancelled', result['error'])
+        self.assertEqual(pool.stats()['queued'], 0)
+        self.assertFalse(busy.done())
+
+
+class FakeAutomator:
+    """Records which executor a worker uses and on which thread"""
+    calls = []
+
+    def __init__(self, **options):
+        self.options = options
+
+    def execute_steps(self, steps, session_user=None, run_id=None, deadline_seconds=None):
+        self.calls.append((run_id, threading.current_thread().name))
+        return {'success': True, 'run_id': run_id}
+
+    async def execute_steps_async(self, *args, **kwargs):
+        raise AssertionError("workers must use the same executor as in-process runs")
+
+
+class TestWorkerLoop(unittest.TestCase):
+    """Test the worker side against a fake supervisor connection"""
+
+    def test_worker_runs_the_sync_executor_off_the_loop(self):
+        conn = FakeConn()
+        conn.inbox.put(('config', {'headless': True}, 2))
+        conn.inbox.put(('run', 'task-1', {'steps': STEPS, 'run_id': 'run-1'}))
+        conn.inbox.put(('stop',))
+        with mock.patch('services.browser.BrowserAutomator', FakeAutomator):
+            asyncio.run(_worker_loop(conn, 0))
+        self.assertEqual(conn.sent, [('done', 'task-1', {'success': True, 'run_id': 'run-1'})])
+        run_id, thread_name = FakeAutomator.calls[-1]
+        self.assertEqual(run_id, 'run-1')
+        self.assertTrue(thread_name.startswith('worker-0-run'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ import requests
 import os
 from typing import Dict, Any, Optional
 import json
+import uuid
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -13,6 +14,7 @@ class MCPClient:
     def __init__(self):
         self.mcp_base_url = os.getenv('MCP_SERVER_URL', 'http://localhost:8080')
         self.timeout = 30
+        self.automation_timeout = 180  # Much longer timeout for automation (3 minutes)
     
     def analyze_video(self, video_path: str) -> Dict[str, Any]:
         """
@@ -54,21 +56,80 @@ class MCPClient:
                 'error': f"Unexpected error: {str(e)}"
             }
     
+    def _post_run(self, path: str, payload: Dict[str, Any]) -> requests.Response:
+        """
+        POST a browser run to the MCP server.
+        The run gets a deadline just inside our own timeout, and is cancelled
+        if we stop waiting so the server does not keep driving the browser.
+        """
+        run_id = uuid.uuid4().hex
+        try:
+            return requests.post(
+                f"{self.mcp_base_url}/{path}",
+                json={**payload, 'run_id': run_id, 'deadline_seconds': self.automation_timeout - 10},
+                timeout=self.automation_timeout
+            )
+        except requests.exceptions.Timeout:
+            self.cancel_run(run_id, 'client timed out')
+            raise
+    
     def execute_automation(self, steps: list, video_id: str) -> Dict[str, Any]:
         """
         Execute browser automation steps via MCP server
         """
         try:
-            payload = {
+            response = self._post_run('execute_browser_action', {
                 'steps': steps,
                 'video_id': video_id
-            }
+            })
             
+            if response.status_code == 200:
+                return {
+                    'success': True,
+                    'data': response.json()
+                }
+            else:
+                return {
+                    'success': False,
+                    'error': f"Automation failed: {response.status_code} - {response.text}"
+                }
+                
+        except requests.exceptions.RequestException as e:
+            return {
+                'success': False,
+                'error': f"Failed to connect to MCP server: {str(e)}"
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f"Unexpected error: {str(e)}"
+            }
+    
+    def cancel_run(self, run_id: str, reason: str = 'cancelled by client') -> bool:
+        """
+        Ask the MCP server to stop a run and free its browser
+        """
+        try:
             response = requests.post(
-                f"{self.mcp_base_url}/execute_browser_action",
-                json=payload,
-                timeout=180  # Much longer timeout for automation (3 minutes)
+                f"{self.mcp_base_url}/cancel_run",
+                json={'run_id': run_id, 'reason': reason},
+                timeout=10
             )
+            return response.status_code == 200
+        except requests.exceptions.RequestException:
+            return False
+    
+    def resume_automation(self, checkpoint_id: str, steps: list, execution_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Resume a checkpointed automation run from its failed step with corrected steps,
+        with the same timeout, deadline and cancellation as execute_automation
+        """
+        try:
+            response = self._post_run('resume_execution', {
+                'checkpoint_id': checkpoint_id,
+                'steps': steps,
+                'execution_id': execution_id
+            })
             
             if response.status_code == 200:
                 return {
@@ -78,7 +139,7 @@ class MCPClient:
             else:
                 return {
                     'success': False,
-                    'error': f"Automation failed: {response.status_code} - {response.text}"
+                    'error': f"Resume failed: {response.status_code} - {response.text}"
                 }
                 
         except requests.exceptions.RequestException as e: